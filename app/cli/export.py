@@ -0,0 +1,45 @@
+"""
+Columnar export of activity logs and hints.
+
+    uv run python -m app.cli.export activity_logs --partition-by day
+    uv run python -m app.cli.export hints --format arrow --full
+"""
+import argparse
+
+from app.db import Base, SessionLocal, engine
+from app.services.columnar_export import DATASETS, export_dataset
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Export tables to Parquet / Arrow IPC files")
+    parser.add_argument("dataset", choices=sorted(DATASETS))
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--partition-by", choices=["device", "day"], default="device")
+    parser.add_argument("--columns", help="Comma-separated column projection")
+    parser.add_argument("--compression", default="zstd", help="zstd, snappy, lz4, gzip or none")
+    parser.add_argument("--full", action="store_true", help="Ignore the high-water mark and rewrite everything")
+    parser.add_argument("--out-dir", help="Output directory (default: settings.export_dir)")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        result = export_dataset(
+            db,
+            args.dataset,
+            fmt=args.format,
+            partition_by=args.partition_by,
+            columns=args.columns.split(",") if args.columns else None,
+            compression=None if args.compression == "none" else args.compression,
+            incremental=not args.full,
+            out_dir=args.out_dir,
+        )
+    finally:
+        db.close()
+
+    print(f"Exported {result.rows} {result.dataset} rows to {len(result.files)} files "
+          f"(high-water mark {result.high_water_mark})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Standalone hint-job consumer, scaled independently of the API.
+
+    uv run python -m app.cli.worker --consumers 16 --metrics-port 9101
+
+Run any number of these against the same database (one per core scales
+hint generation); each takes a share of the device slots and runs those
+devices' jobs, claimed with SKIP LOCKED so each runs once. Set
+HINT_JOB_CONSUMERS=0 on the API to leave all hint work to the workers.
+SIGINT/SIGTERM finish in-flight jobs (up to a short grace period) before
+exiting.
+"""
+import argparse
+import asyncio
+import signal
+
+from prometheus_client import start_http_server
+
+from app.config import settings
+from app import pool_metrics
+from app.db import Base, engine
+from app.log import configure_logging, shutdown_logging
+from app.models.hint_job import HintJob  # noqa: F401  (registers the tables for create_all)
+from app.models.hint_worker import HintWorker  # noqa: F401
+from app.services.hint_jobs import hint_job_queue
+
+
+async def run(consumers: int):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await hint_job_queue.start(consumers)
+    try:
+        await stop.wait()
+    finally:
+        await hint_job_queue.stop()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Consume queued hint checks (hint_jobs)")
+    parser.add_argument("--consumers", type=int, default=settings.hint_job_consumers or 8,
+                        help="Concurrent jobs in this process")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    Base.metadata.create_all(bind=engine)
+    pool_metrics.install(engine, "primary")
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+    try:
+        asyncio.run(run(args.consumers))
+    finally:
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
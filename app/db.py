@@ -1,11 +1,133 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import atexit
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Callable
+
+from sqlalchemy import create_engine, event, exc, make_url
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from sqlalchemy.pool import QueuePool
 
 from app.config import settings
 
-engine = create_engine(settings.database_url)
+logger = logging.getLogger(__name__)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited (see app/pool_metrics.py)."""
+
+    observer = None  # observer(pool_name, seconds, timed_out)
+
+    def _do_get(self):
+        observer = TimedQueuePool.observer
+        if observer is None:
+            return super()._do_get()
+        started = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except exc.TimeoutError:
+            observer(self._orig_logging_name, time.perf_counter() - started, True)
+            raise
+        observer(self._orig_logging_name, time.perf_counter() - started, False)
+        return entry
+
+
+# Statements that need the SQLite write lock; the transaction takes it before the first one
+_SQLITE_WRITE = re.compile(r"\s*(INSERT|UPDATE|DELETE|REPLACE|SAVEPOINT)\b", re.IGNORECASE)
+# SQLite CTEs can't write, so WITH ... writes exactly when its main statement does
+_SQLITE_CTE_WRITE = re.compile(r"\s*WITH\b.*\b(INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE | re.DOTALL)
+
+
+def _is_sqlite_write(statement: str, context) -> bool:
+    # Compiled DML says so itself; textual SQL (and savepoints) is matched
+    if context is not None and (context.isinsert or context.isupdate or context.isdelete):
+        return True
+    return bool(_SQLITE_WRITE.match(statement) or _SQLITE_CTE_WRITE.match(statement))
+
+
+def _configure_sqlite(engine, read_only: bool):
+    """
+    Embedded mode: WAL so readers never wait on the writer, and writes
+    serialized by taking the lock up front (BEGIN IMMEDIATE) so concurrent
+    writers queue on busy_timeout instead of failing mid-transaction.
+
+    Transactions start at the first write rather than the first statement:
+    sessions that only read, or read and then await the LLM before
+    writing, never hold the lock while idle.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None  # BEGIN is issued below, not by the driver
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")  # Durable across app crashes; WAL makes it safe
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kb)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")  # As Postgres enforces them
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _begin_immediate(conn, cursor, statement, parameters, context, executemany):
+        if conn.in_transaction() and not cursor.connection.in_transaction and _is_sqlite_write(statement, context):
+            cursor.execute("BEGIN IMMEDIATE")
+
+
+def _scratch_database() -> str:
+    """Path of a private SQLite file removed at exit."""
+    directory = tempfile.mkdtemp(prefix="minimate-")
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    return os.path.join(directory, "minimate.db")
+
+
+def _make_engine(url: str, name: str, read_only: bool = False):
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    connect_args = {}
+    if backend == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # An in-memory database lives in one connection, which the event loop and
+        # threadpool can't share safely; a throwaway file behaves the same otherwise
+        parsed = parsed.set(database=_scratch_database())
+    options = {
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_logging_name": name,
+    }
+    if backend == "sqlite":
+        # Pooled connections move between the event loop and threadpool workers
+        connect_args["check_same_thread"] = False
+    if backend == "postgresql":
+        server_options = []
+        if settings.db_statement_timeout_ms:
+            server_options.append(f"-c statement_timeout={settings.db_statement_timeout_ms}")
+        if read_only:
+            # A write routed to the replica fails loudly instead of silently hitting a standby
+            server_options.append("-c default_transaction_read_only=on")
+        if server_options:
+            connect_args["options"] = " ".join(server_options)
+    engine = create_engine(parsed, connect_args=connect_args, **options)
+    if backend == "sqlite":
+        _configure_sqlite(engine, read_only)
+    return engine
+
+
+engine = _make_engine(settings.database_url, "primary")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read-only endpoints can be served by a replica; without one they share the primary
+read_engine = _make_engine(settings.database_read_url, "replica", read_only=True) if settings.database_read_url else engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 
 class Base(DeclarativeBase):
     pass
@@ -17,3 +139,47 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Session for read-only endpoints: the replica if DATABASE_READ_URL is set. Never write through it."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def is_replica(db: Session) -> bool:
+    return db.get_bind() is not engine
+
+
+# Session.info key: callbacks waiting for the session's transaction to commit
+_AFTER_COMMIT = "after_commit_callbacks"
+
+
+def after_commit(db: Session, callback: Callable[[], None]):
+    """
+    Run `callback` once the session's current transaction commits, or drop
+    it if the transaction rolls back. For in-process state (caches, trackers)
+    that must not get ahead of what the database holds.
+    """
+    db.info.setdefault(_AFTER_COMMIT, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session):
+    if session.in_nested_transaction():
+        return  # A savepoint; wait for the real commit
+    for callback in session.info.pop(_AFTER_COMMIT, ()):
+        try:
+            callback()
+        except Exception:
+            # The data is committed; a failed cache update must not fail the request
+            logger.exception("after_commit callback failed")
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_after_commit(session: Session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_AFTER_COMMIT, None)  # Rolled back (committed ones already ran)
@@ -0,0 +1,139 @@
+"""
+Structured, non-blocking logging.
+
+Modules log through the stdlib (`logger = logging.getLogger(__name__)`) with
+%-style arguments and structured fields in `extra`. configure_logging()
+installs a single QueueHandler on the "app" logger: the request thread only
+builds a LogRecord and enqueues it; a QueueListener thread formats it and
+writes to stderr. Below the configured level nothing is built at all.
+
+Records carrying a device_id below WARNING are sampled per device
+(LOG_DEVICE_SAMPLE_RATE): a sampled device logs everything, the others
+nothing, so one device's story stays readable at high report rates.
+"""
+import json
+import logging
+import queue
+import sys
+import zlib
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:  # optional dependency: uv sync --extra wire
+    orjson = None
+
+# LogRecord attributes that aren't structured fields
+_RESERVED = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[QueueListener] = None
+
+
+def _fields(record: logging.LogRecord) -> dict:
+    return {k: v for k, v in record.__dict__.items() if k not in _RESERVED}
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, then any extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if orjson is not None:
+            return orjson.dumps(entry, default=str).decode()
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Human-readable variant for local development: `LEVEL logger msg key=value ...`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{record.levelname:<7} {record.name} {record.getMessage()}"
+        fields = _fields(record)
+        if fields:
+            line += " " + " ".join(f"{k}={v!r}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def device_sampled(device_id: str) -> bool:
+    """Whether this device's sub-WARNING logs are kept (stable per device).
+
+    Hot paths check this before logging so unsampled devices don't even
+    build a LogRecord; DeviceSampleFilter applies the same rule to the rest.
+    """
+    rate = settings.log_device_sample_rate
+    if rate >= 1.0:
+        return True
+    return zlib.crc32(device_id.encode()) % 10_000 < rate * 10_000
+
+
+class DeviceSampleFilter(logging.Filter):
+    """Keep sub-WARNING records for a stable fraction of devices."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        device_id = getattr(record, "device_id", None)
+        if device_id is None or record.levelno >= logging.WARNING:
+            return True
+        return device_sampled(device_id)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueue the record as-is; formatting happens on the listener thread.
+
+    The stock QueueHandler formats in the caller to make the record
+    picklable. Ours never leaves the process, and log arguments are
+    immutable values, so that work can move off the request path.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging() -> None:
+    """Route the "app" logger through a background queue. Idempotent."""
+    global _listener
+    if _listener is not None:
+        return
+
+    # Skip per-record work we never output (see "Optimization" in the logging HOWTO):
+    # caller lookup walks the stack, the others call into os/threading/multiprocessing
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(StructuredFormatter() if settings.log_format == "json" else KeyValueFormatter())
+
+    log_queue = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(log_queue)
+    handler.addFilter(DeviceSampleFilter())
+
+    logger = logging.getLogger("app")
+    logger.setLevel(settings.log_level.upper())
+    logger.handlers[:] = [handler]
+    logger.propagate = False
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,16 +1,37 @@
+import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 
-from app.db import Base, engine, get_db
+from app.config import settings
+from app.db import Base, engine, get_db, get_read_db, read_engine
+from app.log import configure_logging, shutdown_logging
+from app import pool_metrics, sql_profiler
+from app.metrics import render_metrics
 from app.models.item import Item as ItemModel
 from app.models.activity import ActivityLog
+from app.models.app_name import AppName
+from app.models.window_title import WindowTitle
+from app.models.export_watermark import ExportWatermark
+from app.models.scheduled_event import ScheduledEvent
 from app.models.hint import Hint
+from app.models.hint_job import HintJob
+from app.models.hint_worker import HintWorker
+from app.models.ingest_receipt import IngestReceipt
 from app.models.user_preferences import UserPreferences
+from app.models.device_timer_state import DeviceTimerState
 from app.schemas.item import Item as ItemSchema
-from app.routers import activity, hints, preferences, events
+from app.routers import activity, hints, preferences, events, admin
+from app.services.admission import admission_controller
+from app.services.event_scheduler import event_scheduler
+from app.services.hint_jobs import hint_job_queue
+from app.services.hint_sweeper import hint_sweeper
+from app.services.preferences_cache import preferences_cache
+from app.traffic_capture import TrafficCaptureMiddleware, traffic_capture
+
+logger = logging.getLogger(__name__)
 
 
 def seed_database(db: Session):
@@ -23,18 +44,36 @@ def seed_database(db: Session):
         ]
         db.add_all(sample_items)
         db.commit()
-        print("Database seeded with sample items")
+        logger.info("Database seeded with sample items")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    configure_logging()
+    if settings.traffic_capture_path:
+        traffic_capture.start()
     # Startup: create tables and seed data
     Base.metadata.create_all(bind=engine)
     db = next(get_db())
     seed_database(db)
     db.close()
+    if settings.event_scheduler_enabled:
+        await event_scheduler.start()
+    preferences_cache.start_listener()
+    await hint_sweeper.start()
+    if settings.hint_job_consumers:
+        await hint_job_queue.start()
+    if settings.admission_enabled:
+        await admission_controller.start()
     yield
-    # Shutdown: cleanup if needed
+    # Shutdown: stop background work
+    await admission_controller.stop()
+    await hint_job_queue.stop()
+    await hint_sweeper.stop()
+    await event_scheduler.stop()
+    preferences_cache.stop_listener()
+    traffic_capture.stop()
+    shutdown_logging()
 
 
 app = FastAPI(
@@ -44,6 +83,13 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+sql_profiler.install(engine)
+pool_metrics.install(engine, "primary")
+if read_engine is not engine:
+    sql_profiler.install(read_engine)
+    pool_metrics.install(read_engine, "replica")
+app.add_middleware(sql_profiler.SQLProfilerMiddleware)
+app.add_middleware(TrafficCaptureMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -57,6 +103,7 @@ app.include_router(activity.router)
 app.include_router(hints.router)
 app.include_router(preferences.router)
 app.include_router(events.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -69,14 +116,20 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+
 @app.get("/items", response_model=list[ItemSchema])
-async def get_items(db: Session = Depends(get_db)):
+async def get_items(db: Session = Depends(get_read_db)):
     """Get all items from the database"""
     return db.query(ItemModel).all()
 
 
 @app.get("/items/{item_id}", response_model=ItemSchema)
-async def get_item(item_id: int, db: Session = Depends(get_db)):
+async def get_item(item_id: int, db: Session = Depends(get_read_db)):
     """Get a specific item by ID"""
     item = db.query(ItemModel).filter(ItemModel.id == item_id).first()
     if not item:
@@ -0,0 +1,177 @@
+"""
+Prometheus metrics for the hint pipeline, served at /metrics.
+
+Collectors are plain in-process prometheus_client objects (a lock and a few
+floats per observation). With several workers, set PROMETHEUS_MULTIPROC_DIR
+to an empty directory shared by them; each process then writes its samples
+there and /metrics aggregates across all of them.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from app.db import after_commit
+from app.models.hint import Hint
+
+# In-process work (summaries, classification) is sub-millisecond
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+LLM_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 60)
+ROW_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+INGEST_SECONDS = Histogram(
+    "activity_ingest_seconds",
+    "Time to store an activity report and build its response",
+    ["endpoint"],
+)
+BATCH_ROWS = Histogram(
+    "activity_batch_rows",
+    "Activity rows per report",
+    ["endpoint"],
+    buckets=ROW_BUCKETS,
+)
+INGEST_DUPLICATES = Counter(
+    "ingest_duplicates_total",
+    "Retried requests answered from their stored result (batch_id / request_id)",
+    ["kind"],  # report, time_trigger
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "Time to check a connection out of the pool (see app/pool_metrics.py)",
+    ["pool"],
+    buckets=FAST_BUCKETS + (0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT_SECONDS",
+    ["pool"],
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CAPACITY = Gauge(
+    "db_pool_capacity",
+    "pool_size + max_overflow; checked_out / capacity is saturation",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing SQL per request (see app/sql_profiler.py)",
+    ["route"],
+)
+SUMMARY_SECONDS = Histogram(
+    "hint_activity_summary_seconds",
+    "HintGenerator._build_activity_summary time",
+    buckets=FAST_BUCKETS,
+)
+DETECT_SECONDS = Histogram(
+    "hint_detect_behavior_seconds",
+    "AIService._detect_behavior time",
+    buckets=FAST_BUCKETS,
+)
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "llm_queue_wait_seconds",
+    "Time waiting for an LLM call slot",
+    buckets=LLM_BUCKETS,
+)
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_seconds",
+    "LLM call latency",
+    ["outcome"],
+    buckets=LLM_BUCKETS,
+)
+LLM_PARSE_FAILURES = Counter(
+    "llm_json_parse_failures_total",
+    "LLM responses with no usable JSON",
+)
+HINTS_CREATED = Counter(
+    "hints_created_total",
+    "Hints created",
+    ["category"],
+)
+RATE_LIMITED = Counter(
+    "hint_rate_limit_rejections_total",
+    "Hint checks rejected by rate limits",
+    ["reason"],
+)
+HINT_JOBS_ENQUEUED = Counter(
+    "hint_jobs_enqueued_total",
+    "Hint checks added to the hint_jobs queue",
+)
+HINT_JOBS_PROCESSED = Counter(
+    "hint_jobs_processed_total",
+    "Hint jobs finished by a consumer",
+    ["outcome"],  # done, coalesced, retry, failed
+)
+HINT_JOB_LAG_SECONDS = Histogram(
+    "hint_job_lag_seconds",
+    "Time from a hint job becoming runnable to a consumer claiming it",
+    buckets=LLM_BUCKETS,
+)
+HINT_JOB_SECONDS = Histogram(
+    "hint_job_seconds",
+    "Hint job run time",
+    ["outcome"],
+    buckets=LLM_BUCKETS,
+)
+HINT_JOBS_QUEUED = Gauge(
+    "hint_jobs_queued",
+    "Queued hint jobs, sampled by each consumer pool",
+    multiprocess_mode="max",
+)
+HINT_JOB_SLOTS_OWNED = Gauge(
+    "hint_job_slots_owned",
+    "Device slots owned by this consumer process",
+    multiprocess_mode="liveall",
+)
+ADMISSION_STAGE = Gauge(
+    "admission_stage",
+    "Ingestion admission stage: 0 normal, 1 skip hints, 2 drop optional fields, 3 reject",
+    multiprocess_mode="max",
+)
+ADMISSION_SHED = Counter(
+    "admission_shed_total",
+    "Work shed by admission control",
+    ["route", "action"],  # hint_checks, optional_fields, rejected
+)
+TRAFFIC_CAPTURE_DROPPED = Counter(
+    "traffic_capture_dropped_total",
+    "Requests left out of the traffic capture",
+    ["reason"],  # queue_full, too_large, undecodable
+)
+DEVICE_ACTORS = Gauge(
+    "hint_device_actors",
+    "Per-device actors held by this consumer process",
+    multiprocess_mode="liveall",
+)
+
+
+@event.listens_for(Hint, "after_insert")
+def _count_hint_created(mapper, connection, hint):
+    # Every creation path (AI, time triggers, event reminders) goes through the ORM;
+    # counted once the insert commits, so rolled-back hints never show up
+    after_commit(object_session(hint), HINTS_CREATED.labels(category=hint.category.value).inc)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Exposition body and content type, aggregated across workers in multiprocess mode."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
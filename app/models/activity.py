@@ -1,18 +1,33 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, ForeignKey, Index
+from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.orm import relationship
 from app.db import Base
+from app.models.app_name import AppName
+from app.models.window_title import WindowTitle
 
 
 class ActivityLog(Base):
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        # Keyset pagination / range exports walk (started_at, id) per device
+        Index("ix_activity_logs_device_started_id", "device_id", "started_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     device_id = Column(String, nullable=False, index=True)
-    app_name = Column(String, nullable=False)
-    window_title = Column(String, nullable=True)        # File name, URL, etc.
+    app_id = Column(Integer, ForeignKey("apps.id"), nullable=False, index=True)
+    window_title_id = Column(Integer, ForeignKey("window_titles.id"), nullable=True)  # File name, URL, etc.
     started_at = Column(DateTime, nullable=False, index=True)
     ended_at = Column(DateTime, nullable=True)
     duration_seconds = Column(Float, nullable=True)
     idle_seconds = Column(Float, nullable=True)         # Time user was idle
     might_be_stuck = Column(Boolean, nullable=True)     # Stuck detection
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)   # Columnar export high-water mark
+
+    app = relationship(AppName, lazy="joined")
+    window = relationship(WindowTitle, lazy="joined")
+
+    # Resolved names, so readers and response schemas never see the ids
+    app_name = association_proxy("app", "name")
+    window_title = association_proxy("window", "name")
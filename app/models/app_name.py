@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+from app.db import Base
+
+
+class AppName(Base):
+    """Lookup table for interned application names."""
+    __tablename__ = "apps"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False)
@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+from app.db import Base
+
+
+class DeviceTimerState(Base):
+    """
+    Where a device is in its same-app dwell and work session, as far as the
+    server-side time triggers (services/time_triggers.py) have seen.
+    """
+    __tablename__ = "device_timer_states"
+
+    device_id = Column(String, primary_key=True)
+    current_app = Column(String, nullable=True)
+    window_title = Column(String, nullable=True)
+    app_since = Column(DateTime, nullable=True)
+    session_start = Column(DateTime, nullable=True)
+    last_seen = Column(DateTime, nullable=True)
+    same_app_hints_sent = Column(Integer, default=0, nullable=False)   # In the current dwell
+    breaks_sent = Column(Integer, default=0, nullable=False)           # In the current session
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
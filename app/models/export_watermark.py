@@ -0,0 +1,13 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+from app.db import Base
+
+
+class ExportWatermark(Base):
+    """High-water mark (highest exported id) per columnar export dataset."""
+    __tablename__ = "export_watermarks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    dataset = Column(String, unique=True, nullable=False)
+    last_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
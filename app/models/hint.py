@@ -1,6 +1,7 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy import Column, Integer, String, DateTime, Text, Enum
 import enum
+from app.config import settings
 from app.db import Base
 
 
@@ -24,6 +25,10 @@ class HintPriority(str, enum.Enum):
     HIGH = "high"
 
 
+def default_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.hint_ttl_seconds)
+
+
 class Hint(Base):
     __tablename__ = "hints"
 
@@ -37,3 +42,4 @@ class Hint(Base):
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     shown_at = Column(DateTime, nullable=True)
     dismissed_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, default=default_expiry, nullable=True, index=True)  # Unseen after this
@@ -0,0 +1,31 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, JSON, Index
+import enum
+from app.db import Base
+
+
+class HintJobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    FAILED = "failed"      # Out of attempts; kept for inspection
+
+
+class HintJob(Base):
+    """A pending hint check (check_and_generate_hint kwargs). Deleted once it succeeds."""
+    __tablename__ = "hint_jobs"
+    __table_args__ = (
+        # Dequeue scans a consumer's slots for runnable jobs, oldest first
+        Index("ix_hint_jobs_status_shard_run_after", "status", "shard", "run_after"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    device_id = Column(String, nullable=False, index=True)
+    shard = Column(Integer, nullable=False)      # Device slot (services/sharding.py)
+    payload = Column(JSON, nullable=False)
+    status = Column(Enum(HintJobStatus), default=HintJobStatus.QUEUED, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)  # Pushed back on retry
+    locked_at = Column(DateTime, nullable=True)
+    locked_by = Column(String, nullable=True)    # Consumer that claimed it
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,12 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime
+from app.db import Base
+
+
+class HintWorker(Base):
+    """A live hint-job consumer process; slots are spread over the rows with a fresh heartbeat."""
+    __tablename__ = "hint_workers"
+
+    worker_id = Column(String, primary_key=True)
+    heartbeat_at = Column(DateTime, nullable=False, index=True)
+    started_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, JSON
+from app.db import Base
+
+
+class IngestReceipt(Base):
+    """
+    A client request already processed, keyed by its idempotency key
+    (batch_id on reports, request_id on time triggers). A retry finds the
+    row and gets the stored result instead of being processed again.
+    """
+    __tablename__ = "ingest_receipts"
+
+    device_id = Column(String, primary_key=True)
+    kind = Column(String, primary_key=True)      # "report" or "time_trigger"
+    key = Column(String, primary_key=True)
+    result = Column(JSON, nullable=True)          # Filled in before the request's transaction commits
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    claimed_at = Column(DateTime, default=datetime.utcnow, nullable=True)  # Lease on a claim without a result yet
@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey
+import enum
+from app.db import Base
+
+
+class ScheduledEventStatus(str, enum.Enum):
+    SCHEDULED = "scheduled"
+    FIRED = "fired"
+    CANCELLED = "cancelled"
+    EXPIRED = "expired"      # Server was down past the grace period
+
+
+class ScheduledEvent(Base):
+    __tablename__ = "scheduled_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    device_id = Column(String, nullable=False, index=True)
+    event_title = Column(String, nullable=False)
+    event_time = Column(String, nullable=True)      # Display time, as sent by the client
+    due_at = Column(DateTime, nullable=False, index=True)  # UTC
+    status = Column(Enum(ScheduledEventStatus), default=ScheduledEventStatus.SCHEDULED, nullable=False, index=True)
+    hint_id = Column(Integer, ForeignKey("hints.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    fired_at = Column(DateTime, nullable=True)
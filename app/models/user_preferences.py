@@ -21,3 +21,6 @@ class UserPreferences(Base):
     enable_same_app_hints = Column(Boolean, default=True)  # Toggle same-app hints
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = Column(Integer, nullable=False, default=1)  # Bumped on every update (cache invalidation)
+
+    __mapper_args__ = {"version_id_col": version}
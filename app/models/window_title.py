@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+from app.db import Base
+
+
+class WindowTitle(Base):
+    """Lookup table for interned window titles."""
+    __tablename__ = "window_titles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False)
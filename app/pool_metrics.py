@@ -0,0 +1,46 @@
+"""
+Connection pool metrics: checkout wait time, timeouts and saturation.
+
+TimedQueuePool (app/db.py) reports each checkout's wait. Checkout/checkin
+events keep db_pool_checked_out current next to db_pool_capacity, so
+saturation is checked_out / capacity. recent_wait_seconds() is a cheap
+in-process view of the same waits for code that wants to react to them.
+"""
+import time
+from collections import deque
+
+from sqlalchemy import event
+
+from app.db import TimedQueuePool
+from app.metrics import DB_POOL_CAPACITY, DB_POOL_CHECKED_OUT, DB_POOL_TIMEOUTS, DB_POOL_WAIT_SECONDS
+
+_recent_waits: deque = deque(maxlen=256)   # (monotonic time, seconds), all pools
+
+
+def _observe_wait(pool_name: str, seconds: float, timed_out: bool):
+    DB_POOL_WAIT_SECONDS.labels(pool=pool_name).observe(seconds)
+    if timed_out:
+        DB_POOL_TIMEOUTS.labels(pool=pool_name).inc()
+    _recent_waits.append((time.monotonic(), seconds))
+
+
+def recent_wait_seconds(window_seconds: float = 5.0) -> float:
+    """Longest checkout wait in the last `window_seconds`."""
+    cutoff = time.monotonic() - window_seconds
+    return max((seconds for at, seconds in list(_recent_waits) if at >= cutoff), default=0.0)
+
+
+def install(engine, name: str):
+    """Export pool metrics for engine under pool=name."""
+    pool = engine.pool
+    TimedQueuePool.observer = _observe_wait
+    DB_POOL_CAPACITY.labels(pool=name).set(pool.size() + max(pool._max_overflow, 0))
+    checked_out = DB_POOL_CHECKED_OUT.labels(pool=name)
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_out.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        checked_out.dec()
@@ -1,29 +1,235 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+import base64
+import logging
+import time
+from datetime import datetime
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
-from app.db import get_db
+from app.config import settings
+from app.log import device_sampled
+from app.sampling_profiler import profiled
+from app.db import after_commit, get_db, get_read_db
+from app.metrics import BATCH_ROWS, INGEST_SECONDS
 from app.models.activity import ActivityLog
-from app.schemas.activity import ActivityBatchReport, ActivityLogResponse
-from app.services.hint_generator import HintGenerator
+from app.schemas.activity import (
+    ActivityBatchReport,
+    ActivityLogResponse,
+    ActivityReportItem,
+    BulkActivityReport,
+    BulkReportResult,
+)
+from app.services import idempotency
+from app.services.hint_jobs import enqueue_hint_checks, hint_job_queue
+from app.services.activity_export import stream_activities
+from app.services.admission import Stage, admit, record_shed
+from app.services.behavior_classifier import detect_behavior_batch
+from app.services.interning import app_names, window_titles
+from app.services.last_app_cache import last_app_cache, latest_app_id
+from app.services.row_serializers import activity_log_rows
+from app.services.time_triggers import TimeTrigger, time_trigger_tracker
+from app.wire_format import FastResponse, NegotiatedRoute
 
-router = APIRouter(prefix="/activities", tags=["activities"])
+logger = logging.getLogger(__name__)
 
+router = APIRouter(prefix="/activities", tags=["activities"], route_class=NegotiatedRoute)
 
-@router.post("/report", response_model=list[ActivityLogResponse])
+
+@router.post("/report", response_model=list[ActivityLogResponse], response_class=FastResponse)
+@profiled("activities.report")
 async def report_activities(
     report: ActivityBatchReport,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    stage: Stage = Depends(admit("activities.report")),
 ):
     """
     Receive activity reports and generate AI-powered hints.
+
+    Hint checks are queued in the same transaction (hint_jobs) and run by
+    the consumer pool, so the response never waits on the LLM. Under
+    overload (services/admission.py) checks, then window titles, are shed.
+
+    A retry with the same batch_id gets the original rows back (with
+    X-Duplicate: true) without storing anything.
+    """
+    started = time.perf_counter()
+    batch_key = (report.device_id, report.batch_id)
+    if report.batch_id:
+        duplicate = idempotency.claim(db, "report", [batch_key])
+        if duplicate:
+            return _duplicate_response(activity_log_rows(db, duplicate[batch_key].get("activity_ids", [])))
+    BATCH_ROWS.labels(endpoint="report").observe(len(report.activities))
+
+    app_ids = app_names.get_ids(db, (a.app_name for a in report.activities))
+    title_ids = _title_ids(db, (a.window_title for a in report.activities), stage, "activities.report")
+
+    created_logs = _add_activity_logs(db, report, app_ids, title_ids)
+
+    db.flush()
+    created_ids = [log.id for log in created_logs]
+
+    # Get current activity data
+    current_activity = report.activities[0] if report.activities else None
+    hint_checks = []
+    is_app_switch = False
+    if current_activity:
+        is_app_switch = _is_app_switch(db, report, created_ids[0], app_ids)
+        struggle_data = _struggle_data(current_activity)
+        _log_report(report.device_id, struggle_data, is_app_switch)
+        if stage >= Stage.SKIP_HINTS:
+            record_shed("activities.report", "hint_checks")
+        else:
+            # ALWAYS try to generate hints (rate limiting is in hint_generator)
+            hint_checks = _hint_checks(db, report, is_app_switch, struggle_data)
+    enqueue_hint_checks(db, hint_checks)
+    receipts = {}
+    if report.batch_id:
+        receipts[batch_key] = {"activity_ids": created_ids, "is_app_switch": is_app_switch}
+        idempotency.record(db, "report", receipts)
+    db.commit()
+    idempotency.remember("report", receipts)
+    if hint_checks:
+        hint_job_queue.notify()
+
+    if settings.validate_responses:
+        for log in created_logs:
+            db.refresh(log)
+        response = created_logs
+    else:
+        response = FastResponse(activity_log_rows(db, created_ids))
+    INGEST_SECONDS.labels(endpoint="report").observe(time.perf_counter() - started)
+
+    return response
+
+
+@router.post("/report/bulk", response_model=list[BulkReportResult], response_class=FastResponse)
+async def report_activities_bulk(
+    bulk: BulkActivityReport,
+    response: Response,
+    db: Session = Depends(get_db),
+    stage: Stage = Depends(admit("activities.report_bulk")),
+):
+    """
+    Receive activity reports for many devices at once (edge gateways).
+
+    All reports and their queued hint checks are stored in a single
+    transaction. Reports whose batch_id was already stored get their
+    original result back; X-Duplicate-Reports counts them.
     """
+    started = time.perf_counter()
+    duplicates = idempotency.claim(db, "report", [(r.device_id, r.batch_id) for r in bulk.reports if r.batch_id])
+    reports = _fresh_reports(bulk.reports, duplicates)
+    all_activities = [a for report in reports for a in report.activities]
+    BATCH_ROWS.labels(endpoint="bulk").observe(len(all_activities))
+    app_ids = app_names.get_ids(db, (a.app_name for a in all_activities))
+    title_ids = _title_ids(db, (a.window_title for a in all_activities), stage, "activities.report_bulk")
+
+    logs_per_report = [_add_activity_logs(db, report, app_ids, title_ids) for report in reports]
+
+    # Ids are assigned on flush; read them now so commit doesn't force a refresh per row
+    db.flush()
+    ids_per_report = [[log.id for log in logs] for logs in logs_per_report]
+
+    results = []
+    checked = []  # (report, is_app_switch, struggle_data) for each report that gets hint checks
+    latest_apps = {}
+    for report, activity_ids in zip(reports, ids_per_report):
+        is_app_switch = False
+        if activity_ids:
+            current_activity = report.activities[0]
+            is_app_switch = _is_app_switch(db, report, activity_ids[0], app_ids, latest_apps)
+            struggle_data = _struggle_data(current_activity)
+            _log_report(report.device_id, struggle_data, is_app_switch)
+            if stage < Stage.SKIP_HINTS:
+                checked.append((report, is_app_switch, struggle_data))
+
+        results.append(BulkReportResult(
+            device_id=report.device_id,
+            created=len(activity_ids),
+            activity_ids=activity_ids,
+            is_app_switch=is_app_switch,
+        ))
+
+    _classify_behaviors([struggle_data for _, _, struggle_data in checked])
+    # Time triggers lock each device's timer row: take them in one order across requests
+    hint_checks = [
+        check
+        for report, is_app_switch, struggle_data in sorted(checked, key=lambda c: c[0].device_id)
+        for check in _hint_checks(db, report, is_app_switch, struggle_data)
+    ]
+    if stage >= Stage.SKIP_HINTS:
+        record_shed("activities.report_bulk", "hint_checks")
+    enqueue_hint_checks(db, hint_checks)
+    receipts = {
+        (report.device_id, report.batch_id): {"activity_ids": result.activity_ids, "is_app_switch": result.is_app_switch}
+        for report, result in zip(reports, results)
+        if report.batch_id
+    }
+    idempotency.record(db, "report", receipts)
+    db.commit()
+    idempotency.remember("report", receipts)
+    if hint_checks:
+        hint_job_queue.notify()
+
+    if len(reports) < len(bulk.reports):
+        # Answer every report in request order; keyed ones from their receipt
+        stored = {**duplicates, **receipts}
+        unkeyed = iter([result for report, result in zip(reports, results) if not report.batch_id])
+        results = [
+            _receipt_result(report.device_id, stored[(report.device_id, report.batch_id)])
+            if report.batch_id else next(unkeyed)
+            for report in bulk.reports
+        ]
+        response.headers["X-Duplicate-Reports"] = str(len(bulk.reports) - len(reports))
+    INGEST_SECONDS.labels(endpoint="bulk").observe(time.perf_counter() - started)
+
+    return results
+
+
+def _fresh_reports(reports: list[ActivityBatchReport], duplicates: dict) -> list[ActivityBatchReport]:
+    """Reports to store: those not stored before, each batch_id once."""
+    fresh, keys = [], set()
+    for report in reports:
+        if report.batch_id:
+            key = (report.device_id, report.batch_id)
+            if key in duplicates or key in keys:
+                continue
+            keys.add(key)
+        fresh.append(report)
+    return fresh
+
+
+def _receipt_result(device_id: str, receipt: dict) -> BulkReportResult:
+    activity_ids = receipt.get("activity_ids", [])
+    return BulkReportResult(
+        device_id=device_id,
+        created=len(activity_ids),
+        activity_ids=activity_ids,
+        is_app_switch=receipt.get("is_app_switch", False),
+    )
+
+
+def _duplicate_response(rows: list[dict]) -> FastResponse:
+    return FastResponse(rows, headers={"X-Duplicate": "true"})
+
+
+def _title_ids(db: Session, titles, stage: Stage, route: str) -> dict:
+    """Window title ids; none at all once admission control is dropping optional fields."""
+    if stage >= Stage.DROP_OPTIONAL:
+        record_shed(route, "optional_fields")
+        return {}
+    return window_titles.get_ids(db, titles)
+
+
+def _add_activity_logs(db: Session, report: ActivityBatchReport, app_ids: dict, title_ids: dict) -> list[ActivityLog]:
     created_logs = []
 
     for activity in report.activities:
         activity_log = ActivityLog(
             device_id=report.device_id,
-            app_name=activity.app_name,
-            window_title=activity.window_title,
+            app_id=app_ids[activity.app_name],
+            window_title_id=title_ids.get(activity.window_title),
             started_at=activity.started_at,
             ended_at=activity.ended_at,
             duration_seconds=activity.duration_seconds,
@@ -33,30 +239,60 @@ async def report_activities(
         db.add(activity_log)
         created_logs.append(activity_log)
 
-    db.commit()
+    return created_logs
 
-    for log in created_logs:
-        db.refresh(log)
 
-    # Get current activity data
-    current_activity = report.activities[0] if report.activities else None
-    if not current_activity:
-        return created_logs
-
-    current_app = current_activity.app_name
-
-    # Check if this is an app switch
-    prev_activity = (
-        db.query(ActivityLog)
-        .filter(ActivityLog.device_id == report.device_id)
-        .filter(ActivityLog.id < created_logs[0].id)
-        .order_by(ActivityLog.id.desc())
-        .first()
-    )
-    is_app_switch = prev_activity and prev_activity.app_name != current_app
+def _is_app_switch(
+    db: Session, report: ActivityBatchReport, first_new_id: int, app_ids: dict, latest_apps: dict | None = None,
+) -> bool:
+    """
+    Check if the report's newest activity is in a different app than the
+    device's last known one, before this report (cached; the DB is only
+    asked on a miss). The newest app becomes the last known one once the
+    report commits.
+
+    `latest_apps` carries apps across reports in one bulk request, where
+    a device's earlier report isn't committed (or cached) yet.
+    """
+    newest = max(report.activities, key=lambda a: a.started_at)
+    current_app_id = app_ids[newest.app_name]
+    prev_app_id = latest_apps.get(report.device_id) if latest_apps is not None else None
+    if prev_app_id is None:
+        prev_app_id = last_app_cache.get(report.device_id)
+    if prev_app_id is None:
+        prev_app_id = latest_app_id(db, report.device_id, first_new_id)
+    if latest_apps is not None:
+        latest_apps[report.device_id] = current_app_id
+    after_commit(db, lambda: last_app_cache.put(report.device_id, current_app_id))
+    return prev_app_id is not None and prev_app_id != current_app_id
+
+
+def _hint_checks(db: Session, report: ActivityBatchReport, is_app_switch: bool, struggle_data: dict) -> list[dict]:
+    """Queued hint checks for one report: the activity itself plus any time triggers it crossed."""
+    checks = [{
+        "device_id": report.device_id,
+        "is_app_switch": is_app_switch,
+        "struggle_data": struggle_data,
+    }]
+    for trigger in _time_triggers(db, report):
+        checks.append({
+            "device_id": report.device_id,
+            "trigger_type": trigger.trigger_type,
+            "struggle_data": trigger.struggle_data,
+        })
+    return checks
 
-    # Extract context data
-    struggle_data = {
+
+def _time_triggers(db: Session, report: ActivityBatchReport) -> list[TimeTrigger]:
+    """Same-app / break triggers crossed by this report (server-side tracking)."""
+    if not settings.server_time_triggers_enabled:
+        return []
+    return time_trigger_tracker.observe(db, report.device_id, report.activities)
+
+
+def _struggle_data(current_activity: ActivityReportItem) -> dict:
+    """Extract context data from the current activity."""
+    return {
         "struggle_score": current_activity.struggle_score or 0,
         "tab_switch_count": current_activity.tab_switch_count or 0,
         "back_and_forth_count": current_activity.back_and_forth_count or 0,
@@ -64,41 +300,101 @@ async def report_activities(
         "context": current_activity.context or "",
         "recent_windows": current_activity.recent_windows or [],
         "window_title": current_activity.window_title or "",
-        "current_app": current_app,
+        "current_app": current_activity.app_name,
     }
 
-    score = struggle_data["struggle_score"]
-    window = struggle_data["window_title"][:50]
-    switch_label = "🔄 SWITCH" if is_app_switch else "📊"
-    struggle_label = "🆘 HELP!" if score >= 4 else ""
-    print(f"{switch_label} {current_app} | score={score} {struggle_label} | {window}")
-
-    # ALWAYS try to generate hints (rate limiting is in hint_generator)
-    async def check_hints():
-        generator = HintGenerator(db)
-        await generator.check_and_generate_hint(
-            report.device_id,
-            is_app_switch=is_app_switch,
-            struggle_data=struggle_data
-        )
 
-    background_tasks.add_task(check_hints)
+def _classify_behaviors(struggle_data: list[dict]):
+    """
+    Classify a bulk request's reports in one batch and carry each behavior in
+    its hint check, so consumers don't classify them one at a time. Reports
+    without a window title are left to the consumer, which falls back to
+    the device's stored one.
+    """
+    titled = [data for data in struggle_data if data["window_title"]]
+    for data, behavior in zip(titled, detect_behavior_batch(titled)):
+        data["behavior"] = behavior
+
+
+def _log_report(device_id: str, struggle_data: dict, is_app_switch: bool):
+    if not (logger.isEnabledFor(logging.INFO) and device_sampled(device_id)):
+        return
+    logger.info("Activity report", extra={
+        "device_id": device_id,
+        "app": struggle_data["current_app"],
+        "score": struggle_data["struggle_score"],
+        "app_switch": is_app_switch,
+        "window": struggle_data["window_title"][:50],
+    })
 
-    return created_logs
+
+def _encode_cursor(log: ActivityLog) -> str:
+    raw = f"{log.started_at.isoformat()}|{log.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        started_at, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(started_at), int(log_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 @router.get("/{device_id}/summary", response_model=list[ActivityLogResponse])
 async def get_activity_summary(
     device_id: str,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    response: Response,
+    limit: int = Query(100, ge=1),
+    cursor: str | None = None,
+    db: Session = Depends(get_read_db)
 ):
-    """Get recent activity logs for a device."""
+    """
+    Get recent activity logs for a device, newest first.
+
+    Paginated by keyset on (started_at, id): when more rows may follow, the
+    X-Next-Cursor header carries the cursor for the next page.
+    """
+    limit = min(limit, settings.max_page_size)
+
+    query = db.query(ActivityLog).filter(ActivityLog.device_id == device_id)
+
+    if cursor:
+        started_at, log_id = _decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                ActivityLog.started_at < started_at,
+                and_(ActivityLog.started_at == started_at, ActivityLog.id < log_id),
+            )
+        )
+
     activities = (
-        db.query(ActivityLog)
-        .filter(ActivityLog.device_id == device_id)
-        .order_by(ActivityLog.started_at.desc())
+        query
+        .order_by(ActivityLog.started_at.desc(), ActivityLog.id.desc())
         .limit(limit)
         .all()
     )
+
+    if len(activities) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(activities[-1])
+
     return activities
+
+
+@router.get("/{device_id}/export")
+async def export_activities(
+    device_id: str,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start: datetime | None = None,
+    end: datetime | None = None,
+):
+    """
+    Stream a device's activity history (oldest first) as NDJSON or CSV.
+    Rows are read from a server-side cursor, so memory stays flat for any range.
+    """
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_activities(format, device_id, start, end),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{device_id}.{format}"'},
+    )
@@ -0,0 +1,93 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app import sql_profiler
+from app.config import settings
+from app.db import get_db
+from app.sampling_profiler import profiler
+from app.schemas.export import ExportRequest, ExportResponse
+from app.schemas.profiler import ProfilerConfig, ProfilerStatus
+from app.services.columnar_export import export_dataset
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)):
+    """Admin routes need X-Admin-Token matching ADMIN_TOKEN; without one they are off, debug or not."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Set ADMIN_TOKEN to enable admin endpoints")
+    if not secrets.compare_digest(x_admin_token or "", settings.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.post("/export", response_model=ExportResponse)
+async def run_export(
+    request: ExportRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Export activity logs or hints to partitioned Parquet / Arrow IPC files
+    under settings.export_dir. Incremental by default (high-water mark).
+    """
+    try:
+        result = await run_in_threadpool(
+            export_dataset,
+            db,
+            request.dataset,
+            fmt=request.format,
+            partition_by=request.partition_by,
+            columns=request.columns,
+            compression=request.compression,
+            incremental=request.incremental,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return ExportResponse(
+        dataset=result.dataset,
+        rows=result.rows,
+        files=result.files,
+        high_water_mark=result.high_water_mark,
+    )
+
+
+@router.get("/sql-profile")
+async def sql_profile(limit: int = 50):
+    """
+    Recent per-request SQL profiles (statement count, DB time, slowest and
+    repeated statements), newest first. Needs SQL_PROFILING=true.
+    """
+    if not settings.sql_profiling:
+        raise HTTPException(status_code=404, detail="SQL profiling is disabled")
+    return list(reversed(sql_profiler.recent_profiles()))[:limit]
+
+
+def _profiler_status() -> ProfilerStatus:
+    return ProfilerStatus(
+        enabled=profiler.enabled,
+        interval_ms=profiler.interval * 1000,
+        keep_slowest=profiler.keep_slowest,
+        captures=profiler.captures(),
+    )
+
+
+@router.get("/profiler", response_model=ProfilerStatus)
+async def get_profiler():
+    """Profiler state and the N slowest profiled requests (folded-stack files)."""
+    return _profiler_status()
+
+
+@router.post("/profiler", response_model=ProfilerStatus)
+async def configure_profiler(config: ProfilerConfig):
+    """
+    Turn the sampling profiler on or off. While on, profiled routes and
+    queued hint checks are sampled and the slowest are written to
+    settings.profile_dir as .folded files (flamegraph.pl / speedscope).
+    """
+    await run_in_threadpool(profiler.configure, config.enabled, config.interval_ms, config.keep_slowest)
+    return _profiler_status()
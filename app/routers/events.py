@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends
+import logging
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from datetime import datetime
 from app.db import get_db
-from app.models.hint import Hint, HintStatus, HintCategory, HintPriority
-from app.services.ai_service import ai_service
+from app.models.scheduled_event import ScheduledEvent, ScheduledEventStatus
+from app.sampling_profiler import profiled
+from app.services.event_scheduler import create_event_reminder, event_scheduler
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/events", tags=["events"])
 
@@ -15,7 +19,15 @@ class EventReminderRequest(BaseModel):
     event_time: str
 
 
+class EventScheduleRequest(BaseModel):
+    device_id: str
+    event_title: str
+    event_time: str | None = None
+    due_at: datetime  # When the reminder should fire
+
+
 @router.post("/reminder")
+@profiled("events.reminder")
 async def send_event_reminder(
     request: EventReminderRequest,
     db: Session = Depends(get_db)
@@ -24,23 +36,62 @@ async def send_event_reminder(
     Receive an event reminder and generate an AI-powered hint.
     Shows immediately at the scheduled time.
     """
-    # Generate AI-powered reminder
-    hint_result = await ai_service.generate_event_reminder(
-        event_title=request.event_title
-    )
+    hint = await create_event_reminder(db, request.device_id, request.event_title)
 
-    if hint_result.should_generate:
-        hint = Hint(
-            device_id=request.device_id,
-            category=HintCategory.EVENT_REMINDER,
-            priority=HintPriority.HIGH,
-            title=hint_result.title,
-            message=hint_result.message,
-            status=HintStatus.PENDING,
-        )
-        db.add(hint)
+    if hint:
         db.commit()
-        print(f"📅 Created event reminder: {hint_result.title}")
+        logger.info("Created event reminder: %s", hint.title, extra={"device_id": request.device_id})
         return {"status": "reminder_created", "event": request.event_title, "hint_id": hint.id}
 
     return {"status": "no_reminder_created", "event": request.event_title}
+
+
+@router.post("/schedule")
+async def schedule_event_reminder(
+    request: EventScheduleRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Register an upcoming event. The server creates the reminder hint
+    at due_at; the client no longer has to call in at the right moment.
+    """
+    due_at = request.due_at
+    if due_at.tzinfo is not None:
+        due_at = due_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+    event = ScheduledEvent(
+        device_id=request.device_id,
+        event_title=request.event_title,
+        event_time=request.event_time,
+        due_at=due_at,
+        status=ScheduledEventStatus.SCHEDULED,
+    )
+    db.add(event)
+    db.commit()
+    db.refresh(event)
+
+    event_scheduler.schedule(db, event)
+
+    return {"status": "scheduled", "event_id": event.id, "due_at": event.due_at}
+
+
+@router.delete("/schedule/{event_id}")
+async def cancel_event_reminder(
+    event_id: int,
+    db: Session = Depends(get_db)
+):
+    """Cancel a scheduled event reminder that hasn't fired yet."""
+    cancelled = (
+        db.query(ScheduledEvent)
+        .filter(
+            ScheduledEvent.id == event_id,
+            ScheduledEvent.status == ScheduledEventStatus.SCHEDULED,
+        )
+        .update({ScheduledEvent.status: ScheduledEventStatus.CANCELLED}, synchronize_session=False)
+    )
+    db.commit()
+
+    if not cancelled:
+        raise HTTPException(status_code=404, detail="Scheduled event not found or already fired")
+
+    return {"status": "cancelled", "event_id": event_id}
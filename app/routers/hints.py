@@ -1,11 +1,23 @@
+import logging
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from typing import Annotated
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
 from pydantic import BaseModel
-from sqlalchemy import case
+from sqlalchemy import case, func, literal, or_, update
 from sqlalchemy.orm import Session
-from app.db import get_db
+from app.config import settings
+from app.db import get_db, get_read_db
 from app.models.hint import Hint, HintStatus, HintPriority
-from app.schemas.hint import HintResponse, HintStatusUpdate, PendingHintsResponse
+from app.schemas.hint import (
+    MAX_STATUS_BATCH, HintResponse, HintStatusBatchItem, HintStatusUpdate, PendingHintsResponse,
+)
+from app.sampling_profiler import profiled
+from app.services import idempotency
+from app.services.admission import Stage, admit, record_shed
+from app.services.row_serializers import hint_rows
+from app.wire_format import FastResponse, NegotiatedRoute
+
+logger = logging.getLogger(__name__)
 
 
 class TimeTriggerRequest(BaseModel):
@@ -18,14 +30,15 @@ class TimeTriggerRequest(BaseModel):
     break_number: int | None = None
     context: str | None = None
     recent_windows: list[str] | None = None
+    request_id: str | None = None  # Idempotency key; reused on retry
 
-router = APIRouter(prefix="/hints", tags=["hints"])
+router = APIRouter(prefix="/hints", tags=["hints"], route_class=NegotiatedRoute)
 
 
-@router.get("/{device_id}/pending", response_model=PendingHintsResponse)
+@router.get("/{device_id}/pending", response_model=PendingHintsResponse, response_class=FastResponse)
 async def get_pending_hints(
     device_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all pending hints for a device.
@@ -39,18 +52,22 @@ async def get_pending_hints(
         else_=4
     )
 
-    hints = (
-        db.query(Hint)
-        .filter(
-            Hint.device_id == device_id,
-            Hint.status == HintStatus.PENDING
-        )
-        .order_by(
-            priority_order,
-            Hint.created_at.asc()
-        )
-        .all()
+    # Filter on expires_at too, so correctness doesn't depend on the sweeper
+    criteria = (
+        Hint.device_id == device_id,
+        Hint.status == HintStatus.PENDING,
+        or_(Hint.expires_at.is_(None), Hint.expires_at > datetime.utcnow())
     )
+    ordering = (
+        priority_order,
+        Hint.created_at.asc()
+    )
+
+    if not settings.validate_responses:
+        rows = hint_rows(db, *criteria, order_by=ordering)
+        return FastResponse({"hints": rows, "count": len(rows)})
+
+    hints = db.query(Hint).filter(*criteria).order_by(*ordering).all()
 
     return PendingHintsResponse(
         hints=hints,
@@ -58,6 +75,58 @@ async def get_pending_hints(
     )
 
 
+@router.patch("/status", response_model=list[HintResponse], response_class=FastResponse)
+async def update_hint_statuses(
+    updates: Annotated[list[HintStatusBatchItem], Body(max_length=MAX_STATUS_BATCH)],
+    db: Session = Depends(get_db)
+):
+    """
+    Update the status of many hints in one statement (e.g. a client catching up
+    after being offline). shown_at/dismissed_at are set the same way as the
+    single-hint endpoint. Returns the updated hints; unknown ids are skipped.
+    If an id appears more than once, the last status wins. At most
+    MAX_STATUS_BATCH entries per request (422 above that).
+    """
+    statuses = {item.hint_id: item.status for item in updates}
+    if not statuses:
+        return FastResponse([])
+
+    now = datetime.utcnow()
+    ids = list(statuses)
+    shown_ids = [i for i, st in statuses.items() if st == HintStatus.SHOWN]
+    dismissed_ids = [i for i, st in statuses.items() if st == HintStatus.DISMISSED]
+
+    values = {
+        # Enum columns persist names, so bind through the column type
+        Hint.status: case(
+            {hint_id: literal(st, type_=Hint.status.type) for hint_id, st in statuses.items()},
+            value=Hint.id,
+        ),
+    }
+    if shown_ids:
+        values[Hint.shown_at] = case(
+            (Hint.id.in_(shown_ids), func.coalesce(Hint.shown_at, now)),
+            else_=Hint.shown_at,
+        )
+    if dismissed_ids:
+        values[Hint.dismissed_at] = case(
+            (Hint.id.in_(dismissed_ids), func.coalesce(Hint.dismissed_at, now)),
+            else_=Hint.dismissed_at,
+        )
+
+    db.execute(
+        update(Hint)
+        .where(Hint.id.in_(ids))
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    if settings.validate_responses:
+        return db.query(Hint).filter(Hint.id.in_(ids)).order_by(Hint.id).all()
+    return FastResponse(hint_rows(db, Hint.id.in_(ids), order_by=(Hint.id,)))
+
+
 @router.patch("/{hint_id}/status", response_model=HintResponse)
 async def update_hint_status(
     hint_id: int,
@@ -99,22 +168,45 @@ async def generate_hint(device_id: str, db: Session = Depends(get_db)):
     return {"status": "no_hint_needed"}
 
 
-@router.post("/time-trigger")
+@router.post("/time-trigger", deprecated=True)
+@profiled("hints.time_trigger")
 async def create_time_trigger_hint(
     request: TimeTriggerRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: Session = Depends(get_db),
+    stage: Stage = Depends(admit("hints.time_trigger")),
 ):
     """
     Create a hint based on time-based trigger from client.
 
+    Deprecated: the server now derives these triggers from /activities/report
+    (see services/time_triggers.py). Kept for older clients.
+
     trigger_type can be:
     - "same_app_duration": User has been in the same app for X minutes
     - "break_reminder": Time for a scheduled break
+
+    A retry with the same request_id gets the first response back (with
+    X-Duplicate: true), or status "in_progress" while that is still running.
     """
     from app.services.hint_generator import HintGenerator
 
-    print(f"⏱️ Time trigger: {request.trigger_type} | {request.app_name} | {request.duration_minutes:.1f} min")
+    if stage >= Stage.SKIP_HINTS:
+        record_shed("hints.time_trigger", "hint_checks")
+        return {"status": "skipped", "hint_id": None}
+
+    trigger_key = (request.device_id, request.request_id)
+    if request.request_id:
+        duplicate = idempotency.claim(db, "time_trigger", [trigger_key])
+        if duplicate:
+            response.headers["X-Duplicate"] = "true"
+            return duplicate[trigger_key] or {"status": "in_progress", "hint_id": None}
+        db.commit()  # Hold the key without keeping a transaction open across the LLM call
+
+    logger.info(
+        "Time trigger %s: %s for %.1f min", request.trigger_type, request.app_name, request.duration_minutes,
+        extra={"device_id": request.device_id},
+    )
 
     generator = HintGenerator(db)
 
@@ -128,12 +220,23 @@ async def create_time_trigger_hint(
         'recent_windows': request.recent_windows or [],
     }
 
-    hint = await generator.check_and_generate_hint(
-        device_id=request.device_id,
-        trigger_type=request.trigger_type,
-        struggle_data=struggle_data
-    )
+    try:
+        hint = await generator.check_and_generate_hint(
+            device_id=request.device_id,
+            trigger_type=request.trigger_type,
+            struggle_data=struggle_data
+        )
+    except Exception:
+        if request.request_id:
+            idempotency.release(db, "time_trigger", trigger_key)  # Let the client's retry run it
+        raise
 
     if hint:
-        return {"status": "created", "hint_id": hint.id, "title": hint.title}
-    return {"status": "skipped", "hint_id": None}
+        result = {"status": "created", "hint_id": hint.id, "title": hint.title}
+    else:
+        result = {"status": "skipped", "hint_id": None}
+    if request.request_id:
+        idempotency.record(db, "time_trigger", {trigger_key: result})
+        db.commit()
+        idempotency.remember("time_trigger", {trigger_key: result})
+    return result
@@ -1,36 +1,27 @@
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.db import get_db
+from sqlalchemy.orm.exc import StaleDataError
+from app.db import get_db, get_read_db
 from app.models.user_preferences import UserPreferences
 from app.schemas.preferences import UserPreferencesUpdate, UserPreferencesResponse
+from app.services.preferences_cache import preferences_cache
 
 router = APIRouter(prefix="/preferences", tags=["preferences"])
 
+UPDATE_ATTEMPTS = 3
+
 
 @router.get("/{device_id}", response_model=UserPreferencesResponse)
 async def get_preferences(
     device_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get user preferences for a device.
     Creates default preferences if they don't exist.
     """
-    preferences = (
-        db.query(UserPreferences)
-        .filter(UserPreferences.device_id == device_id)
-        .first()
-    )
-
-    if not preferences:
-        # Create default preferences
-        preferences = UserPreferences(device_id=device_id)
-        db.add(preferences)
-        db.commit()
-        db.refresh(preferences)
-
-    return preferences
+    return preferences_cache.get(db, device_id)
 
 
 @router.patch("/{device_id}", response_model=UserPreferencesResponse)
@@ -43,27 +34,40 @@ async def update_preferences(
     Update user preferences for a device.
     Only updates fields that are provided in the request.
     """
-    preferences = (
-        db.query(UserPreferences)
-        .filter(UserPreferences.device_id == device_id)
-        .first()
-    )
+    update_data = updates.model_dump(exclude_unset=True)
 
-    if not preferences:
-        raise HTTPException(
-            status_code=404,
-            detail="Preferences not found. Use GET first to create defaults."
+    # Rows are versioned: a PATCH that raced another one fails its UPDATE with
+    # StaleDataError, and is reapplied to the row the other one committed
+    for _ in range(UPDATE_ATTEMPTS):
+        preferences = (
+            db.query(UserPreferences)
+            .filter(UserPreferences.device_id == device_id)
+            .first()
         )
 
-    # Update only provided fields
-    update_data = updates.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(preferences, field, value)
+        if not preferences:
+            raise HTTPException(
+                status_code=404,
+                detail="Preferences not found. Use GET first to create defaults."
+            )
+
+        # Update only provided fields
+        for field, value in update_data.items():
+            setattr(preferences, field, value)
 
-    # Update timestamp
-    preferences.updated_at = datetime.utcnow()
+        # Update timestamp
+        preferences.updated_at = datetime.utcnow()
+
+        try:
+            db.commit()
+            break
+        except StaleDataError:
+            db.rollback()
+    else:
+        raise HTTPException(status_code=409, detail="Preferences are being updated concurrently, retry")
 
-    db.commit()
     db.refresh(preferences)
 
+    preferences_cache.publish(db, preferences)
+
     return preferences
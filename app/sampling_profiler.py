@@ -0,0 +1,206 @@
+"""
+Admin-toggled sampling profiler for slow requests.
+
+While enabled, a background thread wakes every `interval` and records the
+stack of each active profiled scope (a route wrapped with @profiled, or a
+profiler.scope() block such as a queued hint check):
+
+- if the scope's task is executing, the event-loop thread's real stack,
+  trimmed to the task's frames (sync DB calls, JSON parsing, ...);
+- if it is suspended, its chain of awaiting coroutines (e.g. parked in
+  httpx waiting on Ollama).
+
+When a scope ends, its samples are kept if it is among the N slowest seen
+so far and written as folded stacks (`frame;frame;frame count`), which
+flamegraph.pl, speedscope and inferno read directly.
+
+Disabled (the default), @profiled and scope() cost one attribute check.
+"""
+import asyncio
+import functools
+import heapq
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from app.config import settings
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _await_chain(coro) -> list:
+    """Frames of a suspended coroutine and everything it is awaiting, outermost first."""
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return frames
+
+
+def _thread_stack(frame, root=None) -> list:
+    """Frames from the thread's entry (or `root`, if on the stack) down to `frame`."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        if frame is root:
+            break
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+@dataclass
+class _Scope:
+    name: str
+    thread_id: int
+    entry: object                 # frame that entered the scope; stacks are trimmed to start here
+    coro: object = None           # the asyncio task's coroutine, if any
+    started: float = field(default_factory=time.perf_counter)
+    samples: Counter = field(default_factory=Counter)
+
+    def sample(self, current_frames: dict):
+        if self.coro is not None and not getattr(self.coro, "cr_running", False):
+            frames = _await_chain(self.coro)
+            if self.entry in frames:
+                frames = frames[frames.index(self.entry):]
+        else:
+            thread_frame = current_frames.get(self.thread_id)
+            if thread_frame is None:
+                return
+            frames = _thread_stack(thread_frame, self.entry)
+        if frames:
+            self.samples[";".join(map(_frame_label, frames))] += 1
+
+
+class _ScopeContext:
+    def __init__(self, profiler: "SamplingProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:  # Not in an event loop (threadpool / worker thread)
+            task = None
+        self.scope = _Scope(
+            self.name,
+            threading.get_ident(),
+            sys._getframe(1),
+            task.get_coro() if task else None,
+        )
+        self.profiler._active[id(self.scope)] = self.scope
+        return self.scope
+
+    def __exit__(self, *exc):
+        self.profiler._active.pop(id(self.scope), None)
+        self.profiler._finish(self.scope)
+        return False
+
+
+@dataclass(order=True)
+class Capture:
+    duration_ms: float
+    name: str = field(compare=False)
+    started_at: str = field(compare=False)
+    samples: int = field(compare=False)
+    path: str = field(compare=False)
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.interval = settings.profiler_interval_ms / 1000
+        self.keep_slowest = settings.profiler_keep_slowest
+        self._active: dict[int, _Scope] = {}
+        self._slowest: list[Capture] = []  # min-heap on duration
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def configure(self, enabled: bool, interval_ms: float = None, keep_slowest: int = None):
+        if interval_ms:
+            self.interval = interval_ms / 1000
+        if keep_slowest:
+            self.keep_slowest = keep_slowest
+        if enabled and not self.enabled:
+            os.makedirs(settings.profile_dir, exist_ok=True)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        elif not enabled and self.enabled:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+            self._active.clear()
+        self.enabled = enabled
+
+    def captures(self) -> list[Capture]:
+        with self._lock:
+            return sorted(self._slowest, reverse=True)
+
+    def scope(self, name: str):
+        """Context manager profiling the enclosed block (async task or plain thread)."""
+        if not self.enabled:
+            return nullcontext()
+        return _ScopeContext(self, name)
+
+    def _finish(self, scope: _Scope):
+        duration_ms = (time.perf_counter() - scope.started) * 1000
+        if not scope.samples:
+            return
+        with self._lock:
+            if len(self._slowest) >= self.keep_slowest and duration_ms <= self._slowest[0].duration_ms:
+                return
+            started_at = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+            path = os.path.join(settings.profile_dir, f"{scope.name}-{started_at}-{duration_ms:.0f}ms.folded")
+            capture = Capture(duration_ms, scope.name, started_at, sum(scope.samples.values()), path)
+            if len(self._slowest) >= self.keep_slowest:
+                evicted = heapq.heapreplace(self._slowest, capture)
+                try:
+                    os.remove(evicted.path)
+                except OSError:
+                    pass
+            else:
+                heapq.heappush(self._slowest, capture)
+        with open(path, "w") as f:
+            for stack, count in scope.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self._active:
+                continue
+            current_frames = sys._current_frames()
+            for scope in list(self._active.values()):
+                scope.sample(current_frames)
+
+
+profiler = SamplingProfiler()
+
+
+def profiled(name: str):
+    """Decorator for async route handlers; a no-op unless the profiler is enabled."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return await fn(*args, **kwargs)
+            with profiler.scope(name):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -29,6 +29,20 @@ class ActivityBatchReport(BaseModel):
     """Batch report containing multiple activities from a device"""
     device_id: str
     activities: list[ActivityReportItem]
+    batch_id: str | None = None  # Idempotency key (e.g. a per-device sequence number); reused on retry
+
+
+class BulkActivityReport(BaseModel):
+    """Reports for many devices in one request (edge gateways)"""
+    reports: list[ActivityBatchReport]
+
+
+class BulkReportResult(BaseModel):
+    """Per-device result of a bulk report"""
+    device_id: str
+    created: int
+    activity_ids: list[int]
+    is_app_switch: bool
 
 
 class ActivityLogResponse(BaseModel):
@@ -0,0 +1,25 @@
+from typing import Literal
+from pydantic import BaseModel, field_validator
+
+
+class ExportRequest(BaseModel):
+    """Request model for a columnar export run"""
+    dataset: Literal["activity_logs", "hints"]
+    format: Literal["parquet", "arrow"] = "parquet"
+    partition_by: Literal["device", "day"] = "device"
+    columns: list[str] | None = None        # Projection; all columns if omitted
+    compression: str | None = "zstd"
+    incremental: bool = True                 # Only rows past the high-water mark
+
+    @field_validator("compression")
+    @classmethod
+    def _normalize_compression(cls, value: str | None) -> str | None:
+        return None if value is None or value.lower() == "none" else value.lower()
+
+
+class ExportResponse(BaseModel):
+    """Summary of a columnar export run"""
+    dataset: str
+    rows: int
+    files: list[str]
+    high_water_mark: int
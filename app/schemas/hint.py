@@ -25,6 +25,15 @@ class HintStatusUpdate(BaseModel):
     status: HintStatus
 
 
+MAX_STATUS_BATCH = 1000  # Entries per PATCH /hints/status; larger backlogs are sent in several
+
+
+class HintStatusBatchItem(BaseModel):
+    """One entry of a bulk status update"""
+    hint_id: int
+    status: HintStatus
+
+
 class PendingHintsResponse(BaseModel):
     """Response containing pending hints for a device"""
     hints: list[HintResponse]
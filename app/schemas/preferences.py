@@ -34,6 +34,7 @@ class UserPreferencesResponse(BaseModel):
     enable_same_app_hints: bool
     created_at: datetime
     updated_at: datetime
+    version: int
 
     class Config:
         from_attributes = True
@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+
+
+class ProfilerConfig(BaseModel):
+    """Request model for toggling the sampling profiler"""
+    enabled: bool
+    interval_ms: float | None = Field(default=None, gt=0)   # Sampling interval; unchanged if omitted
+    keep_slowest: int | None = Field(default=None, gt=0)    # Requests kept (as .folded files)
+
+
+class ProfileCapture(BaseModel):
+    """One kept profile"""
+    name: str
+    started_at: str
+    duration_ms: float
+    samples: int
+    path: str
+
+    class Config:
+        from_attributes = True
+
+
+class ProfilerStatus(BaseModel):
+    """Current profiler state and the slowest captured requests"""
+    enabled: bool
+    interval_ms: float
+    keep_slowest: int
+    captures: list[ProfileCapture]
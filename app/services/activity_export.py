@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db import SessionLocal
+from app.models.activity import ActivityLog
+from app.models.app_name import AppName
+from app.models.window_title import WindowTitle
+
+EXPORT_COLUMNS = [
+    "id",
+    "device_id",
+    "app_name",
+    "window_title",
+    "started_at",
+    "ended_at",
+    "duration_seconds",
+    "idle_seconds",
+    "might_be_stuck",
+    "created_at",
+]
+
+
+def activity_rows_query(
+    device_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """Flat (names resolved) activity rows in (started_at, id) order."""
+    stmt = (
+        select(
+            ActivityLog.id,
+            ActivityLog.device_id,
+            AppName.name.label("app_name"),
+            WindowTitle.name.label("window_title"),
+            ActivityLog.started_at,
+            ActivityLog.ended_at,
+            ActivityLog.duration_seconds,
+            ActivityLog.idle_seconds,
+            ActivityLog.might_be_stuck,
+            ActivityLog.created_at,
+        )
+        .join(AppName, ActivityLog.app_id == AppName.id)
+        .outerjoin(WindowTitle, ActivityLog.window_title_id == WindowTitle.id)
+        .order_by(ActivityLog.started_at, ActivityLog.id)
+    )
+    if device_id is not None:
+        stmt = stmt.where(ActivityLog.device_id == device_id)
+    if start is not None:
+        stmt = stmt.where(ActivityLog.started_at >= start)
+    if end is not None:
+        stmt = stmt.where(ActivityLog.started_at < end)
+    return stmt
+
+
+def iter_row_batches(db: Session, stmt, batch_size: int = None) -> Iterator[list]:
+    """Run a query on a server-side cursor, yielding lists of rows."""
+    batch_size = batch_size or settings.export_batch_size
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield partition
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def stream_activities(
+    fmt: str,
+    device_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Iterator[str]:
+    """
+    Yield an NDJSON or CSV export chunk by chunk.
+
+    Owns its session: the response body is produced after the request's
+    dependencies have been torn down.
+    """
+    db = SessionLocal()
+    try:
+        stmt = activity_rows_query(device_id, start, end)
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            for batch in iter_row_batches(db, stmt):
+                writer.writerows(
+                    [v.isoformat() if isinstance(v, datetime) else v for v in row]
+                    for row in batch
+                )
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        else:
+            for batch in iter_row_batches(db, stmt):
+                yield "".join(
+                    json.dumps(row._asdict(), default=_json_default) + "\n"
+                    for row in batch
+                )
+    finally:
+        db.close()
@@ -0,0 +1,144 @@
+"""
+Admission control for ingestion under overload.
+
+A monitor task samples three signals: event-loop lag (how late a short
+sleep wakes up), DB pool checkout wait (app/pool_metrics.py) and the
+hint-job backlog waiting on the LLM. Pressure is the worst of them
+relative to its ADMISSION_* limit, and sets the stage:
+
+    pressure >= 1  SKIP_HINTS     reports are stored, no hint checks queued
+    pressure >= 2  DROP_OPTIONAL  window titles are not stored either
+    pressure >= 4  REJECT         429 with Retry-After
+
+Stages go up at once and come down one step per ADMISSION_COOLDOWN_SECONDS
+of lower pressure, so the service doesn't flap at a boundary. Only routes
+that declare Depends(admit(...)) are shed; event reminders, hint polling
+and preferences never are. Everything shed is counted in
+admission_shed_total.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from app import pool_metrics
+from app.config import settings
+from app.metrics import ADMISSION_SHED, ADMISSION_STAGE
+from app.services.hint_jobs import hint_job_queue, queued_job_count
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_SECONDS = 0.1
+BACKLOG_SAMPLE_SECONDS = 5.0
+
+
+class Stage(IntEnum):
+    NORMAL = 0
+    SKIP_HINTS = 1
+    DROP_OPTIONAL = 2
+    REJECT = 3
+
+
+STAGE_PRESSURE = {Stage.SKIP_HINTS: 1.0, Stage.DROP_OPTIONAL: 2.0, Stage.REJECT: 4.0}
+
+
+class AdmissionController:
+    def __init__(self):
+        self.stage = Stage.NORMAL
+        self.signals = {"loop_lag_ms": 0.0, "pool_wait_ms": 0.0, "llm_backlog": 0}
+        self._lags: deque = deque(maxlen=int(1 / SAMPLE_SECONDS))  # The last second
+        self._changed_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._set_stage(Stage.NORMAL)
+
+    async def _run(self):
+        backlog_sampled = 0.0
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(SAMPLE_SECONDS)
+            self._lags.append(max(time.monotonic() - started - SAMPLE_SECONDS, 0.0))
+
+            if settings.hint_job_consumers:
+                backlog = hint_job_queue.depth  # Sampled by the in-process consumers
+            elif time.monotonic() - backlog_sampled >= BACKLOG_SAMPLE_SECONDS:
+                backlog_sampled = time.monotonic()
+                try:
+                    backlog = await run_in_threadpool(queued_job_count)
+                except Exception:
+                    logger.exception("Admission backlog sample failed")
+                    backlog = self.signals["llm_backlog"]
+            else:
+                backlog = self.signals["llm_backlog"]
+
+            self.signals = {
+                "loop_lag_ms": round(max(self._lags) * 1000, 1),
+                "pool_wait_ms": round(pool_metrics.recent_wait_seconds() * 1000, 1),
+                "llm_backlog": backlog,
+            }
+            self._evaluate()
+
+    def pressure(self) -> float:
+        return max(
+            self.signals["loop_lag_ms"] / settings.admission_loop_lag_ms,
+            self.signals["pool_wait_ms"] / settings.admission_pool_wait_ms,
+            self.signals["llm_backlog"] / settings.admission_llm_backlog,
+        )
+
+    def _evaluate(self):
+        pressure = self.pressure()
+        target = max((stage for stage, at in STAGE_PRESSURE.items() if pressure >= at), default=Stage.NORMAL)
+        now = time.monotonic()
+        if target >= self.stage:
+            if target > self.stage:
+                logger.warning("Admission stage %s (pressure %.1f, %s)", target.name, pressure, self.signals)
+                self._set_stage(target)
+            self._changed_at = now  # Still this loaded; restart the cooldown
+        elif now - self._changed_at >= settings.admission_cooldown_seconds:
+            self._set_stage(Stage(self.stage - 1))
+            self._changed_at = now
+            logger.info("Admission stage %s (pressure %.1f)", self.stage.name, pressure)
+
+    def _set_stage(self, stage: Stage):
+        self.stage = stage
+        ADMISSION_STAGE.set(stage)
+
+
+admission_controller = AdmissionController()
+
+
+def record_shed(route: str, action: str):
+    ADMISSION_SHED.labels(route=route, action=action).inc()
+
+
+def admit(route: str):
+    """Dependency for sheddable routes: 429 at REJECT, else the stage for the route to act on."""
+
+    def dependency() -> Stage:
+        stage = admission_controller.stage
+        if stage >= Stage.REJECT:
+            record_shed(route, "rejected")
+            raise HTTPException(
+                status_code=429,
+                detail="Server overloaded, retry later",
+                headers={"Retry-After": str(settings.admission_retry_after_seconds)},
+            )
+        return stage
+
+    return dependency
@@ -1,9 +1,18 @@
 from typing import Optional
 from pydantic import BaseModel
+import asyncio
+import logging
 import os
 import json
+import time
 import httpx
 
+from app.config import settings
+from app.metrics import DETECT_SECONDS, LLM_CALL_SECONDS, LLM_PARSE_FAILURES, LLM_QUEUE_WAIT_SECONDS
+from app.services.behavior_classifier import detect_behavior
+
+logger = logging.getLogger(__name__)
+
 
 class HintSuggestion(BaseModel):
     should_generate: bool
@@ -21,7 +30,12 @@ class AIService:
         self.ollama_url = "http://localhost:11434"
         self.ollama_model = os.getenv("OLLAMA_MODEL", "llama3.2")
         self.use_ollama = self._check_ollama()
-        print(f"✅ AI ready!" if self.use_ollama else "⚠️ Ollama not available")
+        # Bounds concurrent LLM calls; time spent waiting here is the LLM queue wait
+        self._llm_slots = asyncio.Semaphore(settings.llm_concurrency)
+        if self.use_ollama:
+            logger.info("AI ready (%s)", self.ollama_model)
+        else:
+            logger.warning("Ollama not available")
 
     def _check_ollama(self) -> bool:
         try:
@@ -30,21 +44,29 @@ class AIService:
             return False
 
     async def _call_ollama(self, prompt: str) -> Optional[str]:
-        try:
-            async with httpx.AsyncClient(timeout=25.0) as client:
-                response = await client.post(
-                    f"{self.ollama_url}/api/generate",
-                    json={
-                        "model": self.ollama_model,
-                        "prompt": prompt,
-                        "stream": False,
-                        "options": {"temperature": 0.7}
-                    }
-                )
-                if response.status_code == 200:
-                    return response.json().get("response", "")
-        except Exception as e:
-            print(f"❌ AI error: {e}")
+        queued = time.perf_counter()
+        async with self._llm_slots:
+            started = time.perf_counter()
+            LLM_QUEUE_WAIT_SECONDS.observe(started - queued)
+            outcome = "error"
+            try:
+                async with httpx.AsyncClient(timeout=25.0) as client:
+                    response = await client.post(
+                        f"{self.ollama_url}/api/generate",
+                        json={
+                            "model": self.ollama_model,
+                            "prompt": prompt,
+                            "stream": False,
+                            "options": {"temperature": 0.7}
+                        }
+                    )
+                    if response.status_code == 200:
+                        outcome = "ok"
+                        return response.json().get("response", "")
+            except Exception as e:
+                logger.warning("AI error: %s", e)
+            finally:
+                LLM_CALL_SECONDS.labels(outcome=outcome).observe(time.perf_counter() - started)
         return None
 
     async def analyze_and_suggest_hint(
@@ -73,25 +95,29 @@ class AIService:
         if 'claude' in (window_title + context).lower():
             return HintSuggestion(should_generate=False)
 
-        print(f"📥 Input: app={current_app}, window={window_title[:50]}, struggle={struggle_score}")
+        logger.debug("Input: app=%s window=%.50s struggle=%s", current_app, window_title, struggle_score)
 
-        # Detect behavior pattern
-        behavior = self._detect_behavior(
-            current_app=current_app,
-            window_title=window_title,
-            recent_windows=recent_windows,
-            struggle_score=struggle_score,
-            back_and_forth=back_and_forth,
-            tab_switches=tab_switches,
-            app_switches=app_switches,
-            session_minutes=session_minutes
-        )
+        # Detect behavior pattern (bulk ingestion classifies its reports up front)
+        if 'behavior' in activity_summary:
+            behavior = activity_summary['behavior']
+        else:
+            with DETECT_SECONDS.time():
+                behavior = self._detect_behavior(
+                    current_app=current_app,
+                    window_title=window_title,
+                    recent_windows=recent_windows,
+                    struggle_score=struggle_score,
+                    back_and_forth=back_and_forth,
+                    tab_switches=tab_switches,
+                    app_switches=app_switches,
+                    session_minutes=session_minutes
+                )
 
         if not behavior:
-            print(f"❌ No behavior detected")
+            logger.debug("No behavior detected")
             return HintSuggestion(should_generate=False)
 
-        print(f"🎯 Detected: {behavior['type']} | {current_app} | {window_title[:40]}")
+        logger.debug("Detected %s in %s: %.40s", behavior['type'], current_app, window_title)
 
         # Generate hint based on detected behavior
         recent_titles = [h.get('title', '') for h in recent_hints[:5]]
@@ -103,88 +129,16 @@ class AIService:
                          struggle_score: int, back_and_forth: int, tab_switches: int,
                          app_switches: int, session_minutes: float) -> Optional[dict]:
         """Detect what the user is doing based on their behavior."""
-
-        window_lower = window_title.lower()
-        recent_lower = ' '.join(recent_windows).lower() if recent_windows else ''
-
-        # Define app categories
-        code_editors = ['Cursor', 'Code', 'Visual Studio Code', 'Xcode', 'PyCharm', 'IntelliJ IDEA', 'WebStorm', 'Sublime Text', 'Atom']
-        browsers = ['Google Chrome', 'Safari', 'Arc', 'Firefox', 'Brave Browser']
-        is_code_editor = current_app in code_editors
-        is_browser = current_app in browsers
-
-        # 1. DEBUGGING - User is stuck on an error (high struggle or error keywords)
-        error_keywords = ['error', 'exception', 'failed', 'undefined', 'null', 'bug', 'fix', 'issue', 'problem', 'crash', 'not working']
-        if struggle_score >= 4 or any(kw in window_lower or kw in recent_lower for kw in error_keywords):
-            error_context = window_title
-            for win in recent_windows[:3]:
-                if any(kw in win.lower() for kw in error_keywords):
-                    error_context = win
-                    break
-
-            return {
-                'type': 'debugging',
-                'error_context': error_context,
-                'struggle_score': struggle_score,
-                'app': current_app
-            }
-
-        # 2. CODING - In a code editor (check BEFORE research to avoid false positives)
-        if is_code_editor:
-            file_ext = None
-            for ext in ['.py', '.js', '.ts', '.tsx', '.jsx', '.swift', '.java', '.go', '.rs', '.cpp', '.c', '.html', '.css']:
-                if ext in window_title or any(ext in w for w in recent_windows):
-                    file_ext = ext
-                    break
-
-            return {
-                'type': 'coding',
-                'app': current_app,
-                'file': window_title if window_title != current_app else None,
-                'file_type': file_ext,
-                'recent_context': recent_windows[:3]
-            }
-
-        # 3. RESEARCHING - User is learning/searching (ONLY in browsers)
-        research_keywords = ['how to', 'tutorial', 'guide', 'learn', 'documentation', 'example', 'stack overflow', 'medium', 'dev.to']
-        search_in_title = 'google' in window_lower or 'search' in window_lower
-        if is_browser and (search_in_title or any(kw in window_lower for kw in research_keywords)):
-            search_query = window_title.split(' - ')[0] if ' - ' in window_title else window_title
-
-            return {
-                'type': 'researching',
-                'query': search_query,
-                'recent_searches': recent_windows[:3],
-                'app': current_app
-            }
-
-        # 4. DISTRACTED - Too many app switches
-        if app_switches > 10 and back_and_forth >= 2:
-            return {
-                'type': 'distracted',
-                'app_switches': app_switches,
-                'back_and_forth': back_and_forth,
-                'app': current_app
-            }
-
-        # 5. BROWSING - In a browser with specific content (general browsing, not research)
-        if is_browser and window_title and window_title != current_app:
-            return {
-                'type': 'browsing',
-                'page': window_title,
-                'app': current_app
-            }
-
-        # 6. COMMUNICATION - In a chat/email app
-        comm_apps = ['Slack', 'Discord', 'Messages', 'Mail', 'Microsoft Teams', 'Zoom']
-        if current_app in comm_apps:
-            return {
-                'type': 'communication',
-                'app': current_app,
-                'context': window_title
-            }
-
-        return None
+        return detect_behavior(
+            current_app=current_app,
+            window_title=window_title,
+            recent_windows=recent_windows,
+            struggle_score=struggle_score,
+            back_and_forth=back_and_forth,
+            tab_switches=tab_switches,
+            app_switches=app_switches,
+            session_minutes=session_minutes
+        )
 
     async def _generate_behavior_hint(self, behavior: dict, recent_hints: list) -> HintSuggestion:
         """Generate a hint specific to the detected behavior."""
@@ -268,7 +222,7 @@ Your response (JSON only):"""
             return HintSuggestion(should_generate=False)
 
         response = await self._call_ollama(prompt)
-        print(f"🤖 AI response: {response[:100] if response else 'None'}...")
+        logger.debug("AI response: %.100s", response)
 
         if response:
             try:
@@ -276,7 +230,7 @@ Your response (JSON only):"""
                 end = response.rfind('}') + 1
                 if start >= 0 and end > start:
                     json_str = response[start:end]
-                    print(f"📋 JSON: {json_str}")
+                    logger.debug("JSON: %s", json_str)
                     data = json.loads(json_str)
                     title = data.get("title", "")
                     message = data.get("message", "")
@@ -294,7 +248,7 @@ Your response (JSON only):"""
                         category = category_map.get(behavior_type, 'workflow_tip')
                         priority = "high" if behavior_type in ['debugging', 'distracted'] else "medium"
 
-                        print(f"✅ [{behavior_type}] {title}: {message[:40]}...")
+                        logger.info("[%s] %s: %.40s", behavior_type, title, message)
                         return HintSuggestion(
                             should_generate=True,
                             category=category,
@@ -305,6 +259,8 @@ Your response (JSON only):"""
                         )
             except:
                 pass
+            # Got a response but no usable {"title", "message"} out of it
+            LLM_PARSE_FAILURES.inc()
 
         return HintSuggestion(should_generate=False)
 
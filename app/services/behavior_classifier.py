@@ -0,0 +1,171 @@
+import re
+from typing import Optional
+
+# App categories
+CODE_EDITORS = frozenset(['Cursor', 'Code', 'Visual Studio Code', 'Xcode', 'PyCharm', 'IntelliJ IDEA', 'WebStorm', 'Sublime Text', 'Atom'])
+BROWSERS = frozenset(['Google Chrome', 'Safari', 'Arc', 'Firefox', 'Brave Browser'])
+COMM_APPS = frozenset(['Slack', 'Discord', 'Messages', 'Mail', 'Microsoft Teams', 'Zoom'])
+
+ERROR_KEYWORDS = ['error', 'exception', 'failed', 'undefined', 'null', 'bug', 'fix', 'issue', 'problem', 'crash', 'not working']
+RESEARCH_KEYWORDS = ['how to', 'tutorial', 'guide', 'learn', 'documentation', 'example', 'stack overflow', 'medium', 'dev.to']
+FILE_EXTENSIONS = ['.py', '.js', '.ts', '.tsx', '.jsx', '.swift', '.java', '.go', '.rs', '.cpp', '.c', '.html', '.css']
+
+# One compiled alternation per keyword list: a single C-level scan finds what
+# `any(kw in text for kw in keywords)` does ('google' / 'search' in a browser
+# title also count as research)
+_ERROR_PATTERN = re.compile('|'.join(map(re.escape, ERROR_KEYWORDS)))
+_RESEARCH_PATTERN = re.compile('|'.join(map(re.escape, RESEARCH_KEYWORDS + ['google', 'search'])))
+
+
+def detect_behavior(current_app: str, window_title: str, recent_windows: list,
+                    struggle_score: int, back_and_forth: int, tab_switches: int,
+                    app_switches: int, session_minutes: float) -> Optional[dict]:
+    """Detect what the user is doing based on their behavior."""
+
+    window_lower = window_title.lower()
+    recent_lower = ' '.join(recent_windows).lower() if recent_windows else ''
+
+    is_code_editor = current_app in CODE_EDITORS
+    is_browser = current_app in BROWSERS
+
+    # 1. DEBUGGING - User is stuck on an error (high struggle or error keywords)
+    if struggle_score >= 4 or any(kw in window_lower or kw in recent_lower for kw in ERROR_KEYWORDS):
+        return _debugging(current_app, window_title, recent_windows, struggle_score)
+
+    # 2. CODING - In a code editor (check BEFORE research to avoid false positives)
+    if is_code_editor:
+        return _coding(current_app, window_title, recent_windows)
+
+    # 3. RESEARCHING - User is learning/searching (ONLY in browsers)
+    search_in_title = 'google' in window_lower or 'search' in window_lower
+    if is_browser and (search_in_title or any(kw in window_lower for kw in RESEARCH_KEYWORDS)):
+        return _researching(current_app, window_title, recent_windows)
+
+    return _remaining(current_app, window_title, is_browser, back_and_forth, app_switches)
+
+
+
+def detect_behavior_batch(summaries: list[dict]) -> list[Optional[dict]]:
+    """
+    Classify many activity summaries (activity_summary-shaped dicts) in one pass.
+
+    Gives the same result as calling detect_behavior() per summary. Keyword
+    scans run through compiled matchers, memoized per distinct lower-cased
+    text for the whole batch, so titles shared across a fleet (inboxes,
+    channels, docs, recent windows repeated between reports) are scanned once.
+    """
+    has_error = _Matcher(_ERROR_PATTERN)
+    is_research = _Matcher(_RESEARCH_PATTERN)
+
+    results = []
+    for s in summaries:
+        current_app = s.get('current_app', '')
+        window_title = s.get('window_title', '') or s.get('current_window_title', '') or ''
+        recent_windows = s.get('recent_windows', []) or []
+        struggle_score = s.get('struggle_score', 0)
+        window_lower = window_title.lower()
+
+        if (struggle_score >= 4 or has_error(window_lower)
+                or (recent_windows and has_error(' '.join(recent_windows).lower()))):
+            results.append(_debugging(current_app, window_title, recent_windows, struggle_score, has_error))
+        elif current_app in CODE_EDITORS:
+            results.append(_coding(current_app, window_title, recent_windows))
+        elif current_app in BROWSERS and is_research(window_lower):
+            results.append(_researching(current_app, window_title, recent_windows))
+        else:
+            results.append(_remaining(
+                current_app,
+                window_title,
+                current_app in BROWSERS,
+                s.get('back_and_forth_count', 0),
+                s.get('app_switch_count', 0),
+            ))
+    return results
+
+
+class _Matcher:
+    """Whether a compiled keyword pattern occurs in a text, memoized per distinct text."""
+
+    def __init__(self, pattern: re.Pattern):
+        self.search = pattern.search
+        self.seen: dict[str, bool] = {}
+
+    def __call__(self, text_lower: str) -> bool:
+        hit = self.seen.get(text_lower)
+        if hit is None:
+            hit = self.seen[text_lower] = self.search(text_lower) is not None
+        return hit
+
+
+def _has_error_keyword(text_lower: str) -> bool:
+    return any(kw in text_lower for kw in ERROR_KEYWORDS)
+
+def _debugging(current_app, window_title, recent_windows, struggle_score, has_error=_has_error_keyword) -> dict:
+    error_context = window_title
+    for win in recent_windows[:3]:
+        if has_error(win.lower()):
+            error_context = win
+            break
+
+    return {
+        'type': 'debugging',
+        'error_context': error_context,
+        'struggle_score': struggle_score,
+        'app': current_app
+    }
+
+
+def _coding(current_app, window_title, recent_windows) -> dict:
+    file_ext = None
+    for ext in FILE_EXTENSIONS:
+        if ext in window_title or any(ext in w for w in recent_windows):
+            file_ext = ext
+            break
+
+    return {
+        'type': 'coding',
+        'app': current_app,
+        'file': window_title if window_title != current_app else None,
+        'file_type': file_ext,
+        'recent_context': recent_windows[:3]
+    }
+
+
+def _researching(current_app, window_title, recent_windows) -> dict:
+    search_query = window_title.split(' - ')[0] if ' - ' in window_title else window_title
+
+    return {
+        'type': 'researching',
+        'query': search_query,
+        'recent_searches': recent_windows[:3],
+        'app': current_app
+    }
+
+
+def _remaining(current_app, window_title, is_browser, back_and_forth, app_switches) -> Optional[dict]:
+    # 4. DISTRACTED - Too many app switches
+    if app_switches > 10 and back_and_forth >= 2:
+        return {
+            'type': 'distracted',
+            'app_switches': app_switches,
+            'back_and_forth': back_and_forth,
+            'app': current_app
+        }
+
+    # 5. BROWSING - In a browser with specific content (general browsing, not research)
+    if is_browser and window_title and window_title != current_app:
+        return {
+            'type': 'browsing',
+            'page': window_title,
+            'app': current_app
+        }
+
+    # 6. COMMUNICATION - In a chat/email app
+    if current_app in COMM_APPS:
+        return {
+            'type': 'communication',
+            'app': current_app,
+            'context': window_title
+        }
+
+    return None
@@ -0,0 +1,249 @@
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import quote
+
+from sqlalchemy import exc, func, select, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.activity import ActivityLog
+from app.models.export_watermark import ExportWatermark
+from app.models.hint import Hint
+from app.services.activity_export import activity_rows_query, iter_row_batches
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency: uv sync --extra export
+    pa = None
+
+
+DATASETS = {
+    "activity_logs": {
+        "columns": [
+            ("id", "int64"),
+            ("device_id", "string"),
+            ("app_name", "string"),
+            ("window_title", "string"),
+            ("started_at", "timestamp"),
+            ("ended_at", "timestamp"),
+            ("duration_seconds", "float64"),
+            ("idle_seconds", "float64"),
+            ("might_be_stuck", "bool"),
+            ("created_at", "timestamp"),
+        ],
+        "day_column": "started_at",
+    },
+    "hints": {
+        "columns": [
+            ("id", "int64"),
+            ("device_id", "string"),
+            ("category", "string"),
+            ("priority", "string"),
+            ("title", "string"),
+            ("message", "string"),
+            ("status", "string"),
+            ("created_at", "timestamp"),
+            ("shown_at", "timestamp"),
+            ("dismissed_at", "timestamp"),
+        ],
+        "day_column": "created_at",
+    },
+}
+
+
+@dataclass
+class ExportResult:
+    dataset: str
+    rows: int = 0
+    files: list[str] = field(default_factory=list)
+    high_water_mark: int = 0
+
+
+def _arrow_schema(dataset: str, columns: list[str]):
+    types = {
+        "int64": pa.int64(),
+        "string": pa.string(),
+        "timestamp": pa.timestamp("us"),
+        "float64": pa.float64(),
+        "bool": pa.bool_(),
+    }
+    declared = dict(DATASETS[dataset]["columns"])
+    return pa.schema([(name, types[declared[name]]) for name in columns])
+
+
+def _model(dataset: str):
+    return ActivityLog if dataset == "activity_logs" else Hint
+
+
+def _commit_horizon(db: Session, dataset: str) -> int:
+    """
+    Highest id with no open transaction below it.
+
+    Ids are handed out at insert, not at commit, so a reader can see row N
+    while N-1 is still uncommitted. Reading max(id) under the write lock
+    waits such transactions out: SQLite takes it with BEGIN IMMEDIATE (a
+    savepoint counts as a write, see app/db.py), Postgres with a SHARE lock,
+    which waits for open writers to the table and holds new ones back for
+    the one lookup. Every later insert gets a higher id.
+    """
+    model = _model(dataset)
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text(f"SET LOCAL lock_timeout = {int(settings.export_lock_timeout_ms)}"))
+            db.execute(text(f"LOCK TABLE {model.__tablename__} IN SHARE MODE"))
+            horizon = db.scalar(select(func.max(model.id)))
+        else:
+            with db.begin_nested():
+                horizon = db.scalar(select(func.max(model.id)))
+        db.commit()  # Release the lock before the export itself reads anything
+    except exc.OperationalError as e:
+        db.rollback()
+        raise RuntimeError(f"Timed out waiting for open writes to {model.__tablename__}; try again") from e
+    return horizon or 0
+
+
+def _dataset_query(dataset: str, after: int, until: int):
+    """Rows with ids in (after, until], in id order."""
+    if dataset == "activity_logs":
+        stmt = activity_rows_query().order_by(None)
+    else:
+        stmt = select(
+            Hint.id,
+            Hint.device_id,
+            Hint.category,
+            Hint.priority,
+            Hint.title,
+            Hint.message,
+            Hint.status,
+            Hint.created_at,
+            Hint.shown_at,
+            Hint.dismissed_at,
+        )
+
+    model = _model(dataset)
+    return stmt.where(model.id > after, model.id <= until).order_by(model.id)
+
+
+def _normalize(value):
+    # Enum columns come back as str-enums; Arrow wants the plain value
+    return value.value if hasattr(value, "value") else value
+
+
+class _PartitionWriters:
+    """Lazily opened Parquet / Arrow IPC writers, one per partition."""
+
+    def __init__(self, root: Path, fmt: str, schema, compression: str | None, part_name: str):
+        self.root = root
+        self.fmt = fmt
+        self.schema = schema
+        self.compression = compression
+        self.part_name = part_name
+        self._writers = {}
+
+    def write(self, partition: str, rows: list[dict]):
+        writer = self._writers.get(partition)
+        if writer is None:
+            writer = self._open(partition)
+            self._writers[partition] = writer
+        writer[1].write_table(pa.Table.from_pylist(rows, schema=self.schema))
+
+    def _open(self, partition: str):
+        directory = self.root / partition
+        directory.mkdir(parents=True, exist_ok=True)
+        if self.fmt == "arrow":
+            path = directory / f"{self.part_name}.arrow"
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            return path, pa.ipc.new_file(str(path), self.schema, options=options)
+        path = directory / f"{self.part_name}.parquet"
+        return path, pq.ParquetWriter(str(path), self.schema, compression=self.compression or "none")
+
+    def close(self) -> list[str]:
+        paths = []
+        for path, writer in self._writers.values():
+            writer.close()
+            paths.append(str(path))
+        self._writers.clear()
+        return sorted(paths)
+
+
+def export_dataset(
+    db: Session,
+    dataset: str,
+    fmt: str = "parquet",
+    partition_by: str = "device",
+    columns: list[str] | None = None,
+    compression: str | None = "zstd",
+    incremental: bool = True,
+    out_dir: str | None = None,
+) -> ExportResult:
+    """
+    Export a table to partitioned Parquet / Arrow IPC files.
+
+    Rows are read in batches from a server-side cursor. Incremental runs
+    only export rows past the dataset's stored high-water mark and write
+    a new part file per partition; a full run replaces the dataset directory.
+
+    The high-water mark is the highest id exported. A run stops at the
+    commit horizon (see _commit_horizon), so no row id it passes can still
+    be committed later. Rows are exported exactly once, as they are at that
+    point; later changes to a hint (shown, dismissed) only reach the files
+    with a full run.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed; install the 'export' extra")
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset: {dataset}")
+
+    declared = [name for name, _ in DATASETS[dataset]["columns"]]
+    columns = columns or declared
+    unknown = set(columns) - set(declared)
+    if unknown:
+        raise ValueError(f"Unknown columns for {dataset}: {sorted(unknown)}")
+
+    until = _commit_horizon(db, dataset)
+    watermark = db.query(ExportWatermark).filter(ExportWatermark.dataset == dataset).first()
+    if watermark is None:
+        watermark = ExportWatermark(dataset=dataset, last_id=0)
+        db.add(watermark)
+
+    after = watermark.last_id if incremental else 0
+    root = Path(out_dir or settings.export_dir) / dataset
+    if not incremental and root.exists():
+        shutil.rmtree(root)
+
+    day_column = DATASETS[dataset]["day_column"]
+    writers = _PartitionWriters(
+        root,
+        fmt,
+        _arrow_schema(dataset, columns),
+        compression,
+        part_name=f"part-{until:012d}",
+    )
+    result = ExportResult(dataset=dataset, high_water_mark=after)
+
+    try:
+        for batch in iter_row_batches(db, _dataset_query(dataset, after, until)):
+            partitions: dict[str, list[dict]] = {}
+            for row in batch:
+                record = row._asdict()
+                if partition_by == "day":
+                    key = f"day={record[day_column].date().isoformat()}"
+                else:
+                    key = f"device={quote(record['device_id'], safe='')}"
+                partitions.setdefault(key, []).append(
+                    {name: _normalize(record[name]) for name in columns}
+                )
+            for key, rows in partitions.items():
+                writers.write(key, rows)
+            result.rows += len(batch)
+    finally:
+        result.files = writers.close()
+
+    # Ids up to the horizon that weren't exported were rolled back or deleted
+    result.high_water_mark = max(after, until)
+    watermark.last_id = result.high_water_mark
+    db.commit()
+    return result
@@ -0,0 +1,150 @@
+"""
+Per-device actors for the devices whose hint-job slots this process owns.
+
+An actor serializes its device's hint jobs (one runs at a time, so there
+is never concurrent generation for a device) and holds the device's hint
+history in memory: the hints created in the last hour for the rate
+limiter, and the last ten for the LLM prompt. HintGenerator reads those
+instead of querying hints on every check.
+
+History is loaded from the database when an actor is created and again
+every HINT_ACTOR_STATE_TTL_SECONDS. Hints inserted in this process
+(by any path) are recorded when their transaction commits. Hints created by other
+processes (event reminders, the inline time-trigger endpoint) are seen
+at the next reload, so limits can lag by up to that TTL.
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.config import settings
+from app.db import after_commit
+from app.models.hint import Hint
+
+RECENT_HINTS = 10
+
+
+def _hint_context(hint: Hint) -> dict:
+    return {"category": hint.category.value, "title": hint.title, "message": hint.message}
+
+
+@dataclass
+class DeviceState:
+    hint_times: deque = field(default_factory=deque)    # created_at of hints in the last hour, oldest first
+    recent_hints: deque = field(default_factory=lambda: deque(maxlen=RECENT_HINTS))  # Newest first
+    loaded_at: float = 0.0
+
+    @classmethod
+    def load(cls, db: Session, device_id: str) -> "DeviceState":
+        hour_ago = datetime.utcnow() - timedelta(hours=1)
+        times = (
+            db.query(Hint.created_at)
+            .filter(Hint.device_id == device_id, Hint.created_at >= hour_ago)
+            .order_by(Hint.created_at.asc())
+        )
+        recent = (
+            db.query(Hint.category, Hint.title, Hint.message)
+            .filter(Hint.device_id == device_id)
+            .order_by(Hint.created_at.desc())
+            .limit(RECENT_HINTS)
+        )
+        return cls(
+            hint_times=deque(created_at for (created_at,) in times),
+            recent_hints=deque(
+                ({"category": c.value, "title": t, "message": m} for c, t, m in recent),
+                maxlen=RECENT_HINTS,
+            ),
+            loaded_at=time.monotonic(),
+        )
+
+    def rate_window(self, now: datetime) -> tuple[Optional[datetime], int]:
+        """(last hint time, hints in the last hour), as the rate limiter needs them."""
+        hour_ago = now - timedelta(hours=1)
+        while self.hint_times and self.hint_times[0] < hour_ago:
+            self.hint_times.popleft()
+        return (self.hint_times[-1] if self.hint_times else None), len(self.hint_times)
+
+    def record(self, created_at: datetime, context: dict):
+        self.hint_times.append(created_at)
+        self.recent_hints.appendleft(context)
+
+
+@dataclass
+class DeviceActor:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    state: Optional[DeviceState] = None
+    latest_activity_job: int = 0   # Newest plain activity check seen; older ones are superseded
+    holders: int = 0               # Jobs running or waiting on the lock; never evicted while > 0
+
+    def current_state(self, db: Session, device_id: str) -> DeviceState:
+        if self.state is None or time.monotonic() - self.state.loaded_at > settings.hint_actor_state_ttl_seconds:
+            self.state = DeviceState.load(db, device_id)
+        return self.state
+
+
+class DeviceActors:
+    """LRU of actors, bounded by HINT_ACTOR_MAX_DEVICES (held actors are never evicted)."""
+
+    def __init__(self, max_devices: int):
+        self.max_devices = max_devices
+        self._actors: OrderedDict[str, DeviceActor] = OrderedDict()
+
+    def __len__(self):
+        return len(self._actors)
+
+    @contextmanager
+    def hold(self, device_id: str) -> Iterator[DeviceActor]:
+        """
+        The device's actor, pinned until the block exits. A job holds it from
+        before it waits on the lock until after it releases it, so the actor
+        can't be evicted in between and replaced by a second one (with a
+        second lock) for the next job.
+        """
+        actor = self._actors.get(device_id)
+        if actor is None:
+            actor = self._actors[device_id] = DeviceActor()
+        else:
+            self._actors.move_to_end(device_id)
+        actor.holders += 1
+        self._evict()
+        try:
+            yield actor
+        finally:
+            actor.holders -= 1
+            self._evict()  # Anything held over the limit meanwhile
+
+    def retain(self, keep: Callable[[str], bool]):
+        """Drop idle actors for devices this process no longer owns."""
+        for device_id in [d for d, a in self._actors.items() if not keep(d) and not a.holders]:
+            del self._actors[device_id]
+
+    def record_hint(self, device_id: str, created_at: datetime, context: dict):
+        actor = self._actors.get(device_id)
+        if actor is not None and actor.state is not None:
+            actor.state.record(created_at, context)
+
+    def _evict(self):
+        excess = len(self._actors) - self.max_devices
+        if excess <= 0:
+            return
+        for device_id in [d for d, a in self._actors.items() if not a.holders][:excess]:
+            del self._actors[device_id]
+
+
+device_actors = DeviceActors(settings.hint_actor_max_devices)
+
+
+@event.listens_for(Hint, "after_insert")
+def _record_hint(mapper, connection, hint):
+    # Captured now: attributes are expired by the time the commit hook runs
+    device_id, created_at, context = hint.device_id, hint.created_at or datetime.utcnow(), _hint_context(hint)
+    session = object_session(hint)
+    if session is not None:
+        after_commit(session, lambda: device_actors.record_hint(device_id, created_at, context))
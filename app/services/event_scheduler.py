@@ -0,0 +1,326 @@
+import asyncio
+import heapq
+import logging
+import select
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db import SessionLocal, engine
+from app.models.hint import Hint, HintStatus, HintCategory, HintPriority
+from app.models.scheduled_event import ScheduledEvent, ScheduledEventStatus
+from app.services.ai_service import ai_service
+
+logger = logging.getLogger(__name__)
+
+SWEEP_BATCH = 100
+
+
+def _reminder_hint(device_id: str, hint_result) -> Hint:
+    return Hint(
+        device_id=device_id,
+        category=HintCategory.EVENT_REMINDER,
+        priority=HintPriority.HIGH,
+        title=hint_result.title,
+        message=hint_result.message,
+        status=HintStatus.PENDING,
+    )
+
+
+async def create_event_reminder(db: Session, device_id: str, event_title: str) -> Optional[Hint]:
+    """Add an EVENT_REMINDER hint to the session (flushed, not committed)."""
+    hint_result = await ai_service.generate_event_reminder(event_title=event_title)
+    if not hint_result.should_generate:
+        return None
+
+    hint = _reminder_hint(device_id, hint_result)
+    db.add(hint)
+    db.flush()
+    return hint
+
+
+def _scheduled_between(after: Optional[datetime], until: datetime) -> list[tuple[datetime, int]]:
+    """(due_at, id) of scheduled events due in (after, until]."""
+    db = SessionLocal()
+    try:
+        query = db.query(ScheduledEvent.due_at, ScheduledEvent.id).filter(
+            ScheduledEvent.status == ScheduledEventStatus.SCHEDULED,
+            ScheduledEvent.due_at <= until,
+        )
+        if after is not None:
+            query = query.filter(ScheduledEvent.due_at > after)
+        return query.all()
+    finally:
+        db.close()
+
+
+def _due_event_ids(now: datetime) -> list[int]:
+    db = SessionLocal()
+    try:
+        return [
+            event_id for (event_id,) in db.query(ScheduledEvent.id)
+            .filter(
+                ScheduledEvent.status == ScheduledEventStatus.SCHEDULED,
+                ScheduledEvent.due_at <= now,
+            )
+            .order_by(ScheduledEvent.due_at)
+            .limit(SWEEP_BATCH)
+        ]
+    finally:
+        db.close()
+
+
+def _claim(db: Session, event_id: int, now: datetime) -> Optional[tuple[ScheduledEvent, bool]]:
+    """Claim a due event in the session's transaction: (event, expired), or None if it isn't ours to fire."""
+    event = db.get(ScheduledEvent, event_id)
+    if event is None or event.status != ScheduledEventStatus.SCHEDULED:
+        return None  # Cancelled, or fired by another worker
+
+    # Another worker firing it holds the lock; leave the event to it
+    locked = (
+        db.query(ScheduledEvent.id)
+        .filter(
+            ScheduledEvent.id == event_id,
+            ScheduledEvent.status == ScheduledEventStatus.SCHEDULED,
+        )
+        .with_for_update(skip_locked=True)
+        .scalar()
+    )
+    if locked is None:
+        db.rollback()
+        return None
+
+    expired = now - event.due_at > timedelta(minutes=settings.event_reminder_grace_minutes)
+    claimed = (
+        db.query(ScheduledEvent)
+        .filter(
+            ScheduledEvent.id == event_id,
+            ScheduledEvent.status == ScheduledEventStatus.SCHEDULED,
+        )
+        .update(
+            {
+                ScheduledEvent.status: ScheduledEventStatus.EXPIRED if expired else ScheduledEventStatus.FIRED,
+                ScheduledEvent.fired_at: now,
+            },
+            synchronize_session=False,
+        )
+    )
+    if not claimed:
+        db.rollback()
+        return None
+    return event, expired
+
+
+def _complete(db: Session, event: ScheduledEvent, hint_result):
+    """Store the reminder (if any) and commit the claim with it."""
+    if hint_result is not None and hint_result.should_generate:
+        hint = _reminder_hint(event.device_id, hint_result)
+        db.add(hint)
+        db.flush()
+        event.hint_id = hint.id
+        logger.info("Fired event reminder: %s", hint.title, extra={"device_id": event.device_id})
+    db.commit()
+
+
+class EventScheduler:
+    """
+    Fires scheduled event reminders at their due time.
+
+    Events live in the scheduled_events table; the next `horizon` of them is
+    held in an in-memory heap. The loop sleeps until the earliest due time
+    (or until a sooner event is scheduled) and only touches the database to
+    fire an event or to load the next horizon. Database work runs in the
+    threadpool, off the event loop.
+
+    Every worker holds every event: on Postgres, schedule() NOTIFYs the
+    others (see start_listener), and a worker whose listener reconnects
+    reloads its horizon. Without notifications (SQLite, or no channel
+    configured) the fallback is a sweep every EVENT_SCHEDULER_SWEEP_SECONDS
+    for due events still scheduled, which also covers events whose worker
+    has gone away.
+
+    Firing locks the row (FOR UPDATE SKIP LOCKED, so a worker never waits on
+    an event another one is firing) and claims it with a conditional UPDATE,
+    so with several workers (or after a restart) each event creates exactly
+    one hint.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[datetime, int]] = []
+        self._queued: set[int] = set()       # Event ids in the heap
+        self._loaded_until: Optional[datetime] = None
+        self._swept_at: Optional[datetime] = None
+        self._reload = False
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def horizon(self) -> timedelta:
+        return timedelta(hours=settings.event_scheduler_horizon_hours)
+
+    @property
+    def notifies(self) -> bool:
+        return engine.dialect.name == "postgresql" and bool(settings.event_scheduler_notify_channel)
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._heap, self._queued, self._loaded_until = [], set(), None
+        await self._load_until(datetime.utcnow() + self.horizon)
+        self._swept_at = datetime.utcnow()
+        self._task = asyncio.create_task(self._run())
+        self.start_listener()
+
+    async def stop(self):
+        self.stop_listener()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def schedule(self, db: Session, event: ScheduledEvent):
+        """Track a newly committed event here, and tell the other workers about it."""
+        self._push(event.due_at, event.id)
+        if self.notifies:
+            db.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": settings.event_scheduler_notify_channel, "payload": f"{event.id}\t{event.due_at.isoformat()}"},
+            )
+            db.commit()
+
+    def _push(self, due_at: datetime, event_id: int):
+        # Events past the horizon are loaded later
+        if self._loaded_until is None or due_at > self._loaded_until or event_id in self._queued:
+            return
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (due_at, event_id))
+        self._queued.add(event_id)
+        if earliest is None or due_at < earliest:
+            self._wakeup.set()
+
+    def _request_reload(self):
+        self._reload = True
+        self._wakeup.set()
+
+    async def _load_until(self, until: datetime, after: Optional[datetime] = None):
+        due = await run_in_threadpool(_scheduled_between, after, until)
+        self._loaded_until = until
+        for due_at, event_id in due:
+            self._push(due_at, event_id)
+
+    async def _sweep(self):
+        """Fire due events this worker isn't tracking (scheduled elsewhere)."""
+        self._swept_at = datetime.utcnow()
+        for event_id in await run_in_threadpool(_due_event_ids, self._swept_at):
+            try:
+                await self._fire(event_id)
+            except Exception:
+                logger.exception("Event reminder %d failed", event_id)
+
+    async def _run(self):
+        sweep_every = timedelta(seconds=settings.event_scheduler_sweep_seconds)
+        while True:
+            now = datetime.utcnow()
+            if self._reload:
+                # Events scheduled while the listener was down never reached us
+                self._reload = False
+                await self._load_until(self._loaded_until)
+                continue
+            sweeping = not self.notifies
+            if sweeping and now - self._swept_at >= sweep_every:
+                await self._sweep()
+                continue
+
+            next_due = self._heap[0][0] if self._heap else self._loaded_until
+            wake_at = min(next_due, self._swept_at + sweep_every) if sweeping else next_due
+            delay = (wake_at - now).total_seconds()
+
+            if delay > 0 or next_due > now:  # The latter: time to sweep
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(delay, 0))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            if self._heap and self._heap[0][0] <= next_due:
+                _, event_id = heapq.heappop(self._heap)
+                self._queued.discard(event_id)
+                try:
+                    await self._fire(event_id)
+                except Exception:
+                    logger.exception("Event reminder %d failed", event_id)
+            else:
+                await self._load_until(datetime.utcnow() + self.horizon, after=self._loaded_until)
+
+    async def _fire(self, event_id: int):
+        db = SessionLocal()
+        try:
+            claimed = await run_in_threadpool(_claim, db, event_id, datetime.utcnow())
+            if claimed is None:
+                return
+            event, expired = claimed
+            hint_result = None
+            if not expired:
+                hint_result = await ai_service.generate_event_reminder(event_title=event.event_title)
+            await run_in_threadpool(_complete, db, event, hint_result)
+        finally:
+            await run_in_threadpool(db.close)
+
+    def start_listener(self):
+        """LISTEN for events scheduled through other workers (Postgres only)."""
+        if not self.notifies:
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(target=self._listen, name="event-scheduler-listener", daemon=True)
+        self._listener.start()
+
+    def stop_listener(self):
+        self._stop.set()
+        if self._listener:
+            self._listener.join(timeout=5)
+            self._listener = None
+
+    def _listen(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while not self._stop.is_set():
+            try:
+                conn = psycopg2.connect(dsn)
+            except psycopg2.Error as e:
+                logger.warning("Event scheduler listener can't connect: %s", e)
+                self._stop.wait(5)
+                continue
+            try:
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{settings.event_scheduler_notify_channel}"')
+                self._loop.call_soon_threadsafe(self._request_reload)
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        event_id, _, due_at = conn.notifies.pop(0).payload.partition("\t")
+                        self._loop.call_soon_threadsafe(self._push, datetime.fromisoformat(due_at), int(event_id))
+            except psycopg2.Error as e:
+                logger.warning("Event scheduler listener error: %s", e)
+                self._stop.wait(1)
+            finally:
+                conn.close()
+
+
+event_scheduler = EventScheduler()
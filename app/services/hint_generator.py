@@ -1,18 +1,27 @@
+import logging
 from datetime import datetime, timedelta
 from typing import Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import and_, case, func, select
 
 from app.models.activity import ActivityLog
+from app.models.app_name import AppName
 from app.models.hint import Hint, HintStatus, HintCategory, HintPriority
-from app.models.user_preferences import UserPreferences
+from app.schemas.preferences import UserPreferencesResponse
+from app.services.device_actors import DeviceState
 from app.services.ai_service import ai_service
+from app.services.preferences_cache import preferences_cache
 from app.config import settings
+from app.metrics import RATE_LIMITED, SUMMARY_SECONDS
+
+logger = logging.getLogger(__name__)
 
 
 class HintGenerator:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, device_state: Optional[DeviceState] = None):
         self.db = db
+        # In-memory hint history from the device's actor (hint job consumers); DB otherwise
+        self.device_state = device_state
 
     async def check_and_generate_hint(
         self,
@@ -43,11 +52,12 @@ class HintGenerator:
         can_send = self._can_send_hint(device_id, prefs, is_app_switch=is_app_switch)
         if not can_send:
             if is_app_switch:
-                print(f"⏳ Rate limited")
+                logger.debug("App switch rate limited", extra={"device_id": device_id})
             return None
 
         # 3. Build activity summary with full context
-        summary = self._build_activity_summary(device_id, is_app_switch=is_app_switch)
+        with SUMMARY_SECONDS.time():
+            summary = self._build_activity_summary(device_id, is_app_switch=is_app_switch)
 
         # 4. Merge in struggle data from the current report
         if struggle_data:
@@ -55,10 +65,11 @@ class HintGenerator:
             score = struggle_data.get('struggle_score', 0)
             bf = struggle_data.get('back_and_forth_count', 0)
             window = struggle_data.get('window_title', '')[:40]
+            fields = {"device_id": device_id, "score": score, "back_and_forth": bf, "window": window}
             if score >= 4 or bf >= 3:
-                print(f"🆘 STRUGGLE: score={score}, b&f={bf}, window='{window}'")
+                logger.info("Struggle detected", extra=fields)
             else:
-                print(f"📊 Activity: score={score}, b&f={bf}, window='{window}'")
+                logger.debug("Activity", extra=fields)
 
         # 5. Get recent hints for context
         recent_hints = self._get_recent_hints(device_id)
@@ -78,7 +89,7 @@ class HintGenerator:
         # 6. Create hint if suggested
         if suggestion.should_generate:
             hint = self._create_hint(device_id, suggestion)
-            print(f"🎯 Generated hint: {hint.title}")
+            logger.info("Generated hint %r", hint.title, extra={"device_id": device_id})
             return hint
 
         return None
@@ -109,7 +120,7 @@ class HintGenerator:
         self.db.commit()
         self.db.refresh(hint)
 
-        print(f"⏰ Break reminder #{break_number}: {title}")
+        logger.info("Break reminder #%d: %s", break_number, title, extra={"device_id": device_id})
         return hint
 
     async def generate_session_end_hint(self, device_id: str, session_minutes: float) -> Hint:
@@ -140,7 +151,7 @@ class HintGenerator:
         self.db.commit()
         self.db.refresh(hint)
 
-        print(f"🏁 Session end: {title}")
+        logger.info("Session end: %s", title, extra={"device_id": device_id})
         return hint
 
     async def generate_same_app_hint(self, device_id: str, struggle_data: dict) -> Hint:
@@ -150,7 +161,7 @@ class HintGenerator:
         window_title = struggle_data.get('window_title', '')
         duration = int(struggle_data.get('same_app_minutes', 10))
 
-        print(f"⏱️ Same-app hint: {duration} min in {app_name}")
+        logger.debug("Same-app trigger: %d min in %s", duration, app_name, extra={"device_id": device_id})
 
         # Build context string
         if window_title and window_title != app_name:
@@ -193,58 +204,46 @@ class HintGenerator:
         self.db.commit()
         self.db.refresh(hint)
 
-        print(f"⏱️ Same-app hint: {title}")
+        logger.info("Same-app hint: %s", title, extra={"device_id": device_id})
         return hint
 
-    def _get_or_create_preferences(self, device_id: str) -> UserPreferences:
-        prefs = self.db.query(UserPreferences).filter(
-            UserPreferences.device_id == device_id
-        ).first()
-
-        if not prefs:
-            prefs = UserPreferences(device_id=device_id)
-            self.db.add(prefs)
-            self.db.commit()
-            self.db.refresh(prefs)
-
-        return prefs
+    def _get_or_create_preferences(self, device_id: str) -> UserPreferencesResponse:
+        return preferences_cache.get(self.db, device_id)
 
-    def _can_send_hint(self, device_id: str, prefs: UserPreferences, is_app_switch: bool = False) -> bool:
+    def _can_send_hint(self, device_id: str, prefs: UserPreferencesResponse, is_app_switch: bool = False) -> bool:
         """Check if we can send another hint based on rate limits."""
         now = datetime.utcnow()
 
-        # Auto-dismiss any old pending/shown hints (cleanup)
-        old_hints = self.db.query(Hint).filter(
-            Hint.device_id == device_id,
-            Hint.status.in_([HintStatus.PENDING, HintStatus.SHOWN]),
-            Hint.created_at < now - timedelta(seconds=30)  # Older than 30 seconds
-        ).all()
-        for h in old_hints:
-            h.status = HintStatus.DISMISSED
-        if old_hints:
-            self.db.commit()
+        # Old pending/shown hints are expired by HintExpirySweeper, not here
 
-        # Check minimum time since last hint created
-        last_hint = self.db.query(Hint).filter(
-            Hint.device_id == device_id,
-        ).order_by(Hint.created_at.desc()).first()
+        if self.device_state is not None:
+            last_created_at, hints_in_last_hour = self.device_state.rate_window(now)
+        else:
+            last_created_at = self.db.query(func.max(Hint.created_at)).filter(
+                Hint.device_id == device_id,
+            ).scalar()
+            hints_in_last_hour = None
 
-        if last_hint:
-            seconds_since_last = (now - last_hint.created_at).total_seconds()
+        # Check minimum time since last hint created
+        if last_created_at:
+            seconds_since_last = (now - last_created_at).total_seconds()
             # Minimum 5 seconds between hints for smoother flow
             if seconds_since_last < 5:
+                RATE_LIMITED.labels(reason="min_interval").inc()
                 return False
 
         # Check max hints per hour limit
-        one_hour_ago = now - timedelta(hours=1)
-        hints_in_last_hour = self.db.query(func.count(Hint.id)).filter(
-            Hint.device_id == device_id,
-            Hint.created_at >= one_hour_ago
-        ).scalar()
+        if hints_in_last_hour is None:
+            one_hour_ago = now - timedelta(hours=1)
+            hints_in_last_hour = self.db.query(func.count(Hint.id)).filter(
+                Hint.device_id == device_id,
+                Hint.created_at >= one_hour_ago
+            ).scalar()
 
         max_hints = prefs.max_hints_per_hour if prefs.max_hints_per_hour else 10
         if hints_in_last_hour >= max_hints:
-            print(f"⏳ Rate limited: {hints_in_last_hour}/{max_hints} hints this hour")
+            logger.info("Rate limited: %d/%d hints this hour", hints_in_last_hour, max_hints, extra={"device_id": device_id})
+            RATE_LIMITED.labels(reason="hourly_limit").inc()
             return False
 
         return True
@@ -254,13 +253,41 @@ class HintGenerator:
         now = datetime.utcnow()
         one_hour_ago = now - timedelta(hours=1)
 
-        # Get activities in last hour
-        activities = self.db.query(ActivityLog).filter(
+        window = (
             ActivityLog.device_id == device_id,
             ActivityLog.started_at >= one_hour_ago,
-        ).order_by(ActivityLog.started_at.desc()).all()
+        )
+
+        # Per-app totals for the hour in one GROUP BY. A row is a switch when its
+        # app differs from the row before it (LAG over started_at).
+        sequence = (
+            select(
+                ActivityLog.app_id,
+                ActivityLog.duration_seconds,
+                ActivityLog.started_at,
+                func.lag(ActivityLog.app_id).over(
+                    order_by=(ActivityLog.started_at, ActivityLog.id)
+                ).label("previous_app_id"),
+            )
+            .where(*window)
+            .subquery()
+        )
+        switched = case(
+            (and_(sequence.c.previous_app_id.is_not(None), sequence.c.previous_app_id != sequence.c.app_id), 1),
+            else_=0,
+        )
+        per_app = self.db.execute(
+            select(
+                AppName.name,
+                func.coalesce(func.sum(sequence.c.duration_seconds), 0),
+                func.min(sequence.c.started_at),
+                func.sum(switched),
+            )
+            .join(AppName, AppName.id == sequence.c.app_id)
+            .group_by(sequence.c.app_id, AppName.name)
+        ).all()
 
-        if not activities:
+        if not per_app:
             return {
                 "session_duration_minutes": 0,
                 "dominant_app": "Unknown",
@@ -272,39 +299,26 @@ class HintGenerator:
                 "is_app_switch": is_app_switch,
             }
 
-        # Get the most recent activity for current context
-        current = activities[0] if activities else None
-
         # Calculate session duration (time since first activity)
-        first_activity = min(activities, key=lambda a: a.started_at)
-        session_duration = (now - first_activity.started_at).total_seconds() / 60
+        session_duration = (now - min(started for _, _, started, _ in per_app)).total_seconds() / 60
+        dominant_app = max(per_app, key=lambda row: row[1])[0]
+        app_switch_count = sum(switches for _, _, _, switches in per_app)
 
-        # Find dominant app
-        app_durations = {}
-        for activity in activities:
-            duration = activity.duration_seconds or 0
-            app_durations[activity.app_name] = app_durations.get(activity.app_name, 0) + duration
-
-        dominant_app = max(app_durations, key=app_durations.get) if app_durations else "Unknown"
+        # Only the latest rows are loaded: current context and recent app sequence
+        activities = self.db.query(ActivityLog).filter(*window).order_by(
+            ActivityLog.started_at.desc(), ActivityLog.id.desc()
+        ).limit(10).all()
+        current = activities[0]
 
-        # Get recent app sequence (for context)
         recent_apps = []
         seen_apps = set()
-        for activity in activities[:10]:
-            if activity.app_name not in seen_apps:
+        for activity in activities:
+            if activity.app_id not in seen_apps:
                 recent_apps.append({
                     "app": activity.app_name,
                     "window": activity.window_title
                 })
-                seen_apps.add(activity.app_name)
-
-        # Count unique app switches
-        app_switch_count = 0
-        prev_app = None
-        for activity in reversed(activities):
-            if prev_app and activity.app_name != prev_app:
-                app_switch_count += 1
-            prev_app = activity.app_name
+                seen_apps.add(activity.app_id)
 
         # Get the latest activity for struggle data
         latest = activities[0] if activities else None
@@ -329,6 +343,9 @@ class HintGenerator:
 
     def _get_recent_hints(self, device_id: str) -> list[dict]:
         """Get recent hints for context - more hints = less repetition."""
+        if self.device_state is not None:
+            return list(self.device_state.recent_hints)
+
         hints = self.db.query(Hint).filter(
             Hint.device_id == device_id,
         ).order_by(Hint.created_at.desc()).limit(10).all()
@@ -0,0 +1,303 @@
+"""
+Durable queue for hint checks (the hint_jobs table).
+
+Ingestion adds one job per hint check in the same transaction as the
+activity rows, so a committed report always has its checks queued and
+nothing is lost on restart. A HintJobQueue consumes them: one poller per
+process claims up to `consumers` runnable jobs at a time with
+
+    UPDATE hint_jobs SET status = 'running', ...
+    WHERE id IN (SELECT id ... FOR UPDATE SKIP LOCKED LIMIT n)
+    RETURNING ...
+
+so any number of API processes and standalone workers (app/cli/worker.py)
+can share the table without handing out a job twice. Each consumer only
+claims jobs for the device slots it owns (services/sharding.py), so a
+device's jobs always land in one process, where its actor
+(services/device_actors.py) runs them one at a time against in-memory
+hint history. Each job runs with its own session. Successful jobs are deleted; failures are retried with
+exponential backoff, then kept as FAILED with the last error. Jobs whose
+consumer died are reclaimed once their lease (HINT_JOB_LEASE_SECONDS) runs
+out.
+"""
+import asyncio
+import logging
+import os
+import secrets
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db import SessionLocal
+from app.metrics import (
+    DEVICE_ACTORS,
+    HINT_JOB_LAG_SECONDS,
+    HINT_JOB_SECONDS,
+    HINT_JOB_SLOTS_OWNED,
+    HINT_JOBS_ENQUEUED,
+    HINT_JOBS_PROCESSED,
+    HINT_JOBS_QUEUED,
+)
+from app.models.hint_job import HintJob, HintJobStatus
+from app.sampling_profiler import profiler
+from app.services.device_actors import DeviceActor, device_actors
+from app.services.hint_generator import HintGenerator
+from app.services.sharding import ShardMembership, device_slot
+
+logger = logging.getLogger(__name__)
+
+DEPTH_SAMPLE_SECONDS = 5
+SHUTDOWN_GRACE_SECONDS = 10
+
+
+class ClaimedJob(NamedTuple):
+    id: int
+    device_id: str
+    payload: dict
+    attempts: int
+    run_after: datetime
+
+
+def enqueue_hint_checks(db: Session, checks: list[dict]):
+    """Add hint checks (check_and_generate_hint kwargs) to the caller's transaction."""
+    if not checks:
+        return
+    db.add_all(
+        HintJob(
+            device_id=check["device_id"],
+            shard=device_slot(check["device_id"]),
+            payload={k: v for k, v in check.items() if k != "device_id"},
+        )
+        for check in checks
+    )
+    HINT_JOBS_ENQUEUED.inc(len(checks))
+
+
+def claim_jobs(worker_id: str, limit: int, slots: Optional[frozenset[int]] = None) -> list[ClaimedJob]:
+    """Mark up to `limit` runnable (or lease-expired) jobs as ours and return them.
+
+    With `slots`, only jobs for devices in those slots; None means all.
+    """
+    now = datetime.utcnow()
+    lease_expired = now - timedelta(seconds=settings.hint_job_lease_seconds)
+    claimable = (
+        select(HintJob.id)
+        .where(or_(
+            and_(HintJob.status == HintJobStatus.QUEUED, HintJob.run_after <= now),
+            and_(HintJob.status == HintJobStatus.RUNNING, HintJob.locked_at < lease_expired),
+        ))
+        .order_by(HintJob.run_after)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if slots is not None:
+        claimable = claimable.where(HintJob.shard.in_(sorted(slots)))
+    claimable = claimable.scalar_subquery()
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            update(HintJob)
+            .where(HintJob.id.in_(claimable))
+            .values(
+                status=HintJobStatus.RUNNING,
+                locked_at=now,
+                locked_by=worker_id,
+                attempts=HintJob.attempts + 1,
+            )
+            .returning(HintJob.id, HintJob.device_id, HintJob.payload, HintJob.attempts, HintJob.run_after)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+    finally:
+        db.close()
+    return [ClaimedJob(*row) for row in rows]
+
+
+def complete_job(job: ClaimedJob, worker_id: str):
+    db = SessionLocal()
+    try:
+        # Only if still ours: after a lease expiry another consumer may own it
+        db.execute(delete(HintJob).where(HintJob.id == job.id, HintJob.locked_by == worker_id))
+        db.commit()
+    finally:
+        db.close()
+
+
+def fail_job(job: ClaimedJob, worker_id: str, error: str) -> str:
+    """Schedule a retry, or give up after hint_job_max_attempts. Returns the outcome label."""
+    if job.attempts >= settings.hint_job_max_attempts:
+        outcome, values = "failed", {HintJob.status: HintJobStatus.FAILED}
+    else:
+        backoff = settings.hint_job_retry_backoff_seconds * 2 ** (job.attempts - 1)
+        outcome, values = "retry", {
+            HintJob.status: HintJobStatus.QUEUED,
+            HintJob.run_after: datetime.utcnow() + timedelta(seconds=backoff),
+        }
+    db = SessionLocal()
+    try:
+        db.query(HintJob).filter(HintJob.id == job.id, HintJob.locked_by == worker_id).update(
+            {**values, HintJob.locked_by: None, HintJob.last_error: error[:2000]},
+            synchronize_session=False,
+        )
+        db.commit()
+    finally:
+        db.close()
+    return outcome
+
+
+def queued_job_count() -> int:
+    db = SessionLocal()
+    try:
+        return db.query(func.count(HintJob.id)).filter(HintJob.status == HintJobStatus.QUEUED).scalar()
+    finally:
+        db.close()
+
+
+class HintJobQueue:
+    """Per-process consumer pool for hint_jobs."""
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{secrets.token_hex(3)}"
+        self.consumers = settings.hint_job_consumers
+        self.membership = ShardMembership(self.worker_id)
+        self.actors = device_actors
+        self.depth = 0                 # Queued jobs at the last sample
+        self._running: set[asyncio.Task] = set()
+        self._saturated = False        # Last claim filled every free slot
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, consumers: int = None):
+        self.consumers = consumers or settings.hint_job_consumers
+        self._wakeup = asyncio.Event()
+        await self._heartbeat()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._running:
+            # Unfinished jobs keep their lease and are picked up again after it expires
+            _, pending = await asyncio.wait(self._running, timeout=SHUTDOWN_GRACE_SECONDS)
+            for task in pending:
+                task.cancel()
+        try:
+            await run_in_threadpool(self.membership.leave)
+        except Exception:
+            logger.exception("Leaving hint worker membership failed")
+        self.actors.retain(lambda device_id: False)
+
+    def notify(self):
+        """New jobs were committed in this process; claim without waiting for the next poll."""
+        self._wakeup.set()
+
+    def _claimable_slots(self) -> Optional[frozenset[int]]:
+        owned = self.membership.owned_slots
+        return None if len(owned) == settings.hint_job_slots else owned
+
+    async def _heartbeat(self):
+        try:
+            changed = await run_in_threadpool(self.membership.heartbeat)
+        except Exception:
+            logger.exception("Hint worker heartbeat failed")
+            return
+        if changed:
+            owned = self.membership.owned_slots
+            self.actors.retain(lambda device_id: device_slot(device_id) in owned)
+            HINT_JOB_SLOTS_OWNED.set(len(owned))
+        DEVICE_ACTORS.set(len(self.actors))
+
+    async def _run(self):
+        depth_sampled = 0.0
+        heartbeat_at = time.monotonic()
+        while True:
+            self._wakeup.clear()
+            if time.monotonic() - heartbeat_at >= settings.hint_worker_heartbeat_seconds:
+                heartbeat_at = time.monotonic()
+                await self._heartbeat()
+            if time.monotonic() - depth_sampled >= DEPTH_SAMPLE_SECONDS:
+                depth_sampled = time.monotonic()
+                try:
+                    self.depth = await run_in_threadpool(queued_job_count)
+                    HINT_JOBS_QUEUED.set(self.depth)
+                except Exception:
+                    logger.exception("Hint job depth sample failed")
+
+            free = self.consumers - len(self._running)
+            if free > 0 and self.membership.owned_slots:
+                try:
+                    jobs = await run_in_threadpool(claim_jobs, self.worker_id, free, self._claimable_slots())
+                except Exception:
+                    logger.exception("Hint job claim failed")
+                    jobs = []
+                self._saturated = len(jobs) == free
+                for job in jobs:
+                    task = asyncio.create_task(self._process(job))
+                    self._running.add(task)
+                    task.add_done_callback(self._job_done)
+                if self._saturated:
+                    continue
+
+            timeout = min(settings.hint_job_poll_interval_seconds, settings.hint_worker_heartbeat_seconds)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _job_done(self, task: asyncio.Task):
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # complete_job/fail_job couldn't reach the database; the lease expiry retries the job
+            logger.error("Hint job bookkeeping failed", exc_info=task.exception())
+        if self._saturated:
+            self._wakeup.set()  # A slot freed up and more work is probably waiting
+
+    async def _run_check(self, job: ClaimedJob, actor: DeviceActor) -> str:
+        db = SessionLocal()
+        try:
+            with profiler.scope("check_hints"):
+                generator = HintGenerator(db, device_state=actor.current_state(db, job.device_id))
+                await generator.check_and_generate_hint(job.device_id, **job.payload)
+        except Exception as exc:
+            db.rollback()
+            actor.state = None  # Reload history next time; it may not match what was committed
+            outcome = await run_in_threadpool(fail_job, job, self.worker_id, repr(exc))
+            logger.warning("Hint job %d failed (attempt %d, %s)", job.id, job.attempts, outcome,
+                           exc_info=True, extra={"device_id": job.device_id})
+            return outcome
+        finally:
+            db.close()
+        await run_in_threadpool(complete_job, job, self.worker_id)
+        return "done"
+
+    async def _process(self, job: ClaimedJob):
+        HINT_JOB_LAG_SECONDS.observe(max((datetime.utcnow() - job.run_after).total_seconds(), 0))
+        started = time.perf_counter()
+        activity_check = "trigger_type" not in job.payload
+        with self.actors.hold(job.device_id) as actor:
+            if activity_check:
+                actor.latest_activity_job = max(actor.latest_activity_job, job.id)
+
+            async with actor.lock:
+                if activity_check and job.id < actor.latest_activity_job:
+                    # A newer report for this device is queued behind us; its check covers this one
+                    await run_in_threadpool(complete_job, job, self.worker_id)
+                    outcome = "coalesced"
+                else:
+                    outcome = await self._run_check(job, actor)
+        HINT_JOB_SECONDS.labels(outcome=outcome).observe(time.perf_counter() - started)
+        HINT_JOBS_PROCESSED.labels(outcome=outcome).inc()
+
+
+hint_job_queue = HintJobQueue()
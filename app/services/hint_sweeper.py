@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+
+from app.config import settings
+from app.db import SessionLocal
+from app.models.hint import Hint, HintStatus
+from app.services.idempotency import purge_receipts
+
+logger = logging.getLogger(__name__)
+
+RECEIPT_PURGE_SECONDS = 300  # Retention is hours; no need to purge on every sweep
+
+
+def sweep_expired_hints(batch_size: int = None) -> int:
+    """Mark expired pending/shown hints dismissed, in set-based batches. Returns rows updated."""
+    batch_size = batch_size or settings.hint_sweep_batch_size
+    now = datetime.utcnow()
+    total = 0
+
+    db = SessionLocal()
+    try:
+        while True:
+            expired_ids = (
+                select(Hint.id)
+                .where(
+                    Hint.status.in_([HintStatus.PENDING, HintStatus.SHOWN]),
+                    Hint.expires_at <= now,
+                )
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            updated = (
+                db.query(Hint)
+                .filter(Hint.id.in_(expired_ids))
+                .update({Hint.status: HintStatus.DISMISSED}, synchronize_session=False)
+            )
+            db.commit()
+            total += updated
+            if updated < batch_size:
+                return total
+    finally:
+        db.close()
+
+
+class HintExpirySweeper:
+    """
+    Periodically expires old hints so the hint-check hot path never writes,
+    and purges ingest receipts past their retention.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        receipts_purged = 0.0
+        while True:
+            try:
+                expired = await run_in_threadpool(sweep_expired_hints)
+                if expired:
+                    logger.info("Expired %d hints", expired)
+            except Exception:
+                logger.exception("Hint sweep failed")
+            if time.monotonic() - receipts_purged >= RECEIPT_PURGE_SECONDS:
+                receipts_purged = time.monotonic()
+                try:
+                    purged = await run_in_threadpool(purge_receipts)
+                    if purged:
+                        logger.info("Purged %d ingest receipts", purged)
+                except Exception:
+                    logger.exception("Ingest receipt purge failed")
+            await asyncio.sleep(settings.hint_sweep_interval_seconds)
+
+
+hint_sweeper = HintExpirySweeper()
@@ -0,0 +1,172 @@
+"""
+Deduplication of retried ingestion requests.
+
+Clients tag activity reports with a batch_id (a per-device sequence
+number works) and time triggers with a request_id. The first request
+claims the key by inserting an ingest_receipts row with
+ON CONFLICT DO NOTHING. The insert is in the request's own transaction,
+and the request stores its result there before committing. A retry's
+insert conflicts, so it gets the stored result back and nothing is
+processed twice. A retry that arrives while the original is still in
+flight waits on the row lock (Postgres) or the write lock (SQLite), then
+sees the committed result. Time triggers are the exception: they commit
+the claim before the LLM call, so a retry arriving meanwhile sees an
+empty result, which the route reports as in progress. Such a claim is a
+lease: if the request dies before storing its result, a retry after
+IDEMPOTENCY_CLAIM_LEASE_SECONDS takes the claim over and runs it.
+
+Committed results are also kept in a per-process window, so most retries
+are answered without a query. The hint sweeper deletes receipts older
+than IDEMPOTENCY_RETENTION_HOURS, after which a retry counts as new.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db import SessionLocal
+from app.metrics import INGEST_DUPLICATES
+from app.models.ingest_receipt import IngestReceipt
+
+ClientKey = tuple[str, str]  # (device_id, key)
+
+
+class ReceiptWindow:
+    """Per-process LRU of committed results, by (kind, device_id, key)."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[str, str, str], dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, client_key: ClientKey) -> Optional[dict]:
+        with self._lock:
+            result = self._entries.get((kind, *client_key))
+            if result is not None:
+                self._entries.move_to_end((kind, *client_key))
+            return result
+
+    def put(self, kind: str, client_key: ClientKey, result: dict):
+        with self._lock:
+            self._entries[(kind, *client_key)] = result
+            self._entries.move_to_end((kind, *client_key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+receipt_window = ReceiptWindow(settings.idempotency_window_size)
+
+
+def claim(db: Session, kind: str, client_keys: Iterable[ClientKey]) -> dict[ClientKey, dict]:
+    """
+    Claim client keys of `kind` in the caller's transaction.
+
+    Returns the stored result of every key already processed; keys not in
+    the result are ours, and their results must be stored with record()
+    before the transaction commits.
+    """
+    duplicates: dict[ClientKey, dict] = {}
+    unseen = []
+    for client_key in dict.fromkeys(client_keys):
+        result = receipt_window.get(kind, client_key)
+        if result is not None:
+            duplicates[client_key] = result
+        else:
+            unseen.append(client_key)
+    if unseen:
+        now = datetime.utcnow()
+        rows = [
+            {"device_id": device_id, "kind": kind, "key": key, "created_at": now, "claimed_at": now}
+            for device_id, key in unseen
+        ]
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = (
+                insert(IngestReceipt)
+                .values(rows)
+                .on_conflict_do_nothing()
+                .returning(IngestReceipt.device_id, IngestReceipt.key)
+            )
+            claimed = {tuple(row) for row in db.execute(stmt)}
+        else:
+            existing = _stored_results(db, kind, unseen)
+            db.add_all(IngestReceipt(**row) for row in rows if (row["device_id"], row["key"]) not in existing)
+            db.flush()
+            claimed = set(unseen) - set(existing)
+        conflicted = [
+            client_key for client_key in unseen
+            if client_key not in claimed and not _take_over_expired(db, kind, client_key, now)
+        ]
+        if conflicted:
+            duplicates.update(_stored_results(db, kind, conflicted))
+    if duplicates:
+        INGEST_DUPLICATES.labels(kind=kind).inc(len(duplicates))
+    return duplicates
+
+
+def _take_over_expired(db: Session, kind: str, client_key: ClientKey, now: datetime) -> bool:
+    """Renew the lease on a claim whose request never stored a result; False if it is live or done."""
+    device_id, key = client_key
+    expired = now - timedelta(seconds=settings.idempotency_claim_lease_seconds)
+    return db.execute(
+        update(IngestReceipt)
+        .where(IngestReceipt.device_id == device_id, IngestReceipt.kind == kind, IngestReceipt.key == key)
+        .where(IngestReceipt.result.is_(None), IngestReceipt.claimed_at < expired)
+        .values(claimed_at=now)
+    ).rowcount == 1
+
+
+def _stored_results(db: Session, kind: str, client_keys: list[ClientKey]) -> dict[ClientKey, dict]:
+    rows = (
+        db.query(IngestReceipt.device_id, IngestReceipt.key, IngestReceipt.result)
+        .filter(IngestReceipt.kind == kind)
+        .filter(tuple_(IngestReceipt.device_id, IngestReceipt.key).in_(client_keys))
+    )
+    return {(device_id, key): result or {} for device_id, key, result in rows}
+
+
+def record(db: Session, kind: str, results: dict[ClientKey, dict]):
+    """Store the results of claimed keys (in the claiming transaction)."""
+    if results:
+        db.bulk_update_mappings(IngestReceipt, [
+            {"device_id": device_id, "kind": kind, "key": key, "result": result}
+            for (device_id, key), result in results.items()
+        ])
+
+
+def release(db: Session, kind: str, client_key: ClientKey):
+    """Give up a claimed key whose processing failed, so a retry is processed."""
+    db.rollback()
+    device_id, key = client_key
+    db.execute(delete(IngestReceipt).where(
+        IngestReceipt.device_id == device_id, IngestReceipt.kind == kind, IngestReceipt.key == key,
+    ))
+    db.commit()
+
+
+def remember(kind: str, results: dict[ClientKey, dict]):
+    """After commit: answer later retries of these keys from memory."""
+    for client_key, result in results.items():
+        receipt_window.put(kind, client_key, result)
+
+
+def purge_receipts() -> int:
+    """Delete receipts past the retention window. Returns rows deleted."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.idempotency_retention_hours)
+    db = SessionLocal()
+    try:
+        deleted = db.execute(delete(IngestReceipt).where(IngestReceipt.created_at < cutoff)).rowcount
+        db.commit()
+        return deleted
+    finally:
+        db.close()
@@ -0,0 +1,124 @@
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.config import settings
+from app.models.app_name import AppName
+from app.models.window_title import WindowTitle
+
+# Session.info key: {transaction: {interner: {value: id}}} for rows this session
+# inserted and has not committed yet
+PENDING_KEY = "interned_pending"
+
+
+class StringInterner:
+    """
+    Maps strings to ids in a lookup table, with a per-process LRU in front.
+
+    Rows this session inserted only reach the LRU once its transaction
+    commits; until then they are looked up from the session's pending ids,
+    so a rollback can't leave ids of rows that no longer exist behind.
+    """
+
+    def __init__(self, model, max_size: int):
+        self.model = model
+        self.max_size = max_size
+        self._cache: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_ids(self, db: Session, values: Iterable[str | None]) -> dict[str, int]:
+        """Resolve every distinct non-null value to its id, creating rows as needed."""
+        ids = {}
+        missing = []
+
+        with self._lock:
+            for value in {v for v in values if v is not None}:
+                cached = self._cache.get(value)
+                if cached is None:
+                    missing.append(value)
+                else:
+                    self._cache.move_to_end(value)
+                    ids[value] = cached
+
+        if missing:
+            for layer in db.info.get(PENDING_KEY, {}).values():
+                ids.update((value, layer[self][value]) for value in missing if value in layer.get(self, ()))
+            missing = [value for value in missing if value not in ids]
+        if not missing:
+            return ids
+
+        # One round-trip for everything the cache didn't know about. Rows found
+        # here were committed by someone else (ours are all pending), so they
+        # can be cached right away.
+        found = dict(
+            db.query(self.model.name, self.model.id)
+            .filter(self.model.name.in_(missing))
+            .all()
+        )
+        self._put(found)
+        ids.update(found)
+
+        inserted = {value: self._insert(db, value) for value in missing if value not in found}
+        if inserted:
+            transaction = db.get_nested_transaction() or db.get_transaction()
+            db.info.setdefault(PENDING_KEY, {}).setdefault(transaction, {}).setdefault(self, {}).update(inserted)
+            ids.update(inserted)
+        return ids
+
+    def _insert(self, db: Session, value: str) -> int:
+        # A savepoint keeps a concurrent insert of the same name from
+        # aborting the caller's transaction; the loser just reads the winner.
+        try:
+            with db.begin_nested():
+                row = self.model(name=value)
+                db.add(row)
+            return row.id
+        except IntegrityError:
+            return db.query(self.model.id).filter(self.model.name == value).scalar()
+
+    def _put(self, ids: dict[str, int]):
+        with self._lock:
+            for value, value_id in ids.items():
+                self._cache[value] = value_id
+                self._cache.move_to_end(value)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+@event.listens_for(Session, "after_commit")
+def _promote_pending(session: Session):
+    pending = session.info.get(PENDING_KEY)
+    if not pending:
+        return
+    # Fires for savepoints too: their ids move to the enclosing transaction
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    layer = pending.pop(transaction, None)
+    if not layer:
+        return
+    if transaction.parent is not None:
+        parent = pending.setdefault(transaction.parent, {})
+        for interner, ids in layer.items():
+            parent.setdefault(interner, {}).update(ids)
+    else:
+        for interner, ids in layer.items():
+            interner._put(ids)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending(session: Session, transaction: SessionTransaction):
+    # Committed layers were already moved on; anything left was rolled back
+    pending = session.info.get(PENDING_KEY)
+    if pending:
+        pending.pop(transaction, None)
+
+
+app_names = StringInterner(AppName, settings.intern_cache_size)
+window_titles = StringInterner(WindowTitle, settings.intern_cache_size)
@@ -0,0 +1,60 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.activity import ActivityLog
+
+
+def latest_app_id(db: Session, device_id: str, before_id: int) -> Optional[int]:
+    """App of the device's most recent activity stored before `before_id` (the cache-miss path)."""
+    return (
+        db.query(ActivityLog.app_id)
+        .filter(ActivityLog.device_id == device_id)
+        .filter(ActivityLog.id < before_id)
+        .order_by(ActivityLog.started_at.desc(), ActivityLog.id.desc())
+        .limit(1)
+        .scalar()
+    )
+
+
+class LastAppCache:
+    """
+    Per-process LRU + TTL of each device's last known app id, kept current
+    by ingestion so app-switch detection needs no query on a hit.
+
+    With several API workers a device's reports may alternate between
+    them; the TTL bounds how long a worker trusts an entry another worker
+    may have moved past.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, device_id: str) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(device_id)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            self._entries.move_to_end(device_id)
+            return entry[0]
+
+    def put(self, device_id: str, app_id: int):
+        with self._lock:
+            self._entries[device_id] = (app_id, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(device_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+last_app_cache = LastAppCache(settings.last_app_cache_size, settings.last_app_cache_ttl_seconds)
@@ -0,0 +1,184 @@
+import logging
+import select
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db import SessionLocal, engine, is_replica
+from app.models.user_preferences import UserPreferences
+from app.schemas.preferences import UserPreferencesResponse
+
+logger = logging.getLogger(__name__)
+
+
+def get_or_create_preferences(db: Session, device_id: str) -> UserPreferences:
+    """
+    Load a device's preferences row, creating the defaults if missing.
+
+    Creation is a single INSERT ... ON CONFLICT DO NOTHING RETURNING, so
+    concurrent first requests for a device can't race on the unique constraint.
+
+    The new row is committed only if the session had no transaction open;
+    inside a caller's (a report being ingested, say) it commits or rolls
+    back with the rest of the caller's work.
+    """
+    owns_transaction = not db.in_transaction()
+    prefs = db.query(UserPreferences).filter(UserPreferences.device_id == device_id).first()
+    return prefs or _create_preferences(db, device_id, commit=owns_transaction)
+
+
+def _create_preferences(db: Session, device_id: str, commit: bool) -> UserPreferences:
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = (
+            insert(UserPreferences)
+            .values(device_id=device_id)
+            .on_conflict_do_nothing(index_elements=[UserPreferences.device_id])
+            .returning(UserPreferences)
+        )
+        prefs = db.scalars(stmt).first()
+    else:
+        try:
+            with db.begin_nested():
+                prefs = UserPreferences(device_id=device_id)
+                db.add(prefs)
+        except IntegrityError:
+            prefs = None
+
+    if prefs is None:
+        # Another request created it first
+        prefs = db.query(UserPreferences).filter(UserPreferences.device_id == device_id).first()
+    if commit:
+        db.commit()
+    return prefs
+
+
+class PreferencesCache:
+    """
+    Read-through LRU + TTL cache of preferences snapshots, keyed by device_id.
+
+    Writes in this process update the entry directly. Other workers learn
+    about writes through Postgres NOTIFY (see start_listener), and the TTL
+    bounds staleness when notifications are unavailable.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[UserPreferencesResponse, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def get(self, db: Session, device_id: str) -> UserPreferencesResponse:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(device_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(device_id)
+                return entry[0]
+
+        if not is_replica(db):
+            owns_transaction = not db.in_transaction()
+            prefs = db.query(UserPreferences).filter(UserPreferences.device_id == device_id).first()
+            if prefs is None:
+                prefs = _create_preferences(db, device_id, commit=owns_transaction)
+                if not owns_transaction:
+                    # Not committed yet, so not cached: the caller may still roll it back
+                    return UserPreferencesResponse.model_validate(prefs)
+            snapshot = UserPreferencesResponse.model_validate(prefs)
+        else:
+            prefs = db.query(UserPreferences).filter(UserPreferences.device_id == device_id).first()
+            if prefs is None:
+                # New device (or replication lag): defaults are created on the primary
+                with SessionLocal() as primary:
+                    prefs = get_or_create_preferences(primary, device_id)
+                    snapshot = UserPreferencesResponse.model_validate(prefs)
+            else:
+                snapshot = UserPreferencesResponse.model_validate(prefs)
+        self.put(snapshot)
+        return snapshot
+
+    def put(self, snapshot: UserPreferencesResponse):
+        with self._lock:
+            self._entries[snapshot.device_id] = (snapshot, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(snapshot.device_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, device_id: str, version: Optional[int] = None):
+        """Drop an entry (only if older than `version`, when given)."""
+        with self._lock:
+            entry = self._entries.get(device_id)
+            if entry is not None and (version is None or entry[0].version < version):
+                del self._entries[device_id]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def publish(self, db: Session, prefs: UserPreferences):
+        """Record a committed write locally and tell other workers about it."""
+        self.put(UserPreferencesResponse.model_validate(prefs))
+        if db.get_bind().dialect.name == "postgresql" and settings.preferences_notify_channel:
+            db.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": settings.preferences_notify_channel, "payload": f"{prefs.device_id}\t{prefs.version}"},
+            )
+            db.commit()
+
+    def start_listener(self):
+        """LISTEN for other workers' writes (Postgres only)."""
+        if engine.dialect.name != "postgresql" or not settings.preferences_notify_channel:
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(target=self._listen, name="preferences-listener", daemon=True)
+        self._listener.start()
+
+    def stop_listener(self):
+        self._stop.set()
+        if self._listener:
+            self._listener.join(timeout=5)
+            self._listener = None
+
+    def _listen(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while not self._stop.is_set():
+            try:
+                conn = psycopg2.connect(dsn)
+            except psycopg2.Error as e:
+                logger.warning("Preferences listener can't connect: %s", e)
+                self._stop.wait(5)
+                continue
+            try:
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{settings.preferences_notify_channel}"')
+                # Anything written while we weren't listening may be stale
+                self.clear()
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        device_id, _, version = conn.notifies.pop(0).payload.partition("\t")
+                        self.invalidate(device_id, int(version) if version else None)
+            except psycopg2.Error as e:
+                logger.warning("Preferences listener error: %s", e)
+                self._stop.wait(1)
+            finally:
+                conn.close()
+
+
+preferences_cache = PreferencesCache(settings.preferences_cache_size, settings.preferences_cache_ttl_seconds)
@@ -0,0 +1,40 @@
+"""
+Direct row-to-dict encoding for hot response paths.
+
+These build response bodies straight from column tuples in the field order
+of the response schemas, so FastAPI doesn't have to re-validate ORM objects
+we just wrote ourselves. Values come from the database, exactly as the
+validated path would see them after a refresh.
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.activity import ActivityLog
+from app.models.hint import Hint
+from app.schemas.hint import HintResponse
+from app.services.activity_export import activity_rows_query
+
+HINT_FIELDS = tuple(HintResponse.model_fields)
+
+
+def activity_log_rows(db: Session, ids: list[int]) -> list[dict]:
+    """ActivityLogResponse-shaped dicts for the given ids, in id order (one query)."""
+    if not ids:
+        return []
+    stmt = (
+        activity_rows_query()
+        .where(ActivityLog.id.in_(ids))
+        .order_by(None)
+        .order_by(ActivityLog.id)
+    )
+    return [row._asdict() for row in db.execute(stmt)]
+
+
+def hint_rows(db: Session, *criteria, order_by=()) -> list[dict]:
+    """HintResponse-shaped dicts for hints matching criteria."""
+    stmt = (
+        select(*(getattr(Hint, field) for field in HINT_FIELDS))
+        .where(*criteria)
+        .order_by(*order_by)
+    )
+    return [row._asdict() for row in db.execute(stmt)]
@@ -0,0 +1,110 @@
+"""
+Device ownership for hint-job consumers.
+
+Every device hashes to one of HINT_JOB_SLOTS slots (stored on its jobs;
+the slot count is fixed for a deployment). Consumer processes heartbeat
+into hint_workers, and each one places the live workers on a consistent
+hash ring and takes the slots that land on itself. All workers see the
+same member list, so they agree on the split without coordinating, and
+a worker joining or leaving only moves about 1/N of the slots.
+
+A worker that stops cleanly removes its row at once. One that dies keeps
+its slots until its heartbeat is HINT_WORKER_TTL_SECONDS old.
+"""
+import bisect
+import hashlib
+import logging
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.config import settings
+from app.db import SessionLocal
+from app.models.hint_worker import HintWorker
+
+logger = logging.getLogger(__name__)
+
+VNODES = 256  # Ring points per worker; evens out the split
+
+
+def device_slot(device_id: str) -> int:
+    return zlib.crc32(device_id.encode()) % settings.hint_job_slots
+
+
+def _ring_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    def __init__(self, members):
+        points = sorted((_ring_hash(f"{member}#{i}"), member) for member in members for i in range(VNODES))
+        self._hashes = [h for h, _ in points]
+        self._members = [m for _, m in points]
+
+    def owner(self, key: str) -> str:
+        i = bisect.bisect(self._hashes, _ring_hash(key)) % len(self._hashes)
+        return self._members[i]
+
+
+class ShardMembership:
+    """This process's entry in hint_workers and the slots it owns."""
+
+    def __init__(self, worker_id: str):
+        self.worker_id = worker_id
+        self.members: tuple[str, ...] = ()
+        self.owned_slots: frozenset[int] = frozenset()
+
+    def heartbeat(self) -> bool:
+        """Refresh our row and the member list. Returns True if slot ownership changed."""
+        now = datetime.utcnow()
+        live_after = now - timedelta(seconds=settings.hint_worker_ttl_seconds)
+        db = SessionLocal()
+        try:
+            dialect = db.get_bind().dialect.name
+            if dialect in ("postgresql", "sqlite"):
+                insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+                stmt = insert(HintWorker).values(worker_id=self.worker_id, heartbeat_at=now, started_at=now)
+                db.execute(stmt.on_conflict_do_update(
+                    index_elements=[HintWorker.worker_id],
+                    set_={"heartbeat_at": stmt.excluded.heartbeat_at},
+                ))
+            else:
+                updated = (
+                    db.query(HintWorker)
+                    .filter(HintWorker.worker_id == self.worker_id)
+                    .update({HintWorker.heartbeat_at: now}, synchronize_session=False)
+                )
+                if not updated:
+                    db.add(HintWorker(worker_id=self.worker_id, heartbeat_at=now, started_at=now))
+            # Rows of long-dead workers are only noise
+            db.execute(delete(HintWorker).where(HintWorker.heartbeat_at < now - timedelta(hours=1)))
+            db.commit()
+            members = tuple(sorted(
+                worker_id for (worker_id,) in
+                db.query(HintWorker.worker_id).filter(HintWorker.heartbeat_at >= live_after)
+            ))
+        finally:
+            db.close()
+
+        if members == self.members:
+            return False
+        ring = HashRing(members)
+        self.members = members
+        self.owned_slots = frozenset(
+            slot for slot in range(settings.hint_job_slots) if ring.owner(str(slot)) == self.worker_id
+        )
+        logger.info("Hint job slots rebalanced: %d workers, %d slots owned here",
+                    len(members), len(self.owned_slots))
+        return True
+
+    def leave(self):
+        db = SessionLocal()
+        try:
+            db.execute(delete(HintWorker).where(HintWorker.worker_id == self.worker_id))
+            db.commit()
+        finally:
+            db.close()
+        self.members = ()
+        self.owned_slots = frozenset()
@@ -0,0 +1,150 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.device_timer_state import DeviceTimerState
+from app.models.user_preferences import UserPreferences
+from app.schemas.activity import ActivityReportItem
+from app.schemas.preferences import UserPreferencesResponse
+from app.services.preferences_cache import preferences_cache
+
+
+@dataclass
+class TimerThresholds:
+    same_app_minutes: float
+    break_interval_minutes: float
+    enable_same_app_hints: bool
+    enable_break_reminders: bool
+
+    @classmethod
+    def from_preferences(cls, prefs: UserPreferences | UserPreferencesResponse) -> "TimerThresholds":
+        return cls(
+            same_app_minutes=prefs.same_app_threshold_minutes or 0,
+            break_interval_minutes=prefs.break_interval_minutes or 0,
+            enable_same_app_hints=bool(prefs.enable_same_app_hints),
+            enable_break_reminders=bool(prefs.enable_break_reminders),
+        )
+
+
+@dataclass
+class TimeTrigger:
+    trigger_type: str   # "same_app_duration" or "break_reminder"
+    struggle_data: dict
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _activity_end(activity: ActivityReportItem) -> datetime:
+    if activity.ended_at:
+        return _naive_utc(activity.ended_at)
+    started_at = _naive_utc(activity.started_at)
+    if activity.duration_seconds:
+        return started_at + timedelta(seconds=activity.duration_seconds)
+    return started_at
+
+
+class TimeTriggerTracker:
+    """
+    Derives same-app and break triggers from the ingested activity stream.
+
+    Each device's state machine (current app and since when, session start,
+    triggers already sent) is a device_timer_states row, locked and advanced
+    in the report's transaction: every API process sees the same stream, and
+    a rolled-back report leaves no trace. Thresholds come from the
+    preferences cache.
+    """
+
+    def observe(self, db: Session, device_id: str, activities: list[ActivityReportItem]) -> list[TimeTrigger]:
+        """Advance the device's state through a report; return triggers that fired."""
+        if not activities:
+            return []
+        state = self._locked_state(db, device_id)
+        thresholds = TimerThresholds.from_preferences(preferences_cache.get(db, device_id))
+        return self._advance(state, thresholds, activities)
+
+    def _locked_state(self, db: Session, device_id: str) -> DeviceTimerState:
+        # Create the row first: it's a write, so on SQLite the transaction takes the
+        # write lock here, and on Postgres the row exists for FOR UPDATE to lock
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            db.execute(
+                insert(DeviceTimerState)
+                .values(device_id=device_id, same_app_hints_sent=0, breaks_sent=0)
+                .on_conflict_do_nothing(index_elements=[DeviceTimerState.device_id])
+            )
+        elif db.get(DeviceTimerState, device_id) is None:
+            try:
+                with db.begin_nested():
+                    db.add(DeviceTimerState(device_id=device_id, same_app_hints_sent=0, breaks_sent=0))
+            except IntegrityError:
+                pass  # Another report created it first
+        return (
+            db.query(DeviceTimerState)
+            .filter(DeviceTimerState.device_id == device_id)
+            .with_for_update()
+            .one()
+        )
+
+    def _advance(
+        self, state: DeviceTimerState, thresholds: TimerThresholds, activities: list[ActivityReportItem],
+    ) -> list[TimeTrigger]:
+        idle_reset = timedelta(minutes=settings.session_idle_reset_minutes)
+        ordered = sorted(activities, key=lambda a: _naive_utc(a.started_at))
+        latest = ordered[-1]
+
+        for activity in ordered:
+            started_at = _naive_utc(activity.started_at)
+            ended_at = _activity_end(activity)
+
+            if state.last_seen is None or started_at - state.last_seen > idle_reset:
+                # New session after a gap
+                state.session_start = started_at
+                state.breaks_sent = 0
+                state.current_app = None
+
+            if activity.app_name != state.current_app:
+                state.current_app = activity.app_name
+                state.app_since = started_at
+                state.same_app_hints_sent = 0
+
+            if activity.window_title:
+                state.window_title = activity.window_title
+            if state.last_seen is None or ended_at > state.last_seen:
+                state.last_seen = ended_at
+
+        triggers = []
+
+        dwell_minutes = (state.last_seen - state.app_since).total_seconds() / 60
+        if (thresholds.enable_same_app_hints and thresholds.same_app_minutes > 0
+                and dwell_minutes >= thresholds.same_app_minutes * (state.same_app_hints_sent + 1)):
+            state.same_app_hints_sent = int(dwell_minutes // thresholds.same_app_minutes)
+            triggers.append(TimeTrigger("same_app_duration", {
+                'current_app': state.current_app,
+                'window_title': state.window_title or '',
+                'same_app_minutes': dwell_minutes,
+                'context': latest.context or '',
+                'recent_windows': latest.recent_windows or [],
+            }))
+
+        session_minutes = (state.last_seen - state.session_start).total_seconds() / 60
+        if (thresholds.enable_break_reminders and thresholds.break_interval_minutes > 0
+                and session_minutes >= thresholds.break_interval_minutes * (state.breaks_sent + 1)):
+            state.breaks_sent = int(session_minutes // thresholds.break_interval_minutes)
+            triggers.append(TimeTrigger("break_reminder", {
+                'break_number': state.breaks_sent,
+                'session_minutes': session_minutes,
+            }))
+
+        return triggers
+
+
+time_trigger_tracker = TimeTriggerTracker()
@@ -0,0 +1,160 @@
+"""
+Per-request SQL accounting from SQLAlchemy engine events.
+
+Every request gets a QueryStats in a contextvar; the cursor-execute hooks
+add each statement's count and time to it. That much is always on (it
+feeds http_request_db_seconds). With SQL_PROFILING enabled we also keep
+the slowest statements, flag statements repeated within one request (the
+usual N+1 shape), send X-SQL-* headers in debug mode and keep recent
+profiles for GET /admin/sql-profile.
+
+Counts in the headers cover everything up to the response start; the
+stored profile also includes background tasks that ran after it.
+
+Budgets can be asserted around direct calls:
+
+    with count_queries() as stats:
+        HintGenerator(db)._can_send_hint(device_id, prefs)
+    assert stats.count <= 2
+
+or from response headers with assert_query_budget(response, 6).
+"""
+import heapq
+import logging
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+
+from app.config import settings
+from app.metrics import REQUEST_DB_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    detailed: bool = False
+    slowest: list = field(default_factory=list)       # min-heap of (seconds, statement)
+    statements: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.seconds += elapsed
+        if not self.detailed:
+            return
+        self.statements[statement] += 1
+        entry = (elapsed, statement)
+        if len(self.slowest) < settings.sql_profile_slowest:
+            heapq.heappush(self.slowest, entry)
+        elif entry > self.slowest[0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def repeated(self) -> dict[str, int]:
+        """Statements executed at least sql_repeat_threshold times (likely N+1)."""
+        return {s: n for s, n in self.statements.items() if n >= settings.sql_repeat_threshold}
+
+    def summary(self) -> dict:
+        return {
+            "queries": self.count,
+            "db_ms": round(self.seconds * 1000, 3),
+            "slowest": [
+                {"ms": round(seconds * 1000, 3), "statement": statement}
+                for seconds, statement in sorted(self.slowest, reverse=True)
+            ],
+            "repeated": self.repeated(),
+        }
+
+
+_stats: ContextVar[Optional[QueryStats]] = ContextVar("sql_stats", default=None)
+_recent: deque = deque(maxlen=settings.sql_profile_history)
+
+
+def install(engine):
+    """Hook cursor execution on engine. Statements outside a tracked scope cost one contextvar read."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+
+@contextmanager
+def count_queries(detailed: bool = True):
+    """Track statements executed in this context (and threadpool calls made from it)."""
+    stats = QueryStats(detailed=detailed)
+    token = _stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _stats.reset(token)
+
+
+def assert_query_budget(response, budget: int):
+    """Fail if a response (debug mode, SQL_PROFILING on) reports more than `budget` statements."""
+    count = response.headers.get("X-SQL-Queries")
+    assert count is not None, "X-SQL-Queries missing: enable DEBUG and SQL_PROFILING"
+    assert int(count) <= budget, f"{count} SQL statements, budget {budget}"
+
+
+def recent_profiles() -> list[dict]:
+    return list(_recent)
+
+
+class SQLProfilerMiddleware:
+    """Pure ASGI middleware owning the per-request QueryStats."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profiling = settings.sql_profiling
+        headers = profiling and settings.debug
+        at_response = {}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                at_response["queries"] = stats.count
+            if headers and message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-sql-queries", str(stats.count).encode()),
+                    (b"x-sql-time-ms", f"{stats.seconds * 1000:.3f}".encode()),
+                ]
+            await send(message)
+            # Background tasks run after the last body chunk; don't bill them to the request
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                route = scope.get("route")
+                if route is not None and stats.seconds:
+                    REQUEST_DB_SECONDS.labels(route=route.path).observe(stats.seconds)
+
+        with count_queries(detailed=profiling) as stats:
+            await self.app(scope, receive, send_wrapper)
+
+        if profiling:
+            route = scope.get("route")
+            profile = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route.path if route is not None else None,
+                "queries_before_response": at_response.get("queries"),
+                **stats.summary(),
+            }
+            _recent.append(profile)
+            if profile["repeated"]:
+                logger.warning("Repeated SQL in %s %s (possible N+1)", scope["method"], scope["path"],
+                               extra={"repeated": profile["repeated"]})
@@ -0,0 +1,220 @@
+"""
+Opt-in capture of device traffic for replay (benchmarks.replay).
+
+With TRAFFIC_CAPTURE_PATH set, requests to the activity, hints and events
+routers are appended to that file as one compact JSON object per line
+(gzip-compressed if the path ends in .gz): arrival time, method, path,
+status, server latency and the decoded request body.
+
+Bodies are sanitized before they touch disk. Device ids become stable
+pseudonyms (HMAC with TRAFFIC_CAPTURE_SALT), and so do app names other
+than the well-known apps the behavior classifier looks for. Free text
+(window titles, context, recent windows, event titles) becomes a stable
+token plus the keywords and file extensions the classifier looks for, so
+replayed traffic keeps its shape without carrying user content.
+
+The request path only copies the body and enqueues it. Decoding,
+sanitizing and writing happen on a background thread. Requests are left
+out (traffic_capture_dropped_total) when the writer is
+TRAFFIC_CAPTURE_QUEUE_SIZE behind, or when the body is over
+MAX_REQUEST_BODY_BYTES, compressed or not, or can't be decoded.
+"""
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+from typing import Optional
+
+from app.config import settings
+from app.metrics import TRAFFIC_CAPTURE_DROPPED
+from app.services.behavior_classifier import (
+    BROWSERS,
+    CODE_EDITORS,
+    COMM_APPS,
+    ERROR_KEYWORDS,
+    FILE_EXTENSIONS,
+    RESEARCH_KEYWORDS,
+)
+from app.wire_format import MSGPACK_TYPES, decompress_body, msgpack
+
+logger = logging.getLogger(__name__)
+
+CAPTURED_PREFIXES = ("/activities", "/hints", "/events")
+TEXT_FIELDS = frozenset({"window_title", "context", "recent_windows", "event_title"})
+_KEYWORDS = tuple(ERROR_KEYWORDS + RESEARCH_KEYWORDS + ["google", "search"])
+KNOWN_APPS = CODE_EDITORS | BROWSERS | COMM_APPS   # Kept as is; other app names are pseudonymized
+
+
+class _Sanitizer:
+    def __init__(self, salt: bytes):
+        self.salt = salt
+
+    def _digest(self, value: str) -> str:
+        return hmac.new(self.salt, value.encode(), hashlib.sha256).hexdigest()[:12]
+
+    def device(self, device_id: str) -> str:
+        return f"dev-{self._digest(device_id)}"
+
+    def app(self, app_name: str) -> str:
+        return app_name if app_name in KNOWN_APPS else f"app-{self._digest(app_name)}"
+
+    def text(self, value: str) -> str:
+        lower = value.lower()
+        kept = [kw for kw in _KEYWORDS if kw in lower] + [ext for ext in FILE_EXTENSIONS if ext in lower]
+        return " ".join([f"t-{self._digest(value)}", *kept])
+
+    def body(self, value, key: str = None):
+        if isinstance(value, dict):
+            return {k: self.body(v, k) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.body(v, key) for v in value]
+        if isinstance(value, str):
+            if key == "device_id":
+                return self.device(value)
+            if key == "app_name":
+                return self.app(value)
+            if key in TEXT_FIELDS:
+                return self.text(value)
+        return value
+
+
+def _decode_body(body: bytes, encoding: str, content_type: str):
+    if not body:
+        return None
+    if encoding != "identity":
+        # Capped like the endpoints themselves (HTTPException past MAX_REQUEST_BODY_BYTES)
+        body = decompress_body(body, encoding)
+    if content_type in MSGPACK_TYPES and msgpack is not None:
+        return msgpack.unpackb(body, timestamp=3)
+    return json.loads(body)
+
+
+class TrafficCapture:
+    """Background writer for captured requests."""
+
+    def __init__(self, path: str, salt: str = ""):
+        self.path = path
+        self.sanitizer = _Sanitizer(salt.encode() if salt else secrets.token_bytes(16))
+        self._queue: queue.Queue = queue.Queue(maxsize=settings.traffic_capture_queue_size)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)  # Blocks until the writer has room; it is draining
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def record(self, entry: dict):
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            TRAFFIC_CAPTURE_DROPPED.labels(reason="queue_full").inc()
+
+    def _sanitize(self, entry: dict) -> Optional[dict]:
+        """The entry as written, or None to leave it out."""
+        raw, encoding, content_type = entry.pop("raw"), entry.pop("encoding"), entry.pop("content_type")
+        params = entry.pop("path_params")
+        template = entry["route"]
+        if template and "device_id" in params:
+            params = {**params, "device_id": self.sanitizer.device(params["device_id"])}
+            entry["path"] = template.format(**params)
+        try:
+            entry["body"] = self.sanitizer.body(_decode_body(raw, encoding, content_type))
+        except Exception:
+            # Too large once decompressed, or malformed
+            TRAFFIC_CAPTURE_DROPPED.labels(reason="undecodable").inc()
+            return None
+        return entry
+
+    def _run(self):
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(self.path, "at", encoding="utf-8") as f:
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    break
+                try:
+                    entry = self._sanitize(entry)
+                    if entry is not None:
+                        f.write(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+                except Exception:
+                    logger.exception("Traffic capture write failed")
+                if self._queue.empty():
+                    f.flush()
+
+
+traffic_capture = TrafficCapture(settings.traffic_capture_path, settings.traffic_capture_salt)
+
+
+class TrafficCaptureMiddleware:
+    """Pure ASGI middleware feeding traffic_capture; a no-op when capture is off."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not settings.traffic_capture_path
+            or scope["type"] != "http"
+            or not scope["path"].startswith(CAPTURED_PREFIXES)
+        ):
+            return await self.app(scope, receive, send)
+
+        arrived = time.time()
+        started = time.perf_counter()
+        chunks = []
+        size = 0
+        entry = {}
+
+        async def capture_receive():
+            nonlocal size
+            message = await receive()
+            if message["type"] == "http.request" and size <= settings.max_request_body_bytes:
+                body = message.get("body", b"")
+                size += len(body)
+                chunks.append(body)
+            return message
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                entry["status"] = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                entry["ms"] = round((time.perf_counter() - started) * 1000, 3)
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            if size > settings.max_request_body_bytes:
+                TRAFFIC_CAPTURE_DROPPED.labels(reason="too_large").inc()
+            else:
+                self._record(scope, arrived, entry, b"".join(chunks))
+
+    @staticmethod
+    def _record(scope, arrived: float, entry: dict, raw: bytes):
+        headers = dict(scope["headers"])
+        route = scope.get("route")
+        traffic_capture.record({
+            "t": round(arrived, 6),
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope["query_string"].decode("latin-1"),
+            "route": route.path if route is not None else None,
+            "path_params": scope.get("path_params", {}),
+            "status": entry.get("status", 500),
+            "ms": entry.get("ms"),
+            "raw": raw,
+            "encoding": headers.get(b"content-encoding", b"identity").decode("latin-1").lower(),
+            "content_type": headers.get(b"content-type", b"").decode("latin-1").split(";")[0].strip().lower(),
+        })
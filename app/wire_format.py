@@ -0,0 +1,169 @@
+"""
+Content negotiation for the high-volume device endpoints.
+
+Request bodies may be gzip- or zstd-compressed (Content-Encoding) and/or
+MessagePack-encoded (Content-Type: application/msgpack). Responses are
+rendered with orjson, or MessagePack when the client sends
+Accept: application/msgpack. Every codec is optional; without it the
+endpoint behaves exactly like plain JSON.
+"""
+import json
+import zlib
+from contextvars import ContextVar
+from typing import Any, Callable
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:  # optional dependency: uv sync --extra wire
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+_DECOMPRESS_ERRORS = (zlib.error,) + ((zstandard.ZstdError,) if zstandard else ())
+
+_wants_msgpack: ContextVar[bool] = ContextVar("wants_msgpack", default=False)
+
+
+def _gunzip(body: bytes, limit: int) -> bytes:
+    """Every gzip member in turn (clients may concatenate them), at most limit + 1 bytes."""
+    data = bytearray()
+    while True:
+        decompressor = zlib.decompressobj(wbits=31)
+        data += decompressor.decompress(body, limit + 1 - len(data))
+        if len(data) > limit:
+            return bytes(data)
+        if not decompressor.eof:
+            raise zlib.error("Truncated gzip body")
+        body = decompressor.unused_data
+        if not body:
+            return bytes(data)
+
+
+def _check_zstd_frames(body: bytes):
+    """
+    Raise on a cut-off frame, which stream_reader reads up to quietly.
+    Only called once the body is known to fit: decompressobj has no output cap.
+    """
+    decompressor = zstandard.ZstdDecompressor()
+    while body:
+        frame = decompressor.decompressobj()
+        frame.decompress(body)
+        if not frame.eof:
+            raise zstandard.ZstdError("Truncated zstd body")
+        body = frame.unused_data
+
+
+def decompress_body(body: bytes, encoding: str) -> bytes:
+    """
+    Decompress a request body, refusing (413) to produce more than
+    MAX_REQUEST_BODY_BYTES. Multi-member gzip and multi-frame zstd bodies are
+    read to the end; a truncated one raises the codec's error (400 in decode_request).
+    """
+    limit = settings.max_request_body_bytes
+
+    if encoding == "gzip":
+        data = _gunzip(body, limit)
+    elif encoding == "zstd":
+        if zstandard is None:
+            raise HTTPException(status_code=415, detail="zstd request bodies are not supported")
+        with zstandard.ZstdDecompressor().stream_reader(body, read_across_frames=True) as reader:
+            data = reader.read(limit + 1)
+        if len(data) <= limit:
+            _check_zstd_frames(body)
+    else:
+        raise HTTPException(status_code=415, detail=f"Unsupported Content-Encoding: {encoding}")
+
+    if len(data) > limit:
+        raise HTTPException(status_code=413, detail="Decompressed request body too large")
+    return data
+
+
+async def decode_request(request: Request) -> Request:
+    """Return a request whose body is plain JSON as far as FastAPI can tell."""
+    encoding = request.headers.get("content-encoding", "identity").lower()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    is_msgpack = content_type in MSGPACK_TYPES
+
+    if encoding == "identity" and not is_msgpack:
+        return request
+
+    body = await request.body()
+    if encoding != "identity":
+        try:
+            body = decompress_body(body, encoding)
+        except _DECOMPRESS_ERRORS:
+            raise HTTPException(status_code=400, detail="Malformed compressed body")
+
+    decoded = None
+    if is_msgpack:
+        if msgpack is None:
+            raise HTTPException(status_code=415, detail="MessagePack request bodies are not supported")
+        try:
+            decoded = msgpack.unpackb(body, timestamp=3)
+        except (ValueError, msgpack.UnpackException):
+            raise HTTPException(status_code=400, detail="Malformed MessagePack body")
+
+    # FastAPI only parses bodies it believes are JSON, so present it as such
+    headers = [
+        (k, v) for k, v in request.scope["headers"]
+        if k not in (b"content-encoding", b"content-type", b"content-length")
+    ]
+    headers.append((b"content-type", b"application/json"))
+    decoded_request = Request({**request.scope, "headers": headers}, request.receive)
+    decoded_request._body = body
+    if is_msgpack:
+        decoded_request._json = decoded
+    return decoded_request
+
+
+class NegotiatedRoute(APIRoute):
+    """Route class that accepts compressed / MessagePack bodies and records the preferred response format."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            accept = request.headers.get("accept", "")
+            token = _wants_msgpack.set(msgpack is not None and any(t in accept for t in MSGPACK_TYPES))
+            try:
+                return await handler(await decode_request(request))
+            finally:
+                _wants_msgpack.reset(token)
+
+        return negotiated_handler
+
+
+def _default(value: Any):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class FastResponse(JSONResponse):
+    """orjson (or MessagePack, if negotiated) rendering for hot response paths."""
+
+    def render(self, content: Any) -> bytes:
+        if _wants_msgpack.get():
+            self.media_type = MSGPACK_TYPES[0]
+            return msgpack.packb(content, default=_default)
+        if orjson is not None:
+            return orjson.dumps(content, default=_default)
+        return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
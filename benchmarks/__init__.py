@@ -0,0 +1 @@
+# Micro-benchmarks and load tests (run with `uv run python -m benchmarks.<name>`)
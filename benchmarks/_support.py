@@ -0,0 +1,197 @@
+"""Shared setup for benchmark scripts."""
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+
+def use_benchmark_database():
+    """Point the app at a throwaway SQLite file unless DATABASE_URL is set."""
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(prefix="minimate-bench-"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    return os.environ["DATABASE_URL"]
+
+
+def timed(fn, repeat: int = 5) -> dict:
+    """Run fn `repeat` times and return min/median wall time in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"min_ms": round(min(samples), 3), "median_ms": round(statistics.median(samples), 3)}
+
+
+def seed_activities(db, device_ids: list[str], rows_per_device: int):
+    """Insert synthetic activity rows directly, bypassing the API."""
+    from app.models.activity import ActivityLog
+    from app.services.interning import app_names, window_titles
+
+    apps = ["Code", "Google Chrome", "Slack", "Terminal", "Figma"]
+    titles = [f"file_{i}.py" for i in range(50)]
+    app_ids = app_names.get_ids(db, apps)
+    title_ids = window_titles.get_ids(db, titles)
+    start = datetime(2024, 1, 1, 9, 0)
+
+    for device_id in device_ids:
+        db.bulk_insert_mappings(ActivityLog, [
+            {
+                "device_id": device_id,
+                "app_id": app_ids[apps[i % len(apps)]],
+                "window_title_id": title_ids[titles[i % len(titles)]],
+                "started_at": start + timedelta(seconds=30 * i),
+                "ended_at": start + timedelta(seconds=30 * i + 25),
+                "duration_seconds": 25.0,
+                "idle_seconds": 0.0,
+                "might_be_stuck": False,
+                "created_at": start,
+            }
+            for i in range(rows_per_device)
+        ])
+    db.commit()
+
+
+def seed_hints(db, device_ids: list[str], per_device: int):
+    """Insert pending, unexpired hints directly, bypassing the API."""
+    from app.models.hint import Hint, HintCategory, HintPriority, HintStatus
+
+    expires = datetime.utcnow() + timedelta(hours=1)
+    db.bulk_insert_mappings(Hint, [
+        {
+            "device_id": device_id,
+            "category": HintCategory.WORKFLOW_TIP,
+            "priority": HintPriority.MEDIUM,
+            "title": "Tip",
+            "message": "Pending hint",
+            "status": HintStatus.PENDING,
+            "expires_at": expires,
+        }
+        for device_id in device_ids
+        for _ in range(per_device)
+    ])
+    db.commit()
+
+
+def percentiles(samples_ms: list[float]) -> dict:
+    """p50/p90/p99/max of latency samples in milliseconds."""
+    if not samples_ms:
+        return {}
+    ordered = sorted(samples_ms)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {"p50_ms": pick(0.5), "p90_ms": pick(0.9), "p99_ms": pick(0.99), "max_ms": round(ordered[-1], 3)}
+
+
+def git_revision() -> dict:
+    """Commit and dirty flag of the working tree, for tagging result files."""
+    import subprocess
+
+    try:
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"sha": "unknown", "dirty": None}
+    return {"sha": sha, "dirty": dirty}
+
+
+def stub_llm(latency_ms: float = 0.0):
+    """Replace the Ollama call with a canned JSON reply after `latency_ms`."""
+    import asyncio
+    from app.services.ai_service import ai_service
+
+    async def fake_call(prompt: str):
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        return '{"title": "Use Cmd+D", "message": "Select the next occurrence for multi-cursor editing."}'
+
+    ai_service._call_ollama = fake_call
+    ai_service.use_ollama = True
+
+
+class BackgroundWork:
+    """App calls still running after their response (background tasks), and their failures."""
+
+    def __init__(self):
+        self.tasks = set()
+        self.errors = []
+
+    def add(self, task):
+        self.tasks.add(task)
+        task.add_done_callback(self._done)
+
+    def _done(self, task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.errors.append(repr(task.exception()))
+
+    async def drain(self):
+        import asyncio
+
+        while self.tasks:
+            await asyncio.wait(list(self.tasks))
+
+
+class AsgiResponse(NamedTuple):
+    status: int
+    body: bytes
+    latency_ms: float
+    headers: dict
+
+
+async def asgi_request(app, method: str, path: str, body: bytes = b"",
+                       headers: list[tuple[bytes, bytes]] = (),
+                       background: BackgroundWork = None) -> AsgiResponse:
+    """
+    Send one request straight into the ASGI app. Returns as soon as the
+    last body chunk is sent, like a real client
+    would see it; the rest of the app call (background tasks) keeps running
+    and is tracked in `background` so callers can drain it.
+    """
+    import asyncio
+
+    done = asyncio.Event()
+    response = {"status": 0, "body": [], "headers": {}}
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()  # Never disconnect while the app runs
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode("latin-1"): v.decode("latin-1") for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+            if not message.get("more_body"):
+                response["latency_ms"] = (time.perf_counter() - start) * 1000
+                done.set()
+
+    raw_path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": raw_path, "raw_path": raw_path.encode(),
+        "query_string": query.encode(), "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json"), *headers],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    start = time.perf_counter()
+    task = asyncio.ensure_future(app(scope, receive, send))
+    if background is not None:
+        background.add(task)
+    waiter = asyncio.ensure_future(done.wait())
+    await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+    if not done.is_set():
+        waiter.cancel()
+        task.result()  # Surface the app's exception
+        raise RuntimeError(f"{method} {path} returned without a response")
+    return AsgiResponse(response["status"], b"".join(response["body"]), response["latency_ms"], response["headers"])
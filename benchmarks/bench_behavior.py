@@ -0,0 +1,99 @@
+"""
+Scalar vs batch behavior classification.
+
+Checks that detect_behavior_batch() agrees with detect_behavior() on every
+generated summary before timing either of them.
+
+    uv run python -m benchmarks.bench_behavior --sizes 1000,10000,100000
+"""
+import argparse
+import json
+import random
+import time
+
+from app.services.behavior_classifier import detect_behavior, detect_behavior_batch
+
+APPS = ['Code', 'Cursor', 'Xcode', 'Google Chrome', 'Safari', 'Arc', 'Slack', 'Mail',
+        'Zoom', 'Finder', 'Figma', 'Notes', 'Spotify', 'Preview']
+WINDOWS = ['main.py', 'index.tsx — my-app', 'TypeError: undefined is not a function',
+           'How to use asyncio - Google Search', 'React Tutorial - Medium', 'Inbox (3)',
+           'general | Slack', 'Design System', 'README.md', 'Build Failed', 'Pull Request #42',
+           'YouTube', 'Stack Overflow - null pointer', 'lib.rs', 'styles.css', '']
+
+
+SUFFIXES = [' — my-project', ' - Google Chrome', ' — Visual Studio Code', ' (Workspace)', '']
+
+
+def make_summaries(count: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    # A fleet shares a few hundred common titles (inboxes, channels, docs)
+    titles = [f"{w}{suffix} {n}".strip() for w in WINDOWS for suffix in SUFFIXES for n in ('', '2', '3', '4')]
+    summaries = []
+    for _ in range(count):
+        app = rng.choice(APPS)
+        summaries.append({
+            'current_app': app,
+            'window_title': rng.choice(titles + [app]),
+            'recent_windows': rng.sample(titles, rng.randint(0, 8)),
+            'struggle_score': rng.choice([0, 0, 0, 1, 2, 3, 4, 6]),
+            'back_and_forth_count': rng.randint(0, 4),
+            'tab_switch_count': rng.randint(0, 20),
+            'app_switch_count': rng.randint(0, 20),
+            'session_duration_minutes': rng.uniform(0, 120),
+        })
+    return summaries
+
+
+def classify_scalar(summaries: list[dict]) -> list:
+    return [
+        detect_behavior(
+            current_app=s.get('current_app', ''),
+            window_title=s.get('window_title', '') or s.get('current_window_title', '') or '',
+            recent_windows=s.get('recent_windows', []) or [],
+            struggle_score=s.get('struggle_score', 0),
+            back_and_forth=s.get('back_and_forth_count', 0),
+            tab_switches=s.get('tab_switch_count', 0),
+            app_switches=s.get('app_switch_count', 0),
+            session_minutes=s.get('session_duration_minutes', 0),
+        )
+        for s in summaries
+    ]
+
+
+def _best_of(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        summaries = make_summaries(size)
+
+        expected = classify_scalar(summaries)
+        actual = detect_behavior_batch(summaries)
+        mismatches = sum(1 for a, b in zip(expected, actual) if a != b)
+        if mismatches:
+            raise SystemExit(f"batch/scalar mismatch on {mismatches} of {size} summaries")
+
+        scalar_s = _best_of(lambda: classify_scalar(summaries), args.repeat)
+        batch_s = _best_of(lambda: detect_behavior_batch(summaries), args.repeat)
+        results[size] = {
+            "scalar_per_sec": round(size / scalar_s),
+            "batch_per_sec": round(size / batch_s),
+            "speedup": round(scalar_s / batch_s, 2),
+        }
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Columnar export vs the JSON summary route.
+
+    uv run --extra export python -m benchmarks.bench_export --rows 50000
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from benchmarks._support import seed_activities, timed, use_benchmark_database
+
+use_benchmark_database()
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.columnar_export import export_dataset  # noqa: E402
+
+
+def _dir_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    seed_activities(db, ["bench-device"], args.rows)
+
+    client = TestClient(app)
+    json_bytes = 0
+
+    def fetch_json():
+        nonlocal json_bytes
+        json_bytes = 0
+        cursor = None
+        while True:
+            params = {"limit": 1000, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/activities/bench-device/summary", params=params)
+            json_bytes += len(response.content)
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                break
+
+    results = {"rows": args.rows, "json_route": timed(fetch_json, args.repeat)}
+    results["json_route"]["bytes"] = json_bytes
+
+    variants = [
+        ("parquet", "zstd", None),
+        ("parquet", "snappy", None),
+        ("parquet", None, None),
+        ("parquet", "zstd", ["started_at", "app_name", "duration_seconds"]),
+        ("arrow", "lz4", None),
+        ("arrow", None, None),
+    ]
+    for fmt, compression, columns in variants:
+        out_dir = tempfile.mkdtemp(prefix="minimate-export-")
+        run = lambda: export_dataset(  # noqa: E731
+            db, "activity_logs", fmt=fmt, compression=compression,
+            columns=columns, incremental=False, out_dir=out_dir,
+        )
+        label = f"{fmt}/{compression or 'none'}" + ("/projected" if columns else "")
+        results[label] = timed(run, args.repeat)
+        results[label]["bytes"] = _dir_size(out_dir)
+
+    db.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
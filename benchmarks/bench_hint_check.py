@@ -0,0 +1,110 @@
+"""
+Hint-check latency with inline auto-dismiss vs the expiry sweeper.
+
+Each iteration ages a handful of hints past their TTL (as happens between
+reports), then times HintGenerator._can_send_hint. The legacy variant also
+loads and dismisses the stale hints on the request path, as it used to.
+
+    uv run python -m benchmarks.bench_hint_check --stale 5,50 --devices 200
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+
+from benchmarks._support import timed, use_benchmark_database
+
+use_benchmark_database()
+
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.models.hint import Hint, HintCategory, HintPriority, HintStatus  # noqa: E402
+from app.services.hint_generator import HintGenerator  # noqa: E402
+from app.services.hint_sweeper import sweep_expired_hints  # noqa: E402
+from app.services.preferences_cache import preferences_cache  # noqa: E402
+
+
+def legacy_auto_dismiss(db, device_id: str):
+    """The per-check cleanup that used to run inside _can_send_hint."""
+    now = datetime.utcnow()
+    old_hints = db.query(Hint).filter(
+        Hint.device_id == device_id,
+        Hint.status.in_([HintStatus.PENDING, HintStatus.SHOWN]),
+        Hint.created_at < now - timedelta(seconds=30)
+    ).all()
+    for h in old_hints:
+        h.status = HintStatus.DISMISSED
+    if old_hints:
+        db.commit()
+
+
+def age_hints(db, device_ids: list[str], count: int):
+    past = datetime.utcnow() - timedelta(minutes=5)
+    db.bulk_insert_mappings(Hint, [
+        {
+            "device_id": device_id,
+            "category": HintCategory.WORKFLOW_TIP,
+            "priority": HintPriority.LOW,
+            "title": "Tip",
+            "message": "Stale hint",
+            "status": HintStatus.PENDING,
+            "created_at": past,
+            "expires_at": past,
+        }
+        for device_id in device_ids
+        for _ in range(count)
+    ])
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stale", default="5,50", help="Hints aged past TTL per device between checks")
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    device_ids = [f"bench-{i}" for i in range(args.devices)]
+    results = {}
+
+    db = SessionLocal()
+    generator = HintGenerator(db)
+    prefs = {d: preferences_cache.get(db, d) for d in device_ids}
+
+    for stale in (int(s) for s in args.stale.split(",")):
+        def legacy():
+            for device_id in device_ids:
+                legacy_auto_dismiss(db, device_id)
+                generator._can_send_hint(device_id, prefs[device_id])
+
+        def sweeper():
+            for device_id in device_ids:
+                generator._can_send_hint(device_id, prefs[device_id])
+
+        entry = {}
+        for label, fn in (("inline_dismiss", legacy), ("sweeper", sweeper)):
+            samples = []
+            for _ in range(args.repeat):
+                age_hints(db, device_ids, stale)
+                samples.append(timed(fn, 1)["median_ms"])
+                # Off the request path: clear what the checks left behind
+                sweep_expired_hints()
+            samples.sort()
+            entry[label] = {
+                "min_ms": samples[0],
+                "median_ms": samples[len(samples) // 2],
+                "us_per_check": round(samples[len(samples) // 2] * 1000 / len(device_ids), 1),
+            }
+
+        sweep_timing = []
+        for _ in range(args.repeat):
+            age_hints(db, device_ids, stale)
+            sweep_timing.append(timed(sweep_expired_hints, 1)["median_ms"])
+        entry["sweep_pass_ms"] = sorted(sweep_timing)[len(sweep_timing) // 2]
+        results[stale] = entry
+
+    db.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Cost of hot-path logging per activity report: the old print() calls vs the
+queued structured logger at different levels and sampling rates.
+
+Each "report" makes the log calls one /activities/report + hint check does.
+Output goes to a temp file for every variant, line-buffered by default like
+a terminal or PYTHONUNBUFFERED=1 (--block-buffered for a plain pipe). Reported
+us_per_report is caller-thread time; at 10k reports/s, budget_pct is the
+share of one core spent logging.
+
+    uv run python -m benchmarks.bench_logging --reports 10000
+"""
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+
+from app.config import settings
+from app.log import configure_logging, device_sampled, shutdown_logging
+
+logger = logging.getLogger("app.bench")
+
+TARGET_RATE = 10_000  # reports per second
+
+
+def legacy_report(i: int):
+    """The print() calls a report used to make."""
+    device_id, window = f"device-{i % 500}", "main.py - mini-mate-api - Visual Studio Code"
+    score = i % 6
+    print(f"📊 Code | score={score}  | {window[:50]}")
+    print(f"📊 Activity: score={score}, b&f=0, window='{window[:40]}'")
+    print(f"📥 Input: app=Code, window={window[:50]}, struggle={score}")
+    print(f"🎯 Detected: coding | Code | {window[:40]}")
+    if i % 20 == 0:
+        print(f"🎯 Generated hint: Use Cmd+D for {device_id}")
+
+
+def structured_report(i: int):
+    """The same events through the structured logger."""
+    device_id, window = f"device-{i % 500}", "main.py - mini-mate-api - Visual Studio Code"
+    score = i % 6
+    if logger.isEnabledFor(logging.INFO) and device_sampled(device_id):
+        logger.info("Activity report", extra={
+            "device_id": device_id, "app": "Code", "score": score, "app_switch": False, "window": window[:50],
+        })
+    logger.debug("Activity", extra={"device_id": device_id, "score": score, "back_and_forth": 0, "window": window[:40]})
+    logger.debug("Input: app=%s window=%.50s struggle=%s", "Code", window, score)
+    logger.debug("Detected %s in %s: %.40s", "coding", "Code", window)
+    if i % 20 == 0:
+        logger.info("Generated hint %r", "Use Cmd+D", extra={"device_id": device_id})
+
+
+def run(fn, reports: int) -> dict:
+    start = time.perf_counter()
+    for i in range(reports):
+        fn(i)
+    caller = time.perf_counter() - start
+    shutdown_logging()  # Drains the queue
+    total = time.perf_counter() - start
+    us = caller * 1e6 / reports
+    return {
+        "us_per_report": round(us, 2),
+        "budget_pct": round(us * TARGET_RATE / 1e4, 1),
+        "drain_ms": round((total - caller) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=10_000)
+    parser.add_argument("--block-buffered", action="store_true")
+    args = parser.parse_args()
+
+    variants = {
+        "print": (legacy_report, None),
+        "structured_info": (structured_report, ("INFO", 1.0)),
+        "structured_info_sampled_10pct": (structured_report, ("INFO", 0.1)),
+        "structured_debug": (structured_report, ("DEBUG", 1.0)),
+        "structured_warning": (structured_report, ("WARNING", 1.0)),
+    }
+
+    results = {}
+    real_stdout, real_stderr = sys.stdout, sys.stderr
+    for name, (fn, config) in variants.items():
+        with tempfile.TemporaryFile("w", buffering=-1 if args.block_buffered else 1) as sink:
+            sys.stdout = sys.stderr = sink
+            try:
+                if config:
+                    settings.log_level, settings.log_device_sample_rate = config
+                    configure_logging()
+                results[name] = run(fn, args.reports)
+            finally:
+                sys.stdout, sys.stderr = real_stdout, real_stderr
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Validated (response_model, from_attributes) vs direct row-to-dict encoding.
+
+Asserts both paths produce the same JSON, then reports per-row cost of
+loading + encoding activity logs and pending hints.
+
+    uv run --extra wire python -m benchmarks.bench_serialization --sizes 100,1000
+"""
+import argparse
+import json
+
+from benchmarks._support import seed_activities, timed, use_benchmark_database
+
+use_benchmark_database()
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.models.activity import ActivityLog  # noqa: E402
+from app.models.hint import Hint, HintCategory, HintPriority, HintStatus  # noqa: E402
+from app.schemas.activity import ActivityLogResponse  # noqa: E402
+from app.schemas.hint import PendingHintsResponse  # noqa: E402
+from app.services.row_serializers import activity_log_rows, hint_rows  # noqa: E402
+from app.wire_format import FastResponse  # noqa: E402
+
+ACTIVITY_ADAPTER = TypeAdapter(list[ActivityLogResponse])
+
+
+def seed_hints(db, device_id: str, count: int):
+    db.add_all([
+        Hint(
+            device_id=device_id,
+            category=HintCategory.WORKFLOW_TIP,
+            priority=[HintPriority.LOW, HintPriority.MEDIUM, HintPriority.HIGH][i % 3],
+            title=f"Tip {i}",
+            message="Use multi-cursor editing to rename variables faster.",
+            status=HintStatus.PENDING,
+        )
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,1000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    results = {}
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        device_id = f"bench-{size}"
+        db = SessionLocal()
+        seed_activities(db, [device_id], size)
+        seed_hints(db, device_id, size)
+        ids = [i for (i,) in db.query(ActivityLog.id).filter(ActivityLog.device_id == device_id)]
+        criteria = (Hint.device_id == device_id, Hint.status == HintStatus.PENDING)
+        ordering = (Hint.id,)
+
+        def validated_activities():
+            db.expire_all()
+            logs = db.query(ActivityLog).filter(ActivityLog.id.in_(ids)).order_by(ActivityLog.id).all()
+            return ACTIVITY_ADAPTER.dump_json(ACTIVITY_ADAPTER.validate_python(logs, from_attributes=True))
+
+        def direct_activities():
+            return FastResponse(activity_log_rows(db, ids)).body
+
+        def validated_hints():
+            db.expire_all()
+            hints = db.query(Hint).filter(*criteria).order_by(*ordering).all()
+            return PendingHintsResponse(hints=hints, count=len(hints)).model_dump_json().encode()
+
+        def direct_hints():
+            rows = hint_rows(db, *criteria, order_by=ordering)
+            return FastResponse({"hints": rows, "count": len(rows)}).body
+
+        for name, (slow, fast) in {
+            "activity_logs": (validated_activities, direct_activities),
+            "pending_hints": (validated_hints, direct_hints),
+        }.items():
+            if json.loads(slow()) != json.loads(fast()):
+                raise SystemExit(f"{name}: direct encoding differs from the validated response")
+
+            entry = {}
+            for label, fn in (("validated", slow), ("direct", fast)):
+                timing = timed(fn, args.repeat)
+                timing["us_per_row"] = round(timing["median_ms"] * 1000 / size, 2)
+                entry[label] = timing
+            results.setdefault(size, {})[name] = entry
+
+        db.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Parse and serialize cost of the activity wire formats per batch size.
+
+Request side: bytes on the wire and decode + validate time of an
+ActivityBatchReport. Response side: rendering list[ActivityLogResponse]
+with stdlib json, orjson and MessagePack. Codecs that aren't installed
+are skipped.
+
+    uv run --extra wire python -m benchmarks.bench_wire_format
+"""
+import argparse
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+from benchmarks._support import timed
+from app.schemas.activity import ActivityBatchReport
+from app.wire_format import msgpack, orjson, zstandard
+
+
+def make_report(size: int) -> dict:
+    start = datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc)
+    recent = [f"component_{i}.tsx — my-app" for i in range(5)]
+    return {
+        "device_id": "bench-device",
+        "activities": [
+            {
+                "app_name": "Code",
+                "window_title": f"component_{i % 5}.tsx — my-app",
+                "started_at": (start + timedelta(seconds=30 * i)).isoformat(),
+                "duration_seconds": 25.0,
+                "idle_seconds": 0.0,
+                "struggle_score": i % 6,
+                "tab_switch_count": i % 4,
+                "app_switch_count": i % 12,
+                "context": "Code | component_1.tsx — my-app | TypeError: cannot read properties of undefined",
+                "recent_windows": recent,
+            }
+            for i in range(size)
+        ],
+    }
+
+
+def make_rows(size: int) -> list[dict]:
+    start = datetime(2024, 1, 1, 9, 0)
+    return [
+        {
+            "id": i,
+            "device_id": "bench-device",
+            "app_name": "Code",
+            "window_title": f"component_{i % 5}.tsx — my-app",
+            "started_at": (start + timedelta(seconds=30 * i)).isoformat(),
+            "ended_at": None,
+            "duration_seconds": 25.0,
+            "idle_seconds": 0.0,
+            "might_be_stuck": False,
+            "created_at": start.isoformat(),
+        }
+        for i in range(size)
+    ]
+
+
+def request_formats(report: dict) -> dict:
+    """name -> (encoded bytes, decode function returning a validated model)"""
+    raw_json = json.dumps(report).encode()
+    formats = {
+        "json": (raw_json, lambda b: ActivityBatchReport.model_validate(json.loads(b))),
+        "json/pydantic": (raw_json, ActivityBatchReport.model_validate_json),
+        "json+gzip": (
+            gzip.compress(raw_json),
+            lambda b: ActivityBatchReport.model_validate_json(gzip.decompress(b)),
+        ),
+    }
+    if orjson is not None:
+        formats["orjson"] = (raw_json, lambda b: ActivityBatchReport.model_validate(orjson.loads(b)))
+    if zstandard is not None:
+        formats["json+zstd"] = (
+            zstandard.ZstdCompressor().compress(raw_json),
+            lambda b: ActivityBatchReport.model_validate_json(zstandard.ZstdDecompressor().decompress(b)),
+        )
+    if msgpack is not None:
+        packed = msgpack.packb(report)
+        formats["msgpack"] = (packed, lambda b: ActivityBatchReport.model_validate(msgpack.unpackb(b)))
+        if zstandard is not None:
+            formats["msgpack+zstd"] = (
+                zstandard.ZstdCompressor().compress(packed),
+                lambda b: ActivityBatchReport.model_validate(
+                    msgpack.unpackb(zstandard.ZstdDecompressor().decompress(b))
+                ),
+            )
+    return formats
+
+
+def response_formats() -> dict:
+    formats = {"json": lambda rows: json.dumps(rows).encode()}
+    if orjson is not None:
+        formats["orjson"] = orjson.dumps
+    if msgpack is not None:
+        formats["msgpack"] = msgpack.packb
+    return formats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1,10,100,1000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        entry = {"request": {}, "response": {}}
+
+        for name, (payload, decode) in request_formats(make_report(size)).items():
+            entry["request"][name] = {"bytes": len(payload), **timed(lambda: decode(payload), args.repeat)}
+
+        rows = make_rows(size)
+        for name, encode in response_formats().items():
+            entry["response"][name] = {"bytes": len(encode(rows)), **timed(lambda: encode(rows), args.repeat)}
+
+        results[size] = entry
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
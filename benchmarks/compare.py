@@ -0,0 +1,59 @@
+"""
+Compare two load-test result files (e.g. main vs a branch).
+
+    uv run python -m benchmarks.compare benchmark-results/base.json benchmark-results/head.json
+
+Prints per-operation latency percentiles side by side with the relative
+change; exits 1 if any p99 regressed by more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+
+METRICS = ("p50_ms", "p90_ms", "p99_ms")
+
+
+def _change(before, after) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed p99 regression, percent")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    print(f"base {base['git']['sha'][:10]} ({base['database']})  head {head['git']['sha'][:10]} ({head['database']})")
+    if base["config"] != head["config"]:
+        print(f"warning: configs differ: {base['config']} vs {head['config']}")
+
+    b, h = base["results"], head["results"]
+    print(f"{'throughput_rps':<22}{b['throughput_rps']:>10}{h['throughput_rps']:>10}  "
+          f"{_change(b['throughput_rps'], h['throughput_rps'])}")
+
+    regressed = []
+    for op, before in b["operations"].items():
+        after = h["operations"].get(op)
+        if not after or not before.get("count") or not after.get("count"):
+            continue
+        for metric in METRICS:
+            print(f"{op + ' ' + metric:<22}{before[metric]:>10}{after[metric]:>10}  "
+                  f"{_change(before[metric], after[metric])}")
+        if before["p99_ms"] and (after["p99_ms"] - before["p99_ms"]) / before["p99_ms"] * 100 > args.threshold:
+            regressed.append(op)
+
+    if regressed:
+        print(f"p99 regressed more than {args.threshold}%: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
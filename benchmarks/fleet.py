@@ -0,0 +1,135 @@
+"""
+Synthetic device fleet producing realistic activity streams.
+
+Each device has a persona (which apps it lives in, how often it switches,
+how much it struggles) and a simulated clock. next_report() advances the
+device by one reporting interval and returns an ActivityBatchReport-shaped
+dict: mostly one activity, sometimes a burst of switches. Everything is
+driven by a seeded RNG, so the same seed gives the same traffic.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+PERSONAS = {
+    "developer": {
+        "apps": {"Code": 0.45, "Terminal": 0.15, "Google Chrome": 0.25, "Slack": 0.1, "Figma": 0.05},
+        "switch_rate": 0.25,
+        "struggle_rate": 0.15,
+    },
+    "researcher": {
+        "apps": {"Google Chrome": 0.55, "Notion": 0.2, "Preview": 0.15, "Slack": 0.1},
+        "switch_rate": 0.35,
+        "struggle_rate": 0.05,
+    },
+    "communicator": {
+        "apps": {"Slack": 0.35, "Microsoft Teams": 0.2, "Mail": 0.2, "Google Chrome": 0.2, "Zoom": 0.05},
+        "switch_rate": 0.5,
+        "struggle_rate": 0.02,
+    },
+}
+
+TITLES = {
+    "Code": ["api.py — mini-mate-api", "hints.py — mini-mate-api", "App.tsx — web", "README.md — docs"],
+    "Terminal": ["zsh — pytest", "zsh — git status", "zsh — npm run dev"],
+    "Google Chrome": [
+        "TypeError: cannot read properties of undefined - Google Search",
+        "FastAPI docs - Dependencies",
+        "github.com/pulls",
+        "Stack Overflow - sqlalchemy session rollback",
+    ],
+    "Slack": ["#team - Slack", "DM: Alex - Slack"],
+    "Microsoft Teams": ["Standup | Microsoft Teams"],
+    "Mail": ["Inbox (12) - Mail"],
+    "Notion": ["Roadmap Q3 - Notion", "Research notes - Notion"],
+    "Preview": ["paper.pdf"],
+    "Figma": ["Onboarding flow - Figma"],
+    "Zoom": ["Zoom Meeting"],
+}
+
+
+@dataclass
+class Device:
+    device_id: str
+    persona: str
+    rng: random.Random
+    clock: datetime
+    app: str = ""
+    window: str = ""
+    recent_windows: list = field(default_factory=list)
+    same_app_minutes: float = 0.0
+
+    def _pick_app(self) -> str:
+        apps = PERSONAS[self.persona]["apps"]
+        return self.rng.choices(list(apps), weights=list(apps.values()))[0]
+
+    def _activity(self, seconds: float) -> dict:
+        persona = PERSONAS[self.persona]
+        struggling = self.rng.random() < persona["struggle_rate"]
+        started = self.clock
+        self.clock += timedelta(seconds=seconds)
+        return {
+            "app_name": self.app,
+            "window_title": self.window,
+            "started_at": started.isoformat(),
+            "ended_at": self.clock.isoformat(),
+            "duration_seconds": seconds,
+            "idle_seconds": 0.0 if self.rng.random() < 0.9 else self.rng.uniform(30, 300),
+            "might_be_stuck": struggling,
+            "struggle_score": self.rng.randint(4, 8) if struggling else self.rng.randint(0, 2),
+            "tab_switch_count": self.rng.randint(0, 6),
+            "back_and_forth_count": self.rng.randint(3, 6) if struggling else self.rng.randint(0, 1),
+            "app_switch_count": self.rng.randint(0, 12),
+            "context": f"{self.app} | {self.window}",
+            "recent_windows": self.recent_windows[-5:],
+        }
+
+    def _switch_app(self):
+        self.app = self._pick_app()
+        self.window = self.rng.choice(TITLES.get(self.app, [self.app]))
+        self.recent_windows = (self.recent_windows + [self.window])[-10:]
+        self.same_app_minutes = 0.0
+
+    def next_report(self, interval_seconds: float = 30.0) -> dict:
+        """Advance one reporting interval; switch apps with the persona's rate."""
+        if not self.app:
+            self._switch_app()
+        switches = 1 if self.rng.random() < PERSONAS[self.persona]["switch_rate"] else 0
+        if self.rng.random() < 0.05:
+            switches = self.rng.randint(2, 5)  # Occasional burst of switching
+
+        activities = [self._activity(interval_seconds / (switches + 1))]
+        for _ in range(switches):
+            self._switch_app()
+            activities.append(self._activity(interval_seconds / (switches + 1)))
+
+        self.same_app_minutes += interval_seconds / (switches + 1) / 60
+        # Reports put the current activity first
+        activities.reverse()
+        return {"device_id": self.device_id, "activities": activities}
+
+    def time_trigger(self) -> dict:
+        return {
+            "device_id": self.device_id,
+            "trigger_type": "same_app_duration",
+            "app_name": self.app,
+            "window_title": self.window,
+            "duration_minutes": max(self.same_app_minutes, 10.0),
+            "recent_windows": self.recent_windows[-5:],
+        }
+
+
+def make_fleet(size: int, seed: int = 42, start: datetime = None) -> list[Device]:
+    """Devices for a run. Same seed, same traffic; only timestamps follow `start` (default: now)."""
+    rng = random.Random(seed)
+    start = start or datetime.now(timezone.utc)
+    personas = list(PERSONAS)
+    return [
+        Device(
+            device_id=f"fleet-{seed}-{i:05d}",
+            persona=personas[i % len(personas)],
+            rng=random.Random(rng.random()),
+            clock=start + timedelta(seconds=rng.uniform(0, 30)),
+        )
+        for i in range(size)
+    ]
@@ -0,0 +1,181 @@
+"""
+Replay captured traffic (TRAFFIC_CAPTURE_PATH) against this build.
+
+Requests are re-sent in-process with their original spacing scaled by
+--speed ("1" = real time, "4" = 4x faster, "max" = back to back with
+--concurrency in flight). The LLM is stubbed and activity/event
+timestamps are shifted to the present, so server-side time windows see
+the traffic as live. Per route it reports latency percentiles next to the
+captured production latency, plus SQL statements and DB time per request
+from the SQL profiler. Results are saved as JSON tagged with the git commit;
+benchmarks.compare diffs two runs.
+
+    uv run python -m benchmarks.replay capture.jsonl.gz --speed 4
+    uv run python -m benchmarks.replay capture.jsonl --speed max --out results/head.json
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks._support import (
+    BackgroundWork,
+    asgi_request,
+    git_revision,
+    percentiles,
+    stub_llm,
+    use_benchmark_database,
+)
+
+use_benchmark_database()
+
+from app.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+
+TIMESTAMP_FIELDS = ("started_at", "ended_at", "due_at")
+
+
+def load_capture(path: str) -> list[dict]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    return sorted(entries, key=lambda e: e["t"])
+
+
+def shift_timestamps(value, offset_s: float):
+    """Move ISO timestamps in a captured body forward by offset_s."""
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            if k in TIMESTAMP_FIELDS and isinstance(v, str):
+                try:
+                    v = (datetime.fromisoformat(v) + timedelta(seconds=offset_s)).isoformat()
+                except ValueError:
+                    pass
+                out[k] = v
+            else:
+                out[k] = shift_timestamps(v, offset_s)
+        return out
+    if isinstance(value, list):
+        return [shift_timestamps(v, offset_s) for v in value]
+    return value
+
+
+async def replay(entries: list[dict], speed: str, concurrency: int) -> dict:
+    offset = time.time() - entries[0]["t"]
+    stats = {}
+    background = BackgroundWork()
+    in_flight: set = set()
+
+    async def one(entry):
+        op = f"{entry['method']} {entry['route'] or entry['path']}"
+        stat = stats.setdefault(op, {"latency": [], "captured": [], "queries": [], "db_ms": [], "errors": 0})
+        body = b""
+        if entry.get("body") is not None:
+            body = json.dumps(shift_timestamps(entry["body"], offset)).encode()
+        path = entry["path"] + (f"?{entry['query']}" if entry.get("query") else "")
+        try:
+            response = await asgi_request(app, entry["method"], path, body, background=background)
+        except Exception:
+            stat["errors"] += 1
+            return
+        if response.status >= 400 and entry["status"] < 400:
+            stat["errors"] += 1
+        stat["latency"].append(response.latency_ms)
+        if entry.get("ms") is not None:
+            stat["captured"].append(entry["ms"])
+        if "x-sql-queries" in response.headers:
+            stat["queries"].append(int(response.headers["x-sql-queries"]))
+            stat["db_ms"].append(float(response.headers["x-sql-time-ms"]))
+
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+        for entry in entries:
+            if speed != "max":
+                due = started + (entry["t"] - entries[0]["t"]) / float(speed)
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            # Cap whole app calls, background work included: a sync pool checkout
+            # beyond the pool size would stall the event loop
+            while len(in_flight) + len(background.tasks) >= concurrency:
+                await asyncio.wait(in_flight | background.tasks, return_when=asyncio.FIRST_COMPLETED)
+            task = asyncio.ensure_future(one(entry))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        while in_flight:
+            await asyncio.wait(list(in_flight))
+        elapsed = time.perf_counter() - started
+        await background.drain()
+
+    operations = {}
+    for op, stat in sorted(stats.items()):
+        operations[op] = {
+            "count": len(stat["latency"]),
+            "errors": stat["errors"],
+            **percentiles(stat["latency"]),
+            "captured_p50_ms": percentiles(stat["captured"]).get("p50_ms"),
+            "captured_p99_ms": percentiles(stat["captured"]).get("p99_ms"),
+            "queries_mean": round(statistics.mean(stat["queries"]), 2) if stat["queries"] else None,
+            "queries_max": max(stat["queries"], default=None),
+            "db_ms_p50": percentiles(stat["db_ms"]).get("p50_ms"),
+        }
+    return {
+        "requests": len(entries),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(entries) / elapsed, 1),
+        "background_errors": len(background.errors),
+        "operations": operations,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("capture", help="File written with TRAFFIC_CAPTURE_PATH (.jsonl or .jsonl.gz)")
+    parser.add_argument("--speed", default="1", help='Time scale: "1", "4", ... or "max"')
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="In-flight cap (all speeds); keep it below the DB pool size")
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--out", help="Result file (default: benchmark-results/replay-<sha>-<time>.json)")
+    args = parser.parse_args()
+    if args.speed != "max" and float(args.speed) <= 0:
+        parser.error("--speed must be positive or 'max'")
+
+    entries = load_capture(args.capture)
+    if not entries:
+        raise SystemExit(f"{args.capture}: no captured requests")
+
+    # Per-request statement counts come back as X-SQL-* headers
+    settings.sql_profiling = True
+    settings.debug = True
+    settings.traffic_capture_path = ""
+    stub_llm(args.llm_latency_ms)
+    results = asyncio.run(replay(entries, args.speed, args.concurrency))
+
+    revision = git_revision()
+    report = {
+        "benchmark": "replay",
+        "git": revision,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "database": settings.database_url.split(":", 1)[0],
+        "config": {"capture": os.path.basename(args.capture), "speed": args.speed,
+                   "concurrency": args.concurrency, "llm_latency_ms": args.llm_latency_ms},
+        "results": results,
+    }
+    out = args.out or os.path.join(
+        "benchmark-results",
+        f"replay-{revision['sha'][:10]}-{datetime.now().strftime('%Y%m%dT%H%M%S')}.json",
+    )
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"Saved {out}")
+
+
+if __name__ == "__main__":
+    main()
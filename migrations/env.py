@@ -0,0 +1,46 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.db import Base, engine
+# Every model, so autogenerate sees the whole schema
+from app.models import (  # noqa: F401
+    activity, app_name, device_timer_state, export_watermark, hint, hint_job, hint_worker,
+    ingest_receipt, item, scheduled_event, user_preferences, window_title,
+)
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=engine.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # The app's engine, so SQLite gets the same pragmas and locking as at runtime
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite can't ALTER most things; batch mode copies the table instead
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,87 @@
+"""Intern activity app names and window titles
+
+activity_logs.app_name / window_title become app_id / window_title_id,
+foreign keys to the new apps / window_titles lookup tables. Existing
+names are copied into the lookup tables and every row is pointed at its
+id before the text columns are dropped.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+LOOKUPS = {"apps": "app_name", "window_titles": "window_title"}
+
+
+def _lookup_table(name: str):
+    op.create_table(
+        name,
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False, unique=True),
+    )
+    op.create_index(f"ix_{name}_id", name, ["id"])
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for name in LOOKUPS:
+        if name not in tables:
+            _lookup_table(name)
+
+    # Databases created after the change (create_all) already have the new columns
+    if "activity_logs" not in tables:
+        return
+    columns = {column["name"] for column in inspector.get_columns("activity_logs")}
+    if "app_name" not in columns:
+        return
+
+    for name, column in LOOKUPS.items():
+        op.execute(
+            f"INSERT INTO {name} (name) "
+            f"SELECT DISTINCT {column} FROM activity_logs "
+            f"WHERE {column} IS NOT NULL AND {column} NOT IN (SELECT name FROM {name})"
+        )
+
+    with op.batch_alter_table("activity_logs") as batch:
+        batch.add_column(sa.Column("app_id", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("window_title_id", sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE activity_logs SET "
+        "app_id = (SELECT id FROM apps WHERE apps.name = activity_logs.app_name), "
+        "window_title_id = (SELECT id FROM window_titles WHERE window_titles.name = activity_logs.window_title)"
+    )
+    with op.batch_alter_table("activity_logs") as batch:
+        batch.alter_column("app_id", existing_type=sa.Integer(), nullable=False)
+        batch.create_foreign_key("activity_logs_app_id_fkey", "apps", ["app_id"], ["id"])
+        batch.create_foreign_key(
+            "activity_logs_window_title_id_fkey", "window_titles", ["window_title_id"], ["id"],
+        )
+        batch.create_index("ix_activity_logs_app_id", ["app_id"])
+        batch.drop_column("app_name")
+        batch.drop_column("window_title")
+
+
+def downgrade():
+    with op.batch_alter_table("activity_logs") as batch:
+        batch.add_column(sa.Column("app_name", sa.String(), nullable=True))
+        batch.add_column(sa.Column("window_title", sa.String(), nullable=True))
+    op.execute(
+        "UPDATE activity_logs SET "
+        "app_name = (SELECT name FROM apps WHERE apps.id = activity_logs.app_id), "
+        "window_title = (SELECT name FROM window_titles WHERE window_titles.id = activity_logs.window_title_id)"
+    )
+    with op.batch_alter_table("activity_logs") as batch:
+        batch.alter_column("app_name", existing_type=sa.String(), nullable=False)
+        batch.drop_index("ix_activity_logs_app_id")
+        batch.drop_column("app_id")
+        batch.drop_column("window_title_id")
+    for name in LOOKUPS:
+        op.drop_table(name)
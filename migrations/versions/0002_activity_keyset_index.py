@@ -0,0 +1,25 @@
+"""Index activity_logs on (device_id, started_at, id) for keyset paging
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_activity_logs_device_started_id"
+
+
+def upgrade():
+    indexes = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("activity_logs")}
+    if INDEX not in indexes:
+        op.create_index(INDEX, "activity_logs", ["device_id", "started_at", "id"])
+
+
+def downgrade():
+    op.drop_index(INDEX, table_name="activity_logs")
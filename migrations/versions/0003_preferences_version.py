@@ -0,0 +1,27 @@
+"""Version user_preferences rows (optimistic locking, cache invalidation)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("user_preferences")}
+    if "version" not in columns:
+        op.add_column(
+            "user_preferences",
+            sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("user_preferences") as batch:
+        batch.drop_column("version")
@@ -0,0 +1,41 @@
+"""Expire pending / shown hints at hints.expires_at
+
+Hints still pending or shown when this runs predate the sweeper; they get
+an expiry of now, so the first sweep dismisses them rather than leaving
+them pending forever.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+hints = sa.table("hints", sa.column("status", sa.String()), sa.column("expires_at", sa.DateTime()))
+
+
+def upgrade():
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("hints")}
+    if "expires_at" in columns:
+        return
+    op.add_column("hints", sa.Column("expires_at", sa.DateTime(), nullable=True))
+    op.create_index("ix_hints_expires_at", "hints", ["expires_at"])
+    # Enum columns store member names
+    op.execute(
+        hints.update()
+        .where(hints.c.status.in_(["PENDING", "SHOWN"]))
+        .values(expires_at=datetime.utcnow())
+    )
+
+
+def downgrade():
+    op.drop_index("ix_hints_expires_at", table_name="hints")
+    with op.batch_alter_table("hints") as batch:
+        batch.drop_column("expires_at")
@@ -0,0 +1,44 @@
+"""Columnar export high-water mark on (created_at, id)
+
+export_watermarks gets last_created_at, filled in from the row each
+stored last_id points at so incremental runs carry on where they were,
+and activity_logs.created_at is indexed for the range scan.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_activity_logs_created_at"
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if INDEX not in {index["name"] for index in inspector.get_indexes("activity_logs")}:
+        op.create_index(INDEX, "activity_logs", ["created_at"])
+
+    if "export_watermarks" not in inspector.get_table_names():
+        return  # Created with the column by the app's create_all
+    columns = {column["name"] for column in inspector.get_columns("export_watermarks")}
+    if "last_created_at" in columns:
+        return
+    op.add_column("export_watermarks", sa.Column("last_created_at", sa.DateTime(), nullable=True))
+    for table in ("activity_logs", "hints"):
+        op.execute(
+            f"UPDATE export_watermarks SET last_created_at = "
+            f"(SELECT created_at FROM {table} WHERE {table}.id = export_watermarks.last_id) "
+            f"WHERE dataset = '{table}'"
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("export_watermarks") as batch:
+        batch.drop_column("last_created_at")
+    op.drop_index(INDEX, table_name="activity_logs")
@@ -0,0 +1,34 @@
+"""Server-side time trigger state in device_timer_states
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "device_timer_states" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "device_timer_states",
+        sa.Column("device_id", sa.String(), primary_key=True),
+        sa.Column("current_app", sa.String(), nullable=True),
+        sa.Column("window_title", sa.String(), nullable=True),
+        sa.Column("app_since", sa.DateTime(), nullable=True),
+        sa.Column("session_start", sa.DateTime(), nullable=True),
+        sa.Column("last_seen", sa.DateTime(), nullable=True),
+        sa.Column("same_app_hints_sent", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("breaks_sent", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("device_timer_states")
@@ -0,0 +1,47 @@
+"""Columnar export high-water mark back on id alone
+
+Runs now stop at the commit horizon (max id read under the write lock),
+so the mark is just the highest exported id. A row the old (created_at,
+id) keyset hadn't reached yet but whose id is below last_id pulls the
+mark back under it, so it is exported rather than skipped.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "export_watermarks" not in inspector.get_table_names():
+        return
+    if "last_created_at" not in {column["name"] for column in inspector.get_columns("export_watermarks")}:
+        return
+    for table in ("activity_logs", "hints"):
+        pending = (
+            f"SELECT MIN(id) - 1 FROM {table} WHERE {table}.id < export_watermarks.last_id "
+            f"AND {table}.created_at > export_watermarks.last_created_at"
+        )
+        op.execute(
+            f"UPDATE export_watermarks SET last_id = ({pending}) "
+            f"WHERE dataset = '{table}' AND ({pending}) IS NOT NULL"
+        )
+    with op.batch_alter_table("export_watermarks") as batch:
+        batch.drop_column("last_created_at")
+
+
+def downgrade():
+    op.add_column("export_watermarks", sa.Column("last_created_at", sa.DateTime(), nullable=True))
+    for table in ("activity_logs", "hints"):
+        op.execute(
+            f"UPDATE export_watermarks SET last_created_at = "
+            f"(SELECT created_at FROM {table} WHERE {table}.id = export_watermarks.last_id) "
+            f"WHERE dataset = '{table}'"
+        )
@@ -0,0 +1,33 @@
+"""Lease on idempotency claims: ingest_receipts.claimed_at
+
+A time trigger commits its claim before the LLM call; if the request
+dies there the receipt has no result, and claimed_at lets a retry take
+it over once the lease runs out. Existing rows count as claimed when
+they were created.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "ingest_receipts" not in inspector.get_table_names():
+        return  # Created with the column by the app's create_all
+    if "claimed_at" in {column["name"] for column in inspector.get_columns("ingest_receipts")}:
+        return
+    op.add_column("ingest_receipts", sa.Column("claimed_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE ingest_receipts SET claimed_at = created_at")
+
+
+def downgrade():
+    with op.batch_alter_table("ingest_receipts") as batch:
+        batch.drop_column("claimed_at")
@@ -0,0 +1,38 @@
+import os
+from uuid import uuid4
+
+# Settings are read at import time: point the app at a throwaway SQLite file
+# and keep background work out of the way before anything imports it
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["HINT_JOB_CONSUMERS"] = "0"
+os.environ["EVENT_SCHEDULER_ENABLED"] = "false"
+os.environ["ADMISSION_ENABLED"] = "false"
+os.environ["DEBUG"] = "true"             # X-SQL-Queries headers for query budgets
+os.environ["SQL_PROFILING"] = "true"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.db import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def device_id():
+    """A device no other test has touched."""
+    return f"test-{uuid4().hex[:8]}"
@@ -0,0 +1,95 @@
+"""detect_behavior_batch() must classify exactly like detect_behavior()."""
+import random
+from datetime import datetime
+
+import pytest
+
+from app.models.hint_job import HintJob
+from app.services.behavior_classifier import (
+    BROWSERS, CODE_EDITORS, COMM_APPS, ERROR_KEYWORDS, FILE_EXTENSIONS, RESEARCH_KEYWORDS,
+    detect_behavior, detect_behavior_batch,
+)
+
+APPS = sorted(CODE_EDITORS | BROWSERS | COMM_APPS) + ['Finder', 'Figma', 'Terminal']
+WORDS = ['main', 'Inbox', 'general', 'Design', 'Google', 'SEARCH', 'Not', 'working', 'Straße', 'ΣΟΦΙΑΣ', ' - ', '—']
+
+
+def _title(rng: random.Random) -> str:
+    parts = rng.sample(WORDS, rng.randint(0, 3))
+    if rng.random() < 0.3:
+        parts.append(rng.choice(ERROR_KEYWORDS + RESEARCH_KEYWORDS).upper())
+    if rng.random() < 0.3:
+        parts.append(rng.choice(FILE_EXTENSIONS))
+    return ' '.join(parts)
+
+
+def _summary(rng: random.Random) -> dict:
+    summary = {
+        'current_app': rng.choice(APPS),
+        'recent_windows': [_title(rng) for _ in range(rng.randint(0, 5))],
+        'struggle_score': rng.randint(0, 6),
+        'back_and_forth_count': rng.randint(0, 4),
+        'tab_switch_count': rng.randint(0, 20),
+        'app_switch_count': rng.randint(0, 20),
+        'session_duration_minutes': rng.uniform(0, 120),
+    }
+    # Both title keys, either empty, as activity summaries carry them
+    summary['window_title'] = rng.choice([_title(rng), '', summary['current_app']])
+    if rng.random() < 0.3:
+        summary['current_window_title'] = _title(rng)
+    return summary
+
+
+def _scalar(s: dict):
+    return detect_behavior(
+        current_app=s.get('current_app', ''),
+        window_title=s.get('window_title', '') or s.get('current_window_title', '') or '',
+        recent_windows=s.get('recent_windows', []) or [],
+        struggle_score=s.get('struggle_score', 0),
+        back_and_forth=s.get('back_and_forth_count', 0),
+        tab_switches=s.get('tab_switch_count', 0),
+        app_switches=s.get('app_switch_count', 0),
+        session_minutes=s.get('session_duration_minutes', 0),
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_matches_scalar(seed):
+    rng = random.Random(seed)
+    summaries = [_summary(rng) for _ in range(2000)]
+
+    assert detect_behavior_batch(summaries) == [_scalar(s) for s in summaries]
+
+
+def test_keyword_spanning_recent_windows():
+    # The scalar path scans the recent windows joined by spaces
+    summary = {'current_app': 'Finder', 'window_title': 'Downloads', 'recent_windows': ['Not', 'working today']}
+
+    assert detect_behavior_batch([summary]) == [_scalar(summary)]
+    assert detect_behavior_batch([summary])[0]['type'] == 'debugging'
+
+
+def test_empty_batch():
+    assert detect_behavior_batch([]) == []
+
+
+def test_bulk_report_carries_batch_behavior(client, db, device_id):
+    started = datetime(2026, 3, 3, 9, 0).isoformat()
+    titled = {'app_name': 'Code', 'window_title': 'TypeError in main.py', 'started_at': started, 'struggle_score': 2}
+    untitled = {'app_name': 'Safari', 'started_at': started}
+    response = client.post("/activities/report/bulk", json={"reports": [
+        {"device_id": device_id, "activities": [titled]},
+        {"device_id": f"{device_id}-b", "activities": [untitled]},
+    ]})
+    assert response.status_code == 200
+
+    payloads = {
+        job.device_id: job.payload["struggle_data"]
+        for job in db.query(HintJob).filter(HintJob.device_id.in_([device_id, f"{device_id}-b"]))
+        if "trigger_type" not in job.payload
+    }
+    assert payloads[device_id]["behavior"] == _scalar({
+        'current_app': 'Code', 'window_title': 'TypeError in main.py', 'recent_windows': [], 'struggle_score': 2,
+    })
+    # Classified by the consumer, against the stored window title
+    assert "behavior" not in payloads[f"{device_id}-b"]
@@ -0,0 +1,72 @@
+"""Columnar export watermark and admin route (services/columnar_export.py)."""
+import threading
+import time
+
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from app.config import settings
+from app.db import SessionLocal
+from app.models.hint import Hint, HintCategory
+from app.schemas.export import ExportRequest
+from app.services.columnar_export import export_dataset
+
+
+def _hint(device_id: str) -> Hint:
+    return Hint(device_id=device_id, category=HintCategory.WORKFLOW_TIP, title="Tip", message="Try this")
+
+
+def _exported_ids(out_dir, device_id: str) -> list[int]:
+    ids = []
+    for path in sorted((out_dir / "hints" / f"device={device_id}").glob("*.parquet")):
+        ids += pq.read_table(path, columns=["id"]).column("id").to_pylist()
+    return ids
+
+
+def test_export_waits_for_a_transaction_committed_late(db, device_id, tmp_path):
+    db.add(_hint(device_id))
+    db.commit()
+
+    late = SessionLocal()
+    late.add(_hint(device_id))
+    late.flush()  # Holds its id, and the write lock, uncommitted
+
+    exported = {}
+
+    def run_export():
+        with SessionLocal() as session:
+            exported["result"] = export_dataset(session, "hints", out_dir=str(tmp_path))
+
+    export = threading.Thread(target=run_export)
+    export.start()
+    time.sleep(0.3)
+    assert export.is_alive()  # Waiting for the open transaction, not exporting around it
+    late.commit()
+    late.close()
+    export.join(timeout=10)
+
+    ids = [h.id for h in db.query(Hint).filter(Hint.device_id == device_id).order_by(Hint.id)]
+    assert _exported_ids(tmp_path, device_id) == ids
+    assert exported["result"].high_water_mark >= ids[-1]
+
+    db.add(_hint(device_id))
+    db.commit()
+    export_dataset(db, "hints", out_dir=str(tmp_path))
+    # The next run picks up only the new row
+    assert _exported_ids(tmp_path, device_id) == ids + [ids[-1] + 1]
+
+
+def test_admin_routes_need_the_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "")
+    assert client.get("/admin/profiler").status_code == 403  # Debug mode doesn't open them
+
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    assert client.get("/admin/profiler").status_code == 403
+    assert client.get("/admin/profiler", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/admin/profiler", headers={"X-Admin-Token": "secret"}).status_code == 200
+
+
+@pytest.mark.parametrize("value", ["none", "None", None])
+def test_compression_none_means_uncompressed(value):
+    assert ExportRequest(dataset="hints", compression=value).compression is None
@@ -0,0 +1,61 @@
+"""Server-side event reminders (services/event_scheduler.py)."""
+import asyncio
+from datetime import datetime, timedelta
+
+from app.models.hint import Hint
+from app.models.scheduled_event import ScheduledEvent, ScheduledEventStatus
+from app.services.event_scheduler import EventScheduler
+
+
+def _event(db, device_id: str, due_in: timedelta) -> ScheduledEvent:
+    event = ScheduledEvent(device_id=device_id, event_title="Standup", due_at=datetime.utcnow() + due_in)
+    db.add(event)
+    db.commit()
+    return event
+
+
+def test_scheduled_event_fires_at_due_time(db, device_id):
+    async def run():
+        scheduler = EventScheduler()
+        await scheduler.start()
+        try:
+            scheduler.schedule(db, _event(db, device_id, timedelta(milliseconds=200)))
+            await asyncio.sleep(1)
+        finally:
+            await scheduler.stop()
+
+    asyncio.run(run())
+
+    db.expire_all()
+    event = db.query(ScheduledEvent).filter(ScheduledEvent.device_id == device_id).one()
+    assert event.status == ScheduledEventStatus.FIRED
+    assert db.get(Hint, event.hint_id).device_id == device_id
+
+
+def test_sweep_fires_events_scheduled_elsewhere_once(db, device_id):
+    # Never schedule()d through this scheduler, as if another worker took the request
+    due = _event(db, device_id, timedelta(minutes=-1))
+    overdue = _event(db, device_id, timedelta(hours=-1))
+    later = _event(db, device_id, timedelta(hours=1))
+
+    scheduler = EventScheduler()
+    asyncio.run(scheduler._sweep())
+    asyncio.run(scheduler._sweep())
+
+    db.expire_all()
+    assert [e.status for e in (due, overdue, later)] == [
+        ScheduledEventStatus.FIRED, ScheduledEventStatus.EXPIRED, ScheduledEventStatus.SCHEDULED,
+    ]
+    assert overdue.hint_id is None
+    assert db.query(Hint).filter(Hint.device_id == device_id).count() == 1
+
+
+def test_cancelled_event_does_not_fire(client, db, device_id):
+    event = _event(db, device_id, timedelta(minutes=-1))
+    assert client.delete(f"/events/schedule/{event.id}").status_code == 200
+
+    asyncio.run(EventScheduler()._fire(event.id))
+
+    db.expire_all()
+    assert event.status == ScheduledEventStatus.CANCELLED
+    assert db.query(Hint).filter(Hint.device_id == device_id).count() == 0
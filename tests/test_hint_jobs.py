@@ -0,0 +1,82 @@
+"""Durable hint check queue (services/hint_jobs.py)."""
+from datetime import datetime, timedelta
+from itertools import count
+
+import pytest
+
+from app.config import settings
+from app.models.hint_job import HintJob, HintJobStatus
+from app.services.hint_jobs import claim_jobs, complete_job, enqueue_hint_checks, fail_job
+
+# Shards outside the configured range, so each test only claims its own jobs
+_shards = count(settings.hint_job_slots + 1)
+
+
+@pytest.fixture
+def shard():
+    return next(_shards)
+
+
+def _job(db, device_id: str, shard: int, **values) -> HintJob:
+    job = HintJob(device_id=device_id, shard=shard, payload={"trigger_type": "test"}, **values)
+    db.add(job)
+    db.commit()
+    return job
+
+
+def test_report_queues_its_check_in_the_same_transaction(client, db, device_id):
+    client.post("/activities/report", json={"device_id": device_id, "activities": [
+        {"app_name": "Code", "window_title": "main.py", "started_at": datetime(2026, 3, 7, 9).isoformat()},
+    ]})
+
+    job = db.query(HintJob).filter(HintJob.device_id == device_id).one()
+    assert job.status == HintJobStatus.QUEUED
+    assert job.payload["struggle_data"]["current_app"] == "Code"
+
+
+def test_rolled_back_enqueue_leaves_no_job(db, device_id):
+    enqueue_hint_checks(db, [{"device_id": device_id, "trigger_type": "test"}])
+    db.rollback()
+
+    assert db.query(HintJob).filter(HintJob.device_id == device_id).count() == 0
+
+
+def test_a_job_is_claimed_once_and_deleted_when_done(db, device_id, shard):
+    job = _job(db, device_id, shard)
+
+    claimed = claim_jobs("worker-a", 10, frozenset({shard}))
+    assert [(c.id, c.attempts) for c in claimed] == [(job.id, 1)]
+    assert claim_jobs("worker-b", 10, frozenset({shard})) == []
+
+    complete_job(claimed[0], "worker-a")
+    assert db.query(HintJob).filter(HintJob.id == job.id).count() == 0
+
+
+def test_failed_job_is_retried_with_backoff_then_kept(db, device_id, shard, monkeypatch):
+    monkeypatch.setattr(settings, "hint_job_max_attempts", 2)
+    job = _job(db, device_id, shard)
+
+    first, = claim_jobs("worker-a", 10, frozenset({shard}))
+    assert fail_job(first, "worker-a", "LLM timed out") == "retry"
+    db.expire_all()
+    assert job.status == HintJobStatus.QUEUED and job.run_after > datetime.utcnow()
+    assert claim_jobs("worker-a", 10, frozenset({shard})) == []  # Still backing off
+
+    job.run_after = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    second, = claim_jobs("worker-a", 10, frozenset({shard}))
+    assert fail_job(second, "worker-a", "LLM timed out again") == "failed"
+    db.expire_all()
+    assert (job.status, job.attempts, job.last_error) == (HintJobStatus.FAILED, 2, "LLM timed out again")
+
+
+def test_job_of_a_dead_consumer_is_reclaimed_after_its_lease(db, device_id, shard):
+    stale = datetime.utcnow() - timedelta(seconds=settings.hint_job_lease_seconds + 1)
+    job = _job(db, device_id, shard, status=HintJobStatus.RUNNING, attempts=1, locked_at=stale, locked_by="dead")
+
+    reclaimed, = claim_jobs("worker-a", 10, frozenset({shard}))
+    assert (reclaimed.id, reclaimed.attempts) == (job.id, 2)
+
+    # The old owner finishing late doesn't delete the new owner's job
+    complete_job(reclaimed._replace(attempts=1), "dead")
+    assert db.query(HintJob).filter(HintJob.id == job.id).count() == 1
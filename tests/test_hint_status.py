@@ -0,0 +1,52 @@
+"""Bulk hint status updates (PATCH /hints/status)."""
+from datetime import datetime
+
+from app.models.hint import Hint, HintCategory, HintStatus
+from app.schemas.hint import MAX_STATUS_BATCH
+
+
+def _hints(db, device_id: str, count: int) -> list[Hint]:
+    hints = [
+        Hint(device_id=device_id, category=HintCategory.WORKFLOW_TIP, title=f"Tip {i}", message="Try this")
+        for i in range(count)
+    ]
+    db.add_all(hints)
+    db.commit()
+    return hints
+
+
+def test_bulk_update_sets_timestamps_like_the_single_route(client, db, device_id):
+    shown, dismissed, untouched = _hints(db, device_id, 3)
+    earlier = datetime(2026, 3, 6, 9, 0)
+    dismissed.shown_at = earlier
+    db.commit()
+
+    response = client.patch("/hints/status", json=[
+        {"hint_id": shown.id, "status": "shown"},
+        {"hint_id": dismissed.id, "status": "shown"},
+        {"hint_id": dismissed.id, "status": "dismissed"},  # The last entry for an id wins
+        {"hint_id": 10**9, "status": "shown"},            # Unknown ids are skipped
+    ])
+
+    assert response.status_code == 200
+    assert [(h["id"], h["status"]) for h in response.json()] == [(shown.id, "shown"), (dismissed.id, "dismissed")]
+    db.expire_all()
+    assert shown.shown_at is not None and shown.dismissed_at is None
+    assert dismissed.shown_at == earlier and dismissed.dismissed_at is not None
+    assert untouched.status == HintStatus.PENDING
+
+
+def test_empty_batch(client):
+    response = client.patch("/hints/status", json=[])
+
+    assert (response.status_code, response.json()) == (200, [])
+
+
+def test_batch_over_the_limit_is_422(client, db, device_id):
+    hint, = _hints(db, device_id, 1)
+    updates = [{"hint_id": hint.id, "status": "shown"}] * (MAX_STATUS_BATCH + 1)
+
+    assert client.patch("/hints/status", json=updates).status_code == 422
+    assert client.patch("/hints/status", json=updates[:MAX_STATUS_BATCH]).status_code == 200
+    db.expire_all()
+    assert hint.status == HintStatus.SHOWN
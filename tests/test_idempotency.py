@@ -0,0 +1,59 @@
+"""Retried reports and time triggers (services/idempotency.py)."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.config import settings
+from app.models.activity import ActivityLog
+from app.models.ingest_receipt import IngestReceipt
+from app.services import idempotency
+
+
+def _report(device_id: str) -> dict:
+    return {
+        "device_id": device_id,
+        "batch_id": "7",
+        "activities": [{"app_name": "Code", "window_title": "main.py", "started_at": datetime(2026, 3, 5, 9).isoformat()}],
+    }
+
+
+def _time_trigger(device_id: str) -> dict:
+    return {
+        "device_id": device_id, "trigger_type": "break_reminder", "app_name": "Code", "duration_minutes": 50,
+        "break_number": 1, "request_id": "r-1",
+    }
+
+
+def test_retried_report_is_stored_once(client, db, device_id):
+    first = client.post("/activities/report", json=_report(device_id))
+    retry = client.post("/activities/report", json=_report(device_id))
+
+    assert retry.headers.get("X-Duplicate") == "true"
+    assert retry.json() == first.json()
+    assert db.query(ActivityLog).filter(ActivityLog.device_id == device_id).count() == 1
+
+
+def test_crashed_time_trigger_is_taken_over_after_the_lease(client, db, device_id):
+    # The first request claimed the key, committed, and died before storing a result
+    idempotency.claim(db, "time_trigger", [(device_id, "r-1")])
+    db.commit()
+
+    live = client.post("/hints/time-trigger", json=_time_trigger(device_id))
+    assert live.headers.get("X-Duplicate") == "true"
+    assert live.json()["status"] == "in_progress"
+
+    db.execute(
+        update(IngestReceipt)
+        .where(IngestReceipt.device_id == device_id)
+        .values(claimed_at=datetime.utcnow() - timedelta(seconds=settings.idempotency_claim_lease_seconds + 1))
+    )
+    db.commit()
+
+    taken_over = client.post("/hints/time-trigger", json=_time_trigger(device_id))
+    assert "X-Duplicate" not in taken_over.headers
+    assert taken_over.json()["status"] != "in_progress"
+
+    # Later retries get the stored result, not another run
+    retry = client.post("/hints/time-trigger", json=_time_trigger(device_id))
+    assert retry.headers.get("X-Duplicate") == "true"
+    assert retry.json() == taken_over.json()
@@ -0,0 +1,40 @@
+"""Hint pipeline metrics (app/metrics.py)."""
+from prometheus_client import REGISTRY
+
+from app.models.hint import Hint, HintCategory
+
+
+def _hints_created() -> float:
+    return REGISTRY.get_sample_value("hints_created_total", {"category": "focus_alert"}) or 0
+
+
+def _hint(device_id: str) -> Hint:
+    return Hint(device_id=device_id, category=HintCategory.FOCUS_ALERT, title="Focus", message="One thing at a time")
+
+
+def test_hints_are_counted_when_committed(db, device_id):
+    before = _hints_created()
+
+    db.add(_hint(device_id))
+    db.flush()
+    assert _hints_created() == before
+    db.commit()
+
+    assert _hints_created() == before + 1
+
+
+def test_rolled_back_hints_are_not_counted(db, device_id):
+    before = _hints_created()
+
+    db.add(_hint(device_id))
+    db.flush()
+    db.rollback()
+
+    assert _hints_created() == before
+
+
+def test_metrics_endpoint(client):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert "hints_created_total" in response.text
@@ -0,0 +1,58 @@
+"""Preferences read-through cache and get-or-create (services/preferences_cache.py)."""
+from sqlalchemy import update
+
+from app.models.user_preferences import UserPreferences
+from app.services.preferences_cache import _create_preferences, get_or_create_preferences, preferences_cache
+
+
+def test_get_creates_defaults_once(client, db, device_id):
+    first = client.get(f"/preferences/{device_id}").json()
+    second = client.get(f"/preferences/{device_id}").json()
+
+    assert first == second
+    assert db.query(UserPreferences).filter(UserPreferences.device_id == device_id).count() == 1
+
+
+def test_reads_are_cached_and_patch_refreshes_them(client, db, device_id):
+    client.get(f"/preferences/{device_id}")
+    # Behind the cache's back, as another worker without NOTIFY would
+    db.execute(update(UserPreferences).where(UserPreferences.device_id == device_id).values(max_hints_per_hour=7))
+    db.commit()
+    assert client.get(f"/preferences/{device_id}").json()["max_hints_per_hour"] == 20
+
+    patched = client.patch(f"/preferences/{device_id}", json={"work_session_minutes": 45}).json()
+
+    assert client.get(f"/preferences/{device_id}").json() == patched
+    assert (patched["work_session_minutes"], patched["max_hints_per_hour"]) == (45, 7)
+
+
+def test_patch_before_get_is_404(client, device_id):
+    assert client.patch(f"/preferences/{device_id}", json={"work_session_minutes": 45}).status_code == 404
+
+
+def test_create_is_idempotent(db, device_id):
+    # A second (racing) create finds the first one's row instead of failing the unique constraint
+    first = _create_preferences(db, device_id, commit=True)
+    second = _create_preferences(db, device_id, commit=True)
+
+    assert first.id == second.id
+
+
+def test_defaults_created_in_a_rolled_back_transaction_are_not_cached(db, device_id):
+    db.begin()
+    assert preferences_cache.get(db, device_id).device_id == device_id
+    db.rollback()
+
+    assert db.query(UserPreferences).filter(UserPreferences.device_id == device_id).first() is None
+    prefs = get_or_create_preferences(db, device_id)
+    assert preferences_cache.get(db, device_id).id == prefs.id
+
+
+def test_invalidate_keeps_newer_entries(client, device_id):
+    version = client.get(f"/preferences/{device_id}").json()["version"]
+
+    preferences_cache.invalidate(device_id, version)  # A notification for the write we already have
+    assert preferences_cache._entries.get(device_id) is not None
+
+    preferences_cache.invalidate(device_id, version + 1)
+    assert preferences_cache._entries.get(device_id) is None
@@ -0,0 +1,94 @@
+"""SQL statement budgets for the hot routes (X-SQL-Queries, see app/sql_profiler.py)."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.db import engine
+from app.models.hint import Hint, HintCategory, HintPriority
+from app.sql_profiler import assert_query_budget
+
+STARTED = datetime(2026, 3, 2, 9, 0)
+
+# The ORM batches a report's INSERTs into one statement where RETURNING keeps
+# row order (Postgres); on SQLite it falls back to one INSERT per row
+PER_ROW_INSERTS = engine.dialect.name == "sqlite"
+
+
+def _report(device_id: str, count: int) -> dict:
+    return {
+        "device_id": device_id,
+        "activities": [
+            {
+                "app_name": ["Code", "Slack"][i % 2],
+                "window_title": f"budget_{i % 3}.py",
+                "started_at": (STARTED + timedelta(seconds=30 * i)).isoformat(),
+                "duration_seconds": 30.0,
+            }
+            for i in range(count)
+        ],
+    }
+
+
+def _inserts(count: int) -> int:
+    return count if PER_ROW_INSERTS else 1
+
+
+@pytest.fixture(autouse=True)
+def interned_names(client):
+    # Names seen before, as they are for any device but the fleet's first
+    client.post("/activities/report", json=_report("budget-warmup", 3))
+
+
+@pytest.mark.parametrize("count", [1, 20])
+def test_report_query_budget(client, device_id, count):
+    # New device: last app lookup, preferences created, hint job, response rows
+    response = client.post("/activities/report", json=_report(device_id, count))
+    assert response.status_code == 200
+    assert_query_budget(response, _inserts(count) + 5)
+
+    # Known device: the last app and preferences come from the caches
+    response = client.post("/activities/report", json=_report(device_id, count))
+    assert_query_budget(response, _inserts(count) + 2)
+
+
+def test_report_retry_query_budget(client, device_id):
+    report = {**_report(device_id, 20), "batch_id": "budget-1"}
+    client.post("/activities/report", json=report)
+
+    response = client.post("/activities/report", json=report)
+    assert response.headers["X-Duplicate"] == "true"
+    assert_query_budget(response, 1)
+
+
+@pytest.mark.parametrize("validate", [False, True])
+def test_summary_paging_query_budget(client, device_id, validate, monkeypatch):
+    monkeypatch.setattr(settings, "validate_responses", validate)
+    client.post("/activities/report", json=_report(device_id, 25))
+
+    seen, cursor = [], None
+    for _ in range(3):
+        params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/activities/{device_id}/summary", params=params)
+        assert_query_budget(response, 1)
+        seen += [row["id"] for row in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+
+    assert len(seen) == len(set(seen)) == 25
+    assert cursor is None
+
+
+@pytest.mark.parametrize("validate", [False, True])
+@pytest.mark.parametrize("count", [0, 1, 30])
+def test_pending_hints_query_budget(client, db, device_id, count, validate, monkeypatch):
+    monkeypatch.setattr(settings, "validate_responses", validate)
+    db.add_all([
+        Hint(device_id=device_id, category=HintCategory.WORKFLOW_TIP, priority=HintPriority.LOW,
+             title=f"Tip {i}", message="Try the command palette")
+        for i in range(count)
+    ])
+    db.commit()
+
+    response = client.get(f"/hints/{device_id}/pending")
+    assert response.json()["count"] == count
+    assert_query_budget(response, 1)
@@ -0,0 +1,91 @@
+"""The fast row serializers must produce what response_model validation would."""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.models.activity import ActivityLog
+from app.models.hint import Hint, HintCategory, HintPriority, HintStatus
+from app.schemas.activity import ActivityLogResponse
+from app.schemas.hint import HintResponse
+from app.services.interning import app_names, window_titles
+from app.services.row_serializers import activity_log_rows, hint_rows
+from app.wire_format import FastResponse
+
+STARTED = datetime(2026, 3, 1, 9, 30, 15, 123456)
+
+
+def _as_json(rows) -> list:
+    return json.loads(FastResponse(rows).body)
+
+
+def _validated_json(schema, objects) -> list:
+    # What FastAPI does with a response_model: validate the ORM objects, then dump
+    adapter = TypeAdapter(list[schema])
+    return json.loads(adapter.dump_json(adapter.validate_python(objects, from_attributes=True)))
+
+
+@pytest.fixture
+def activity_logs(db, device_id):
+    app_ids = app_names.get_ids(db, ["Code", "Slack"])
+    title_ids = window_titles.get_ids(db, ["main.py"])
+    logs = [
+        ActivityLog(
+            device_id=device_id,
+            app_id=app_ids["Code"],
+            window_title_id=title_ids["main.py"],
+            started_at=STARTED,
+            ended_at=STARTED + timedelta(seconds=42),
+            duration_seconds=42.5,
+            idle_seconds=0.0,
+            might_be_stuck=False,
+        ),
+        # Every nullable column left empty
+        ActivityLog(device_id=device_id, app_id=app_ids["Slack"], started_at=STARTED),
+    ]
+    db.add_all(logs)
+    db.commit()
+    return logs
+
+
+@pytest.fixture
+def hints(db, device_id):
+    now = datetime.utcnow()
+    hints = [
+        Hint(device_id=device_id, category=HintCategory.FOCUS_ALERT, priority=HintPriority.HIGH,
+             title="Focus", message="Close Slack"),
+        Hint(device_id=device_id, category=HintCategory.WORKFLOW_TIP, priority=HintPriority.LOW,
+             title="Tip", message="Use the palette", status=HintStatus.SHOWN, shown_at=now),
+        Hint(device_id=device_id, category=HintCategory.EVENT_REMINDER, title="Standup",
+             message="In 5 minutes", status=HintStatus.DISMISSED, shown_at=now, dismissed_at=now),
+    ]
+    db.add_all(hints)
+    db.commit()
+    return hints
+
+
+def test_activity_log_rows_match_response_model(db, activity_logs):
+    rows = activity_log_rows(db, [log.id for log in activity_logs])
+
+    assert [ActivityLogResponse.model_validate(row).model_dump() for row in rows] == rows
+    assert _as_json(rows) == _validated_json(ActivityLogResponse, activity_logs)
+    assert rows[1]["window_title"] is None and rows[1]["ended_at"] is None
+
+
+def test_hint_rows_match_response_model(db, device_id, hints):
+    rows = hint_rows(db, Hint.device_id == device_id, order_by=(Hint.id,))
+
+    assert [HintResponse.model_validate(row).model_dump() for row in rows] == rows
+    assert _as_json(rows) == _validated_json(HintResponse, hints)
+    assert [row["status"] for row in _as_json(rows)] == ["pending", "shown", "dismissed"]
+
+
+def test_pending_hints_route_matches_validated_path(client, device_id, hints, monkeypatch):
+    fast = client.get(f"/hints/{device_id}/pending").json()
+    monkeypatch.setattr(settings, "validate_responses", True)
+    validated = client.get(f"/hints/{device_id}/pending").json()
+
+    assert fast == validated
+    assert fast["count"] == 1
@@ -0,0 +1,34 @@
+"""Embedded SQLite mode: writes take the lock in a real transaction (app/db.py)."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.db import _is_sqlite_write
+from app.models.ingest_receipt import IngestReceipt
+
+
+@pytest.mark.parametrize("statement, write", [
+    ("SELECT * FROM hints", False),
+    ("  insert into hints DEFAULT VALUES", True),
+    ("SAVEPOINT sa_savepoint_1", True),
+    ("WITH recent AS (SELECT id FROM hints) SELECT * FROM recent", False),
+    ("WITH stale AS (SELECT id FROM hints)\nDELETE FROM hints WHERE id IN (SELECT id FROM stale)", True),
+])
+def test_write_detection(statement, write):
+    assert _is_sqlite_write(statement, None) is write
+
+
+def test_cte_write_is_transactional(db, device_id):
+    db.execute(
+        text(
+            "WITH now AS (SELECT :created_at AS created_at) "
+            "INSERT INTO ingest_receipts (device_id, kind, key, created_at) "
+            "SELECT :device_id, 'report', '1', created_at FROM now"
+        ),
+        {"device_id": device_id, "created_at": datetime.utcnow()},
+    )
+    db.rollback()
+
+    # Without BEGIN IMMEDIATE the driver (isolation_level=None) would have autocommitted it
+    assert db.query(IngestReceipt).filter(IngestReceipt.device_id == device_id).count() == 0
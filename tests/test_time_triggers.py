@@ -0,0 +1,89 @@
+"""Server-derived same-app / break triggers (services/time_triggers.py)."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.models.device_timer_state import DeviceTimerState
+from app.models.hint_job import HintJob
+from app.schemas.activity import ActivityReportItem
+from app.services.time_triggers import TimeTriggerTracker
+
+STARTED = datetime(2026, 3, 4, 9, 0)
+
+
+def _activity(minute: int, app_name: str = "Code") -> dict:
+    return {
+        "app_name": app_name,
+        "window_title": "main.py",
+        "started_at": (STARTED + timedelta(minutes=minute)).isoformat(),
+        "duration_seconds": 60.0,
+    }
+
+
+def _trigger_types(db, device_id: str) -> list[str]:
+    return [
+        job.payload["trigger_type"]
+        for job in db.query(HintJob).filter(HintJob.device_id == device_id).order_by(HintJob.id)
+        if "trigger_type" in job.payload
+    ]
+
+
+@pytest.fixture
+def server_triggers(monkeypatch):
+    monkeypatch.setattr(settings, "server_time_triggers_enabled", True)
+
+
+def test_off_by_default(client, db, device_id):
+    client.post("/activities/report", json={"device_id": device_id, "activities": [_activity(m) for m in range(15)]})
+
+    assert _trigger_types(db, device_id) == []
+    assert db.get(DeviceTimerState, device_id) is None
+
+
+def test_same_app_trigger_fires_once_per_threshold(client, db, device_id, server_triggers):
+    client.get(f"/preferences/{device_id}")
+    client.patch(f"/preferences/{device_id}", json={"same_app_threshold_minutes": 5, "enable_break_reminders": False})
+
+    for minute in range(12):
+        client.post("/activities/report", json={"device_id": device_id, "activities": [_activity(minute)]})
+
+    # Dwell reaches 5 minutes at the 5th report and 10 at the 10th
+    assert _trigger_types(db, device_id) == ["same_app_duration", "same_app_duration"]
+    state = db.get(DeviceTimerState, device_id)
+    assert (state.current_app, state.same_app_hints_sent) == ("Code", 2)
+
+
+def test_app_switch_restarts_dwell(client, db, device_id, server_triggers):
+    client.post("/activities/report", json={
+        "device_id": device_id,
+        "activities": [_activity(m) for m in range(4)] + [_activity(m, "Slack") for m in range(4, 8)],
+    })
+
+    assert _trigger_types(db, device_id) == []
+    assert db.get(DeviceTimerState, device_id).app_since == STARTED + timedelta(minutes=4)
+
+
+def test_state_is_shared_between_processes(db, device_id, server_triggers):
+    # Two trackers stand in for two API workers receiving alternate reports
+    workers = [TimeTriggerTracker(), TimeTriggerTracker()]
+    fired = []
+    for minute in range(10):
+        fired += workers[minute % 2].observe(db, device_id, [ActivityReportItem(**_activity(minute))])
+        db.commit()
+
+    assert [trigger.trigger_type for trigger in fired] == ["same_app_duration"]
+
+
+def test_rolled_back_report_leaves_no_trace(db, device_id, server_triggers):
+    tracker = TimeTriggerTracker()
+    tracker.observe(db, device_id, [ActivityReportItem(**_activity(0))])
+    db.commit()
+
+    assert tracker.observe(db, device_id, [ActivityReportItem(**_activity(m)) for m in range(1, 12)])
+    db.rollback()
+
+    db.expire_all()
+    assert db.get(DeviceTimerState, device_id).last_seen == STARTED + timedelta(minutes=1)
+    # The same stretch, replayed, still fires
+    assert tracker.observe(db, device_id, [ActivityReportItem(**_activity(m)) for m in range(1, 12)])
@@ -0,0 +1,65 @@
+"""Compressed request bodies (wire_format.decompress_body)."""
+import gzip
+import json
+import zlib
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.wire_format import decompress_body
+
+BODY = b'{"hello": "world"}' * 50
+
+
+def _report(client, body: bytes, encoding: str):
+    return client.post(
+        "/activities/report",
+        content=body,
+        headers={"Content-Type": "application/json", "Content-Encoding": encoding},
+    )
+
+
+def test_gzip_reads_every_member():
+    body = gzip.compress(BODY[:400]) + gzip.compress(BODY[400:])
+
+    assert decompress_body(body, "gzip") == BODY
+
+
+def test_truncated_gzip_is_an_error():
+    with pytest.raises(zlib.error):
+        decompress_body(gzip.compress(BODY)[:-6], "gzip")
+
+
+def test_gzip_past_the_limit_is_refused(monkeypatch):
+    monkeypatch.setattr(settings, "max_request_body_bytes", 500)
+    # The cap spans members: each fits on its own, both together don't
+    body = gzip.compress(BODY[:400]) + gzip.compress(BODY[400:])
+
+    with pytest.raises(HTTPException) as error:
+        decompress_body(body, "gzip")
+    assert error.value.status_code == 413
+
+
+def test_zstd_reads_every_frame():
+    zstandard = pytest.importorskip("zstandard")
+    compressor = zstandard.ZstdCompressor()
+    body = compressor.compress(BODY[:400]) + compressor.compress(BODY[400:])
+
+    assert decompress_body(body, "zstd") == BODY
+
+
+def test_truncated_zstd_is_an_error():
+    zstandard = pytest.importorskip("zstandard")
+    compressor = zstandard.ZstdCompressor()
+    body = compressor.compress(BODY[:400]) + compressor.compress(BODY[400:])[:-3]
+
+    with pytest.raises(zstandard.ZstdError):
+        decompress_body(body, "zstd")
+
+
+def test_truncated_body_is_a_400(client, device_id):
+    payload = json.dumps({"device_id": device_id, "activities": []}).encode()
+
+    assert _report(client, gzip.compress(payload), "gzip").status_code == 200
+    assert _report(client, gzip.compress(payload)[:-6], "gzip").status_code == 400